@@ -0,0 +1,264 @@
+import reprlib
+import sys
+import time
+from types import BuiltinFunctionType, CodeType, FunctionType, ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+TYPING = False
+if TYPING:
+    from .runner import Runner
+
+# Values of these types are never interesting to show as variables:
+SKIPPED_TYPES = (ModuleType, FunctionType, BuiltinFunctionType, type)
+# Values of these types can't change without being reassigned, so comparing identity is enough:
+IMMUTABLE_TYPES = (int, float, complex, bool, str, bytes, type(None), range)
+
+
+class MonitorRepr(reprlib.Repr):
+    def __init__(self, max_length: int):
+        super().__init__()
+        self.maxstring = self.maxother = self.maxlong = max_length
+        self.maxlist = self.maxtuple = self.maxset = self.maxfrozenset = self.maxdeque = self.maxarray = 10
+        self.maxdict = 6
+
+    def repr_instance(self, x, level):
+        try:
+            s = repr(x)
+        except Exception:
+            return f"<{type(x).__name__} instance>"
+        if len(s) > self.maxother:
+            s = s[:self.maxother - 3] + "..."
+        return s
+
+
+class Monitor:
+    """
+    Traces the user's code with sys.monitoring (PEP 669, Python 3.12+) and sends structured events
+    in batches to the runner's callback, with event type 'monitor' and the data:
+
+        events: a list of dicts, each with keys:
+            type: 'call', 'line' or 'return'
+            line: the line number
+            function: the name of the function ('<module>' at the top level)
+            depth: how many user functions deep the call is, starting at 0
+            locals: (only for 'line', and for the 'return' at the end of the program) a dict of variable name
+                to a short repr, only for variables which are new or have changed since the last event in the same call
+            value: (only for 'return') a short repr of the return value
+        dropped: the number of events left out by `max_events_per_second` or `max_events` since the previous batch
+
+    Unlike snoop, only the code objects of the user's program are monitored, so library code runs at full speed,
+    and nothing is formatted as text.
+    Events can be thinned out with `sample_every` (only send every nth line event)
+    and `max_events_per_second`, so that tracing an animation loop doesn't slow it down to a crawl.
+    Once `max_events` have been sent, monitoring is switched off and the rest of the program runs untraced.
+    """
+
+    tool_id = 0  # sys.monitoring.DEBUGGER_ID
+
+    def __init__(
+        self,
+        runner: "Runner",
+        code_obj: CodeType,
+        *,
+        sample_every: int = 1,
+        max_events_per_second: Optional[int] = None,
+        max_events: int = 100_000,
+        batch_size: int = 100,
+        flush_time: float = 0.1,
+        max_repr_length: int = 60,
+    ):
+        self.runner = runner
+        self.code_obj = code_obj
+        self.sample_every = max(1, sample_every)
+        self.max_events_per_second = max_events_per_second
+        self.max_events = max_events
+        self.batch_size = batch_size
+        self.flush_time = flush_time
+        self.repr = MonitorRepr(max_repr_length).repr
+
+        self.buffer: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.total_events = 0
+        self.line_count = 0
+        self.last_flush = time.perf_counter()
+        self.window_start = self.last_flush
+        self.window_count = 0
+
+        # Variable name -> (value, repr) of what was last sent, for each frame being traced.
+        # Only frames which are currently running are kept: a generator's entry is dropped when it yields
+        # (it may never be resumed) and starts afresh when it resumes, so its locals are sent again:
+        self.frame_states: Dict[Any, Dict[str, Tuple[Any, str]]] = {}
+        self.watched_names: Dict[CodeType, Tuple[str, ...]] = {}
+        self.target_codes = set()
+        self.find_codes(code_obj)
+
+    def find_codes(self, code_obj: CodeType):
+        self.target_codes.add(code_obj)
+        for const in code_obj.co_consts:
+            if isinstance(const, CodeType):
+                self.find_codes(const)
+
+    def names_for(self, code: CodeType) -> Tuple[str, ...]:
+        names = self.watched_names.get(code)
+        if names is None:
+            names = code.co_varnames + code.co_cellvars + code.co_freevars
+            if code.co_name == "<module>":
+                names += code.co_names
+            names = self.watched_names[code] = tuple(
+                name for name in dict.fromkeys(names) if not name.startswith("__")
+            )
+        return names
+
+    def allow_event(self) -> bool:
+        """
+        Returns False (and counts the event as dropped) if an event would exceed max_events
+        or max_events_per_second.  Reaching max_events also switches off all our events,
+        so that the callbacks are no longer called at all.
+        """
+        if self.total_events >= self.max_events:
+            self.dropped += 1
+            self.stop_events()
+            return False
+        if self.max_events_per_second:
+            now = time.perf_counter()
+            if now - self.window_start >= 1:
+                self.window_start = now
+                self.window_count = 0
+            if self.window_count >= self.max_events_per_second:
+                self.dropped += 1
+                return False
+            self.window_count += 1
+        return True
+
+    def add_event(self, event: Dict[str, Any]):
+        self.total_events += 1
+        self.buffer.append(event)
+        if len(self.buffer) >= self.batch_size or time.perf_counter() - self.last_flush >= self.flush_time:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.perf_counter()
+        if self.buffer or self.dropped:
+            events, self.buffer = self.buffer, []
+            dropped, self.dropped = self.dropped, 0
+            self.runner.callback("monitor", events=events, dropped=dropped)
+
+    def changed_locals(self, frame, code: CodeType) -> Dict[str, str]:
+        state = self.frame_states.setdefault(frame, {})
+        f_locals = frame.f_locals
+        changed = {}
+        for name in self.names_for(code):
+            try:
+                value = f_locals[name]
+            except KeyError:
+                continue
+            if isinstance(value, SKIPPED_TYPES):
+                continue
+            previous = state.get(name)
+            if previous is not None and previous[0] is value and isinstance(value, IMMUTABLE_TYPES):
+                continue
+            value_repr = self.repr(value)
+            if previous is not None and previous[0] is value and previous[1] == value_repr:
+                continue
+            state[name] = (value, value_repr)
+            changed[name] = value_repr
+        return changed
+
+    def on_start(self, code: CodeType, _offset: int):
+        if self.allow_event():
+            self.add_event(dict(
+                type="call",
+                line=code.co_firstlineno,
+                function=code.co_name,
+                depth=len(self.frame_states),
+            ))
+        self.frame_states.setdefault(sys._getframe(1), {})
+
+    def on_line(self, code: CodeType, line_number: int):
+        self.line_count += 1
+        if self.line_count % self.sample_every or not self.allow_event():
+            return
+        frame = sys._getframe(1)
+        self.add_event(dict(
+            type="line",
+            line=line_number,
+            function=code.co_name,
+            depth=max(0, len(self.frame_states) - 1),
+            locals=self.changed_locals(frame, code),
+        ))
+
+    def on_return(self, code: CodeType, _offset: int, value: Any):
+        frame = sys._getframe(1)
+        if self.allow_event():
+            event = dict(
+                type="return",
+                line=frame.f_lineno,
+                function=code.co_name,
+                depth=max(0, len(self.frame_states) - 1),
+                value=self.repr(value),
+            )
+            if code is self.code_obj:
+                # Line events come before their line runs, so this is the only chance
+                # to send what the program's last lines did to its variables:
+                event["locals"] = self.changed_locals(frame, code)
+            self.add_event(event)
+        self.frame_states.pop(frame, None)
+
+    def on_yield(self, _code: CodeType, _offset: int, _value: Any):
+        self.frame_states.pop(sys._getframe(1), None)
+
+    def on_resume(self, _code: CodeType, _offset: int):
+        self.frame_states.setdefault(sys._getframe(1), {})
+
+    def on_throw(self, code: CodeType, _offset: int, _exception: BaseException):
+        # A generator resumed by an exception thrown into it:
+        if code in self.target_codes:
+            self.frame_states.setdefault(sys._getframe(1), {})
+
+    def on_unwind(self, code: CodeType, _offset: int, _exception: BaseException):
+        if code in self.target_codes:
+            self.frame_states.pop(sys._getframe(1), None)
+
+    def stop_events(self):
+        monitoring = sys.monitoring
+        monitoring.set_events(self.tool_id, 0)
+        for code in self.target_codes:
+            monitoring.set_local_events(self.tool_id, code, 0)
+
+    def run(self):
+        monitoring = sys.monitoring
+        events = monitoring.events
+        if monitoring.get_tool(self.tool_id) is not None:
+            raise RuntimeError(f"sys.monitoring tool {self.tool_id} is already in use")
+
+        monitoring.use_tool_id(self.tool_id, "python_runner")
+        try:
+            monitoring.register_callback(self.tool_id, events.PY_START, self.on_start)
+            monitoring.register_callback(self.tool_id, events.LINE, self.on_line)
+            monitoring.register_callback(self.tool_id, events.PY_RETURN, self.on_return)
+            monitoring.register_callback(self.tool_id, events.PY_YIELD, self.on_yield)
+            monitoring.register_callback(self.tool_id, events.PY_RESUME, self.on_resume)
+            monitoring.register_callback(self.tool_id, events.PY_THROW, self.on_throw)
+            monitoring.register_callback(self.tool_id, events.PY_UNWIND, self.on_unwind)
+            # PY_UNWIND and PY_THROW can only be enabled globally, the others are only enabled in the user's code:
+            monitoring.set_events(self.tool_id, events.PY_UNWIND | events.PY_THROW)
+            local_events = events.PY_START | events.LINE | events.PY_RETURN | events.PY_YIELD | events.PY_RESUME
+            for code in self.target_codes:
+                monitoring.set_local_events(self.tool_id, code, local_events)
+            self.runner.execute(self.code_obj)
+        finally:
+            self.stop_events()
+            for event in (
+                events.PY_START, events.LINE, events.PY_RETURN,
+                events.PY_YIELD, events.PY_RESUME, events.PY_THROW, events.PY_UNWIND,
+            ):
+                monitoring.register_callback(self.tool_id, event, None)
+            monitoring.free_tool_id(self.tool_id)
+            self.frame_states.clear()
+            self.flush()
+
+
+def exec_monitor(runner: "Runner", code_obj: CodeType, monitor_config: dict):
+    if not hasattr(sys, "monitoring"):
+        raise RuntimeError("The 'monitor' mode requires Python 3.12 or later")
+    Monitor(runner, code_obj, **monitor_config).run()
@@ -9,17 +9,36 @@ class OutputBuffer:
     Buffers output to reduce the number of callback events.
     """
 
-    # See should_flush
+    # Defaults for the thresholds in should_flush, which can be overridden per instance:
     flush_length = 1000
-    flush_time = 1  # seconds
-
-    def __init__(self, flush):
+    flush_time = 0.1  # seconds
+    flush_parts = 2
+
+    def __init__(
+        self,
+        flush,
+        *,
+        batching: bool = True,
+        flush_length: int = None,
+        flush_time: float = None,
+        flush_parts: int = None,
+    ):
         self._flush = flush
+        # If batching is False, every call to put() is flushed immediately:
+        self.batching = batching
+        if flush_length is not None:
+            self.flush_length = flush_length
+        if flush_time is not None:
+            self.flush_time = flush_time
+        if flush_parts is not None:
+            self.flush_parts = flush_parts
         self.reset()
 
     def reset(self):
         self.parts: List[Dict[str, Any]] = []
-        self.last_time = time.time()
+        self.text_length = 0
+        # Zero means nothing has been flushed recently, so the next put() will flush immediately:
+        self.last_time = 0.0
 
     def put(self, output_type: str, text: Union[str, bytes], **extra):
         """
@@ -39,6 +58,7 @@ class OutputBuffer:
             self.parts[-1]["text"] += text
         else:
             self.parts.append(dict(type=output_type, text=text, **extra))
+        self.text_length += len(text)
 
         if self.should_flush():
             self.flush()
@@ -46,24 +66,40 @@ class OutputBuffer:
     def should_flush(self) -> bool:
         """
         Determines whether flush() should be called after a call to put().
-        By default, returns True if any of these are true:
-        - There are multiple parts (which typically means multiple different part types)
-        - It's been at least a second since the last flush
-        - The combined length of all the 'text' values is at least 1000 characters
+        If batching is turned off, always returns True.  Otherwise returns True if any of these are true:
+        - There are at least flush_parts parts (which typically means multiple different part types)
+        - It's been at least flush_time seconds since the last flush
+        - The combined length of all the 'text' values is at least flush_length characters
+
+        The time check means that the first output after a quiet period is flushed straight away,
+        so batching only kicks in when output is arriving faster than flush_time.
+        Callers are responsible for flushing at the points where pending output must be seen,
+        e.g. before waiting for input, sleeping or finishing (see Runner.callback and Runner.post_run),
+        and code which can run for a long time without writing anything can call flush_if_due.
+        """
+        if not self.batching:
+            return True
+        return (
+            len(self.parts) >= self.flush_parts
+            or time.time() - self.last_time >= self.flush_time
+            or self.text_length >= self.flush_length
+        )
+
+    def flush_if_due(self):
+        """
+        Flushes pending output if it has been waiting for at least flush_time seconds.
+        Unlike should_flush, this doesn't need a new call to put(), so it can be called periodically
+        to stop the last output before a long quiet stretch from being held back until the next output.
         """
-        #return (
-        #    len(self.parts) > 1
-        #    or self.last_time and time.time() - self.last_time > self.flush_time
-        #    or sum(len(p["text"]) for p in self.parts) >= self.flush_length
-        #)
-        # NCCB changed: always flush, i.e. turn off the caching functionality
-        return True
+        if self.parts and time.time() - self.last_time >= self.flush_time:
+            self.flush()
 
     def flush(self):
         if not self.parts:
             return
         self._flush(self.parts)
         self.reset()
+        self.last_time = time.time()
 
     @contextmanager
     def redirect_std_streams(self):
@@ -92,3 +128,6 @@ class SysStream:
 
     def flush(self):
         self.output_buffer.flush()
+
+    def flush_if_due(self):
+        self.output_buffer.flush_if_due()
@@ -0,0 +1,246 @@
+import cProfile
+import os
+import sys
+import time
+from collections import Counter
+from types import CodeType, FunctionType, ModuleType
+from typing import Any, Dict, List, Optional, Tuple
+
+TYPING = False
+if TYPING:
+    from .runner import Runner
+
+
+def bridge_callable_name(func: Any) -> str:
+    name = getattr(func, "name", None)
+    if not isinstance(name, str) or not name:
+        name = getattr(func, "__name__", None) or type(func).__name__
+    return name
+
+
+def import_bridge() -> Optional[ModuleType]:
+    try:
+        import strype_bridge  # type: ignore
+    except ImportError:
+        return None
+    return strype_bridge
+
+
+def find_bridge_functions() -> Dict[str, List[Tuple[Any, str]]]:
+    """
+    Returns the functions of the strype_bridge modules (strype_graphics_internal etc.), i.e. the functions which
+    call from Python into JavaScript, as a dict mapping bridge_callable_name(function) to a list of
+    (function, 'module.function') pairs.  In Pyodide the functions are JsProxy objects.
+    """
+    functions: Dict[str, List[Tuple[Any, str]]] = {}
+    bridge = import_bridge()
+    if bridge is None:
+        return functions
+    for module_name in dir(bridge):
+        if not (module_name.startswith("strype_") and module_name.endswith("_internal")):
+            continue
+        module = getattr(bridge, module_name)
+        for name in dir(module):
+            if name.startswith("_"):
+                continue
+            func = getattr(module, name, None)
+            if callable(func) and not isinstance(func, (type, ModuleType)):
+                functions.setdefault(bridge_callable_name(func), []).append((func, f"{module_name}.{name}"))
+    return functions
+
+
+def module_reaches_bridge(filename: str) -> bool:
+    """
+    Returns True if a loaded module with the given filename holds a reference to strype_bridge or one of its
+    modules, i.e. its code may call the bridge (apart from strype_bridge itself, nothing else can).
+    """
+    bridge = sys.modules.get("strype_bridge")
+    if bridge is None:
+        return False
+    bridge_modules = [bridge] + [getattr(bridge, name) for name in dir(bridge) if name.startswith("strype_")]
+    for module in list(sys.modules.values()):
+        if getattr(module, "__file__", None) == filename:
+            if any(value is m for value in list(vars(module).values()) for m in bridge_modules):
+                return True
+    return False
+
+
+class Profiler:
+    """
+    Runs the user's code under cProfile, and sends a report in a callback with event type 'profile' and the data:
+
+        total_time: the wall clock time of the run, in seconds
+        functions: a list of at most `max_functions` dicts, each describing one function, with keys
+            name, filename, line, calls, self_time and cumulative_time (in seconds),
+            and user (True if the function is in the user's program),
+            sorted by self_time, with the user's functions first
+        lines: a dict mapping line numbers of the user's program to the number of times the line ran
+        bridge: a dict with keys calls, time (in seconds), and functions, a dict mapping the name of each
+            strype_bridge function called (e.g. 'strype_graphics_internal.setImageLocation')
+            to a dict with keys calls and time
+
+    Line counts and bridge calls are recorded with sys.monitoring (Python 3.12+).
+    On older versions `lines` and `bridge` are empty.
+    """
+
+    tool_id = 1  # sys.monitoring.COVERAGE_ID, as cProfile itself may use PROFILER_ID
+
+    def __init__(
+        self,
+        runner: "Runner",
+        code_obj: CodeType,
+        *,
+        max_functions: int = 30,
+        line_counts: bool = True,
+        bridge_calls: bool = True,
+    ):
+        self.runner = runner
+        self.code_obj = code_obj
+        self.max_functions = max_functions
+        self.line_counts = line_counts
+        self.bridge_calls = bridge_calls
+
+        self.line_hits = Counter()
+        self.bridge_counts = Counter()
+        self.bridge_times = Counter()
+        # Start times of bridge calls in progress:
+        self.bridge_starts: List[float] = []
+        self.bridge_functions = find_bridge_functions()
+        # Maps filename to whether its module may call the bridge (see module_reaches_bridge).
+        # Call sites in those modules are never disabled, as they may call the bridge through a global
+        # which can change, e.g. when strype._bridge_instrumentation is enabled:
+        self.bridge_module_files: Dict[str, bool] = {}
+        self.target_codes = set()
+        self.find_codes(code_obj)
+
+    def find_codes(self, code_obj: CodeType):
+        self.target_codes.add(code_obj)
+        for const in code_obj.co_consts:
+            if isinstance(const, CodeType):
+                self.find_codes(const)
+
+    def on_line(self, _code: CodeType, line_number: int):
+        self.line_hits[line_number] += 1
+
+    def bridge_name(self, func: Any) -> Optional[str]:
+        """
+        Returns the 'module.function' name of func if it is one of the strype_bridge functions, otherwise None.
+        """
+        candidates = self.bridge_functions.get(bridge_callable_name(func))
+        if candidates:
+            for bridge_func, name in candidates:
+                # JsProxy objects are created afresh for each attribute access, but compare equal
+                # if they are proxies of the same JavaScript function:
+                if func is bridge_func or (type(func) is type(bridge_func) and func == bridge_func):
+                    return name
+        return None
+
+    def on_call(self, code: CodeType, _offset: int, func: Any, _arg0: Any):
+        name = self.bridge_name(func)
+        if name is None:
+            filename = code.co_filename
+            reaches_bridge = self.bridge_module_files.get(filename)
+            if reaches_bridge is None:
+                reaches_bridge = self.bridge_module_files[filename] = module_reaches_bridge(filename)
+            if reaches_bridge:
+                return None
+            # Nothing else can reach the bridge, so this call site is never interesting:
+            return sys.monitoring.DISABLE
+        if isinstance(func, FunctionType):
+            # Python functions (e.g. a bridge implemented in Python outside the browser) have no C_RETURN event,
+            # so they're counted without being timed:
+            self.bridge_counts[name] += 1
+        else:
+            self.bridge_starts.append(time.perf_counter())
+
+    def on_c_return(self, _code: CodeType, _offset: int, func: Any, _arg0: Any):
+        if self.bridge_starts:
+            name = self.bridge_name(func)
+            if name is not None:
+                self.bridge_counts[name] += 1
+                self.bridge_times[name] += time.perf_counter() - self.bridge_starts.pop()
+
+    def run(self):
+        monitoring = getattr(sys, "monitoring", None)
+        if monitoring and (self.line_counts or self.bridge_calls):
+            if monitoring.get_tool(self.tool_id) is not None:
+                raise RuntimeError(f"sys.monitoring tool {self.tool_id} is already in use")
+            self.run_monitored(monitoring)
+        else:
+            self.run_profiled()
+
+    def run_monitored(self, monitoring):
+        events = monitoring.events
+        monitoring.use_tool_id(self.tool_id, "python_runner")
+        try:
+            if self.line_counts:
+                monitoring.register_callback(self.tool_id, events.LINE, self.on_line)
+                for code in self.target_codes:
+                    monitoring.set_local_events(self.tool_id, code, events.LINE)
+            if self.bridge_calls:
+                # Call sites which can't call the bridge are disabled the first time they're seen,
+                # so this costs very little outside the strype modules once the program is up and running:
+                monitoring.register_callback(self.tool_id, events.CALL, self.on_call)
+                monitoring.register_callback(self.tool_id, events.C_RETURN, self.on_c_return)
+                monitoring.register_callback(self.tool_id, events.C_RAISE, self.on_c_return)
+                monitoring.set_events(self.tool_id, events.CALL | events.C_RETURN | events.C_RAISE)
+            self.run_profiled()
+        finally:
+            monitoring.set_events(self.tool_id, 0)
+            for code in self.target_codes:
+                monitoring.set_local_events(self.tool_id, code, 0)
+            for event in (events.LINE, events.CALL, events.C_RETURN, events.C_RAISE):
+                monitoring.register_callback(self.tool_id, event, None)
+            monitoring.free_tool_id(self.tool_id)
+            # We don't call restart_events, which would re-enable the call sites disabled by every tool, not just ours.
+            # Ours stay disabled, which is right for any later run too: on_call only disables them in modules
+            # which can't reach the bridge, and that doesn't change.
+
+    def run_profiled(self):
+        profile = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            profile.enable()
+            try:
+                self.runner.execute(self.code_obj)
+            finally:
+                profile.disable()
+        finally:
+            total_time = time.perf_counter() - start
+            profile.create_stats()
+            self.runner.callback(
+                "profile",
+                total_time=total_time,
+                functions=self.function_stats(profile.stats),
+                lines=dict(sorted(self.line_hits.items())),
+                bridge=dict(
+                    calls=sum(self.bridge_counts.values()),
+                    time=sum(self.bridge_times.values()),
+                    functions={
+                        name: dict(calls=calls, time=self.bridge_times[name])
+                        for name, calls in self.bridge_counts.most_common()
+                    },
+                ),
+            )
+
+    def function_stats(self, stats: dict) -> List[Dict[str, Any]]:
+        functions = []
+        for (filename, line, name), (_primitive_calls, calls, self_time, cumulative_time, _callers) in stats.items():
+            if name == "<method 'disable' of '_lsprof.Profiler' objects>":
+                continue
+            user = filename == self.runner.filename
+            functions.append(dict(
+                name=name,
+                filename=filename if user or filename == "~" else os.path.basename(filename),
+                line=line,
+                calls=calls,
+                self_time=self_time,
+                cumulative_time=cumulative_time,
+                user=user,
+            ))
+        functions.sort(key=lambda f: (not f["user"], -f["self_time"]))
+        return functions[:self.max_functions]
+
+
+def exec_profile(runner: "Runner", code_obj: CodeType, profile_config: dict):
+    Profiler(runner, code_obj, **profile_config).run()
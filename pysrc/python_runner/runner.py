@@ -29,13 +29,19 @@ class Runner:
         callback: Callback = None,
         source_code: str = "",
         filename: str = "my_program.py",
+        output_config: dict = None,
     ):
+        """
+        `output_config` is an optional dict of keyword arguments for the OutputBuffer,
+        e.g. `batching`, `flush_length`, `flush_time` and `flush_parts` (see OutputBuffer.should_flush).
+        """
         self.set_callback(callback)  # type: ignore
         self.set_filename(filename)
         self.set_source_code(source_code)
         self.console = InteractiveConsole()
         self.output_buffer = self.OutputBufferClass(
-            lambda parts: self.callback("output", parts=parts)
+            lambda parts: self.callback("output", parts=parts),
+            **(output_config or {}),
         )
         self.reset()
 
@@ -44,21 +50,56 @@ class Runner:
 
     def set_filename(self, filename: str):
         self.filename = os.path.normcase(os.path.abspath(filename))
+        self._source_file_written = False
 
     def set_source_code(self, source_code: str):
+        """
+        Registers source_code as the contents of self.filename.
+
+        This is done lazily: linecache is given a function to fetch the source, so the list of lines
+        is only built if something (a traceback, snoop, inspect) actually needs it.
+        The source is only written to disk if the program might read its own file (see `reads_own_file`),
+        or if there is already a file there, which linecache and `open` would otherwise use instead.
+        """
+        if (
+            source_code == getattr(self, "source_code", None)
+            and self.filename in linecache.cache
+        ):
+            # Already registered, and still in linecache:
+            return
         self.source_code = source_code
-        # Write to file if permitted by system
+        self._source_file_written = False
+        linecache.cache[self.filename] = (lambda: source_code,)
+        # (An empty program, as registered by __init__, never needs the file, so leave whatever is there alone.)
+        if source_code and (self.reads_own_file(source_code) or os.path.exists(self.filename)):
+            self.write_source_file()
+
+    def reads_own_file(self, source_code: str) -> bool:
+        """
+        Returns True if source_code might read its own file from disk, e.g. `open(__file__)`.
+        inspect and tracebacks don't need the file, as they use linecache.
+        """
+        return "__file__" in source_code or os.path.basename(self.filename) in source_code
+
+    def write_source_file(self):
+        """
+        Writes the source code to self.filename, if it isn't already there, and if permitted by the system.
+        """
+        if self._source_file_written:
+            return
+        self._source_file_written = True
+        try:
+            with open(self.filename) as f:
+                if f.read() == self.source_code:
+                    # e.g. the headless runner, where the program is run from its own file:
+                    return
+        except:  # pragma: no cover
+            pass
         try:
             with open(self.filename, "w") as f:
                 f.write(self.source_code)
         except:  # pragma: no cover
-            pass 
-        linecache.cache[self.filename] = (
-            len(self.source_code),
-            0,
-            [line + "\n" for line in self.source_code.splitlines()],
-            self.filename,
-        )
+            pass
 
     def callback(self, event_type: str, **data):
         """
@@ -78,14 +119,29 @@ class Runner:
         """
         return self.output_buffer.put(output_type, text, **extra)
 
-    def execute(self, code_obj: CodeType, mode: str = None, snoop_config: dict = None):
+    def execute(
+        self,
+        code_obj: CodeType,
+        mode: str = None,
+        snoop_config: dict = None,
+        monitor_config: dict = None,
+        profile_config: dict = None,
+    ):
         """
         Executes a raw code object. This is an internal method, use `run` or `run_async` instead.
         """
         if mode == "snoop":
             from .snoop import exec_snoop, SnoopStream
-            default_config = dict(columns=(), out=SnoopStream(self.output_buffer), color=False)
-            exec_snoop(self, code_obj, snoop_config={**default_config, **(snoop_config or {})})
+            snoop_config = dict(snoop_config or {})
+            limits = {name: snoop_config.pop(name) for name in SnoopStream.limit_names if name in snoop_config}
+            default_config = dict(columns=(), out=SnoopStream(self.output_buffer, **limits), color=False)
+            exec_snoop(self, code_obj, snoop_config={**default_config, **snoop_config})
+        elif mode == "monitor":
+            from .monitor import exec_monitor
+            exec_monitor(self, code_obj, monitor_config=monitor_config or {})
+        elif mode == "profile":
+            from .profiler import exec_profile
+            exec_profile(self, code_obj, profile_config=profile_config or {})
         else:
             return eval(code_obj, self.console.locals)  # type: ignore
 
@@ -98,7 +154,14 @@ class Runner:
                 self.output("traceback", **self.serialize_traceback(e))
         self.post_run()
 
-    def run(self, source_code: str, mode: str = "exec", snoop_config: dict = None):
+    def run(
+        self,
+        source_code: str,
+        mode: str = "exec",
+        snoop_config: dict = None,
+        monitor_config: dict = None,
+        profile_config: dict = None,
+    ):
         """
         Run the given Python source_code.
         See also run_async.
@@ -109,14 +172,33 @@ class Runner:
         `mode` can also be 'snoop' which will run the code with the
         [snoop](https://github.com/alexmojaki/snoop) debugger (installed separately).
         An optional `snoop_config` dict can be passed
-        which will be used as keyword arguments for a snoop.Config object.
+        which will be used as keyword arguments for a snoop.Config object,
+        apart from the output limits `max_events`, `max_line_length`, `collapse_after` and `tail_events`
+        which are passed to python_runner.snoop.SnoopStream.
+
+        `mode` can also be 'monitor' which traces the code with sys.monitoring (Python 3.12+)
+        and sends structured 'monitor' events to the callback, which is much faster than 'snoop'.
+        An optional `monitor_config` dict can be passed
+        which will be used as keyword arguments for a python_runner.monitor.Monitor,
+        e.g. `sample_every` and `max_events_per_second`.
+
+        `mode` can also be 'profile' which runs the code under cProfile and sends a 'profile' event
+        to the callback with function timings, line hit counts and bridge call timings.
+        An optional `profile_config` dict can be passed
+        which will be used as keyword arguments for a python_runner.profiler.Profiler.
 
         If `mode` is 'eval', the return value will be the evaluated expression if successful.
         """
         code_obj = self.pre_run(source_code, mode=mode)
         with self._execute_context():
             if code_obj:
-                return self.execute(code_obj, mode=mode, snoop_config=snoop_config)
+                return self.execute(
+                    code_obj,
+                    mode=mode,
+                    snoop_config=snoop_config,
+                    monitor_config=monitor_config,
+                    profile_config=profile_config,
+                )
 
     async def run_async(
         self,
@@ -124,6 +206,8 @@ class Runner:
         mode: str = "exec",
         top_level_await: bool = True,
         snoop_config: dict = None,
+        monitor_config: dict = None,
+        profile_config: dict = None,
     ):
         """
         Similar to the `run` method, but async.
@@ -132,7 +216,13 @@ class Runner:
         code_obj = self.pre_run(source_code, mode, top_level_await=top_level_await)
         with self._execute_context():
             if code_obj:
-                result = self.execute(code_obj, mode=mode, snoop_config=snoop_config)
+                result = self.execute(
+                    code_obj,
+                    mode=mode,
+                    snoop_config=snoop_config,
+                    monitor_config=monitor_config,
+                    profile_config=profile_config,
+                )
                 while isinstance(result, Awaitable):
                     result = await result
                 return result
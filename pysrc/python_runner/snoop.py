@@ -1,6 +1,8 @@
 import ast
 import inspect
 import os
+import re
+from collections import Counter, deque
 from types import CodeType
 
 import snoop  # type: ignore
@@ -21,13 +23,132 @@ if TYPING:
     from .runner import Runner
 
 
+# Matches snoop's variable and return value lines, with the value in group 2, e.g.
+# "     .......... i = 3" and "     <<< Return value from f: 10":
+VALUE_RE = re.compile(r"^(\s*(?:\.+ .+? = |<<< Return value from .+?: ))(.*)$")
+
+
 class SnoopStream(SysStream):
-    def __init__(self, output_buffer):
+    """
+    Receives snoop's output (one write per traced event) and passes it on to the OutputBuffer,
+    with limits so that tracing a long-running loop doesn't flood the output or use unbounded memory:
+
+    - Lines are truncated to `max_line_length` characters.
+    - Once an event for the same source lines (e.g. the same line of a loop)
+      has been seen `collapse_after` times in a row of repeating events, further such events are replaced by a single
+      "... N similar iterations" line.  The counts start again as soon as an event for new source lines comes along
+      while collapsing, i.e. once the loop has been left, so later events for the same lines (e.g. calling a function
+      again after a loop which called it) are shown again.
+    - Only the first `max_events` events are sent as they happen.
+      After that, only the last `tail_events` are kept in a ring buffer, and sent by `finish`
+      after the rest of the program's output, under a heading which says so.
+
+    `finish` also sends a 'snoop_summary' output part with the counts of events.
+    """
+
+    # Keyword arguments accepted by __init__, which Runner.execute takes out of snoop_config:
+    limit_names = ("max_events", "max_line_length", "collapse_after", "tail_events")
+    # The number of distinct event signatures to remember for collapsing before starting again:
+    max_signatures = 10000
+
+    def __init__(
+        self,
+        output_buffer,
+        max_events: int = 1000,
+        max_line_length: int = 200,
+        collapse_after: int = 10,
+        tail_events: int = 100,
+    ):
         super().__init__("snoop", output_buffer)
+        self.max_events = max_events
+        self.max_line_length = max_line_length
+        self.collapse_after = collapse_after
+        self.tail = deque(maxlen=tail_events)
+        # Counts of events with each signature in the current run of repeating events:
+        self.signature_counts = Counter()
+        # Whether an event has been collapsed in the current run of repeating events:
+        self.collapsing = False
+        # Counts of events with each signature since the last event which wasn't collapsed:
+        self.collapsed = Counter()
+        self.total_events = 0
+        self.collapsed_events = 0
+        self.sent_events = 0
+        self.omitted_events = 0
 
     def flush(self):
         pass  # pragma: no cover
 
+    def truncate(self, line: str) -> str:
+        if len(line) > self.max_line_length:
+            line = line[:self.max_line_length - 3] + "..."
+        return line
+
+    def write(self, s):
+        if not s:
+            return
+        self.total_events += 1
+        lines = [self.truncate(line) for line in s.splitlines()]
+        # Events are similar if they're for the same source lines, regardless of which variables changed:
+        signature = tuple(line for line in lines if not VALUE_RE.match(line))
+        if not signature:
+            signature = tuple(VALUE_RE.sub(r"\1", line) for line in lines)
+        if signature not in self.signature_counts and (
+            self.collapsing or len(self.signature_counts) >= self.max_signatures
+        ):
+            # Something new after a loop was being collapsed, so the loop is over:
+            self.signature_counts.clear()
+            self.collapsing = False
+        self.signature_counts[signature] += 1
+        if self.signature_counts[signature] > self.collapse_after:
+            self.collapsing = True
+            self.collapsed[signature] += 1
+            self.collapsed_events += 1
+            return
+
+        self.write_collapsed()
+        self.send("\n".join(lines) + "\n")
+
+    def write_collapsed(self):
+        if self.collapsed:
+            iterations = max(self.collapsed.values())
+            self.collapsed.clear()
+            self.send(f"     ... {iterations:,} similar iteration{'s' * (iterations != 1)}\n")
+
+    def send(self, text: str):
+        if self.sent_events < self.max_events:
+            self.sent_events += 1
+            self.output_buffer.put(self.type, text)
+        else:
+            self.tail.append(text)
+            self.omitted_events += 1
+
+    def finish(self):
+        """
+        Sends anything still held back, followed by the summary. Called once the traced code has finished.
+        """
+        self.write_collapsed()
+        omitted = self.omitted_events - len(self.tail)
+        if omitted > 0:
+            self.output_buffer.put(self.type, f"     ... {omitted:,} more events omitted ...\n")
+        if self.tail:
+            # These events happened before any output after them, so say where they come from:
+            self.output_buffer.put(
+                self.type,
+                f"     ... the last {len(self.tail):,} traced event{'s' * (len(self.tail) != 1)}, "
+                f"shown at the end of the run:\n",
+            )
+        for text in self.tail:
+            self.output_buffer.put(self.type, text)
+        self.tail.clear()
+        self.output_buffer.put(
+            "snoop_summary",
+            f"Traced {self.total_events:,} events: {self.collapsed_events:,} collapsed as similar iterations, "
+            f"{max(omitted, 0):,} omitted\n",
+            total_events=self.total_events,
+            collapsed_events=self.collapsed_events,
+            omitted_events=max(omitted, 0),
+        )
+
 
 def exec_snoop(runner: 'Runner', code_obj: CodeType, snoop_config: dict):
     class PatchedFrameInfo(snoop.tracer.FrameInfo):  # pragma: no cover (happens inside snoop's trace function)
@@ -57,5 +178,10 @@ def exec_snoop(runner: 'Runner', code_obj: CodeType, snoop_config: dict):
 
     find_code(code_obj)
 
-    with tracer:
-        runner.execute(code_obj)
+    out = snoop_config.get("out")
+    try:
+        with tracer:
+            runner.execute(code_obj)
+    finally:
+        if isinstance(out, SnoopStream):
+            out.finish()
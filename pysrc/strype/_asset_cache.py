@@ -0,0 +1,147 @@
+from strype_bridge import strype_graphics_input_internal as _strype_input_internal
+import collections as _collections
+import os as _os
+import re as _re
+
+# This module is used by strype.graphics and strype.sound, and is not part of the public Strype API.
+#
+# It caches loaded images and sounds, so that loading the same file again (e.g. Actor("cat.png") for every
+# enemy that a game spawns) reuses the image or sound which has already been decoded on the main thread,
+# rather than reading the file, sending it and waiting for the main thread to decode it again.
+# Files are keyed by the path which was actually read plus the file's modification time and size (so a file
+# which has been changed is loaded afresh); URLs and library names are keyed by the URL itself, as are the
+# files in Strype's own assets (e.g. /images), which the main thread fetches by URL without us reading them.
+# Each run has a new web worker, so the cache only lasts for the length of one run.
+#
+# The cached images are shared by everything that loads the same file.  That is safe because a RemoteImage
+# can never be drawn on (load_image copies it into a canvas).  Sounds can be changed, and are played and stopped
+# by buffer, so strype.sound gives each Sound its own copy of the cached sound (which is still much quicker
+# than decoding the file again).
+
+# The maximum total size of the decoded assets which we keep.  When adding an asset takes us over this,
+# the least recently used assets are dropped (and will be loaded afresh if they are loaded again):
+_max_bytes = 64 * 1024 * 1024
+# Maps key to (asset, decoded size in bytes), with the least recently used first:
+_entries = _collections.OrderedDict()
+_total_bytes = 0
+_hits = 0
+_misses = 0
+_evictions = 0
+# Maps absolute path to the URL of the asset at that path (or None if it's not one of Strype's own assets),
+# which can't change during a run:
+_asset_urls = {}
+
+
+def is_url(name):
+    # type: (str) -> bool
+    """
+    Checks whether the given name is a URL or a library name (which the main thread loads itself),
+    rather than the name of a file in our virtual file system.  This is copied from the conditions in
+    loadAndWaitForImage, see there.
+    """
+    return name.startswith("http:") or name.startswith("https:") or name.startswith("data:") or name.startswith(":") or (":" not in name and _re.match(r'^[^./]+\.[^/]+/.+', name) is not None)
+
+
+def load(kind, name, fallback_dir, load_url, load_bytes, size_of):
+    """
+    Gets the given asset from the cache, loading it if it is not there.
+
+    :param kind: The kind of asset (e.g. "image"), so that different kinds of asset with the same name are kept apart.
+    :param name: The file name or URL to load.
+    :param fallback_dir: The directory to look in if the file name is not found in the current directory.
+    :param load_url: The function to load the asset from a URL, which is only called on a miss.
+    :param load_bytes: The function to load the asset from the contents of a file and its MIME type, which is only called on a miss.
+    :param size_of: The function to work out the decoded size in bytes of a loaded asset.
+    :return: The loaded asset.
+    """
+    global _hits, _misses
+    if is_url(name):
+        key = (kind, name)
+        entry = _entries.get(key)
+        if entry is None:
+            asset = load_url(name)
+    else:
+        # We load it from our virtual file system, either the current dir or the fallback dir:
+        path = _os.path.abspath(name if _os.path.isfile(name) else fallback_dir + name)
+        if path not in _asset_urls:
+            _asset_urls[path] = _strype_input_internal.getAssetFileURL(path)
+        url = _asset_urls[path]
+        if url is not None:
+            key = (kind, url)
+            entry = _entries.get(key)
+            if entry is None:
+                asset = load_url(url)
+        else:
+            # If both fail, this will give an informative error (no such file):
+            with open(path, "rb") as f:
+                stat = _os.fstat(f.fileno())
+                key = (kind, path, stat.st_mtime_ns, stat.st_size)
+                entry = _entries.get(key)
+                if entry is None:
+                    import mimetypes
+                    mime_type, _ = mimetypes.guess_type(name)
+                    asset = load_bytes(f.read(), mime_type or "")
+    if entry is not None:
+        _hits += 1
+        _entries.move_to_end(key)
+        return entry[0]
+    _misses += 1
+    _add(key, asset, size_of(asset))
+    return asset
+
+
+def _add(key, asset, size):
+    global _total_bytes
+    _entries[key] = (asset, size)
+    _total_bytes += size
+    # We always keep the newest asset, even if it is bigger than the limit by itself:
+    _evict(1)
+
+
+def _evict(keep):
+    # Drops the least recently used assets until we are within the limit, or only have keep assets left:
+    global _total_bytes, _evictions
+    while _total_bytes > _max_bytes and len(_entries) > keep:
+        _, (_, evicted_size) = _entries.popitem(last=False)
+        _total_bytes -= evicted_size
+        _evictions += 1
+
+
+def set_max_bytes(max_bytes):
+    # type: (int) -> None
+    """
+    Sets the maximum total decoded size of the cached assets, dropping the least recently used ones if needed.
+    """
+    global _max_bytes
+    _max_bytes = max_bytes
+    _evict(0)
+
+
+def clear():
+    # type: () -> None
+    """
+    Empties the cache and resets the statistics.
+    """
+    global _total_bytes, _hits, _misses, _evictions
+    _entries.clear()
+    _total_bytes = 0
+    _hits = 0
+    _misses = 0
+    _evictions = 0
+
+
+def get_stats():
+    # type: () -> dict
+    """
+    Gets statistics about the cache, as a dictionary with the number of "hits" (loads which used the cache),
+    "misses" (loads which had to load the asset), "evictions" (assets dropped to stay under the size limit),
+    the number of "entries" currently cached, their total decoded size in "bytes", and the "max_bytes" limit.
+    """
+    return {
+        "hits": _hits,
+        "misses": _misses,
+        "evictions": _evictions,
+        "entries": len(_entries),
+        "bytes": _total_bytes,
+        "max_bytes": _max_bytes,
+    }
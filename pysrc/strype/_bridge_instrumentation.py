@@ -0,0 +1,220 @@
+import collections as _collections
+import importlib as _importlib
+import sys as _sys
+import time as _time
+
+# This module is an opt-in diagnostic tool, and is not part of the public Strype API.  It is used like this:
+#
+#     import strype._bridge_instrumentation as bi
+#     bi.enable()
+#     ... # the rest of the program
+#
+# While enabled, every call from the strype modules into strype_bridge (i.e. into Javascript) is counted and timed,
+# and classified by which messages it sent to the main thread:
+#   - "sync": it sent at least one synchronous request (and thus had to wait for the main thread)
+#   - "async": it sent only asynchronous requests or sprite updates
+#   - "local": it sent nothing (e.g. collision checks, which are done in the worker)
+# Calls are also grouped into frames, delimited by calls to pace().  The results are available from get_stats(),
+# and are sent as a "bridge_stats" callback event by the Strype runner at the end of the run.
+
+# The places the strype modules keep references to the bridge modules, as (module name, global name):
+_bridge_globals = [
+    ("strype.graphics", "_strype_graphics_internal"),
+    ("strype.graphics", "_strype_input_internal"),
+    ("strype.builtins", "_strype_input_internal"),
+    ("strype.sound", "_strype_sound_internal"),
+    ("strype._asset_cache", "_strype_input_internal"),
+    # Only instrumented if turtle has already been imported, as importing it has side effects:
+    ("turtle.turtle", "defaultrunner"),
+]
+
+# The number of most recent frames to keep the details of:
+_max_recent_frames = 60
+# The number of histogram buckets; bucket i counts calls which took less than 2**i microseconds
+# (and the last bucket counts everything slower):
+_histogram_buckets = 24
+
+_enabled = False
+# Maps (module name, global name) to the original bridge module, while enabled:
+_originals = {}
+_function_stats = {}
+_frames = _collections.deque(maxlen=_max_recent_frames)
+_frame_totals = {}
+_current_frame = {}
+_get_message_counts = None
+
+
+class _FunctionStats:
+    __slots__ = ("calls", "sync", "async_", "local", "total_time", "max_time", "histogram")
+
+    def __init__(self):
+        self.calls = 0
+        self.sync = 0
+        self.async_ = 0
+        self.local = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.histogram = [0] * _histogram_buckets
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "sync": self.sync,
+            "async": self.async_,
+            "local": self.local,
+            "total_time": self.total_time,
+            "mean_time": self.total_time / self.calls if self.calls else 0.0,
+            "max_time": self.max_time,
+            "histogram": {"<" + str(2 ** i) + "us": count for i, count in enumerate(self.histogram) if count},
+        }
+
+
+def _new_frame():
+    return dict(start=_time.perf_counter(), calls=0, sync=0, bridge_time=0.0)
+
+
+def _message_counts():
+    # Returns the (sync, async, sprite update) message counts from the worker, or None if not available:
+    if _get_message_counts is None:
+        return None
+    return tuple(_get_message_counts())
+
+
+def _record(stats, elapsed, before, after):
+    stats.calls += 1
+    stats.total_time += elapsed
+    if elapsed > stats.max_time:
+        stats.max_time = elapsed
+    stats.histogram[min(int(elapsed * 1000000).bit_length(), _histogram_buckets - 1)] += 1
+    _current_frame["calls"] += 1
+    _current_frame["bridge_time"] += elapsed
+    if before is None or after is None:
+        return
+    if after[0] > before[0]:
+        stats.sync += 1
+        _current_frame["sync"] += 1
+    elif after[1] > before[1] or after[2] > before[2]:
+        stats.async_ += 1
+    else:
+        stats.local += 1
+
+
+def _wrap(name, func):
+    stats = _function_stats.get(name)
+    if stats is None:
+        stats = _function_stats[name] = _FunctionStats()
+
+    def instrumented(*args, **kwargs):
+        before = _message_counts()
+        start = _time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            elapsed = _time.perf_counter() - start
+            _record(stats, elapsed, before, _message_counts())
+    return instrumented
+
+
+class _InstrumentedBridge:
+    # Stands in for one of the strype_bridge modules, returning instrumented versions of its functions.
+    def __init__(self, name, bridge):
+        self._name = name
+        self._bridge = bridge
+
+    def __getattr__(self, item):
+        value = getattr(self._bridge, item)
+        if callable(value):
+            value = _wrap(self._name + "." + item, value)
+        # Store it so that __getattr__ is not called again for this item:
+        self.__dict__[item] = value
+        return value
+
+
+def _on_pace(actions_per_second):
+    # Called by pace() in strype.graphics, to finish the current frame and start a new one:
+    global _current_frame
+    frame = _current_frame
+    frame["duration"] = _time.perf_counter() - frame.pop("start")
+    frame["budget"] = 1 / actions_per_second if actions_per_second > 0 else 0.0
+    _frames.append(frame)
+    totals = _frame_totals
+    totals["count"] += 1
+    totals["total_bridge_time"] += frame["bridge_time"]
+    if frame["bridge_time"] > frame["budget"]:
+        totals["over_budget"] += 1
+    for key in ("calls", "sync", "bridge_time"):
+        totals["max_" + key] = max(totals["max_" + key], frame[key])
+    _current_frame = _new_frame()
+
+
+def is_enabled():
+    """
+    Returns whether bridge call instrumentation is currently enabled.
+    """
+    return _enabled
+
+
+def reset():
+    """
+    Clears all statistics recorded so far.
+    """
+    global _current_frame
+    _function_stats.clear()
+    _frames.clear()
+    _frame_totals.update(count=0, over_budget=0, total_bridge_time=0.0, max_calls=0, max_sync=0, max_bridge_time=0.0)
+    _current_frame = _new_frame()
+
+
+def enable():
+    """
+    Starts instrumenting calls from the strype modules into strype_bridge.  Statistics are reset.
+    """
+    global _enabled, _get_message_counts
+    if _enabled:
+        return
+    reset()
+    for module_name, global_name in _bridge_globals:
+        if module_name.startswith("strype."):
+            module = _importlib.import_module(module_name)
+        else:
+            module = _sys.modules.get(module_name)
+        if module is None or not hasattr(module, global_name):
+            continue
+        bridge = getattr(module, global_name)
+        _originals[(module_name, global_name)] = bridge
+        setattr(module, global_name, _InstrumentedBridge(global_name.lstrip("_"), bridge))
+    # The counts are fetched directly, so that fetching them is not itself recorded:
+    _get_message_counts = getattr(_originals.get(("strype.graphics", "_strype_input_internal")), "getBridgeMessageCounts", None)
+    _sys.modules["strype.graphics"]._pace_hook = _on_pace
+    _enabled = True
+
+
+def disable():
+    """
+    Stops instrumenting bridge calls, restoring the original bridge modules.  Statistics are kept until reset() or enable().
+    """
+    global _enabled, _get_message_counts
+    if not _enabled:
+        return
+    for (module_name, global_name), bridge in _originals.items():
+        setattr(_sys.modules[module_name], global_name, bridge)
+    _originals.clear()
+    _sys.modules["strype.graphics"]._pace_hook = None
+    _get_message_counts = None
+    _enabled = False
+
+
+def get_stats():
+    """
+    Returns the statistics recorded so far, as a dict with keys:
+      - "functions": a dict from bridge function name (e.g. "strype_graphics_internal.getImageSize") to a dict with
+        its number of calls, how many of those were sync/async/local, the total, mean and max time in seconds,
+        and a histogram of call times.
+      - "frames": a dict with the number of frames (calls to pace()), how many went over their budget
+        (i.e. spent longer in bridge calls than the time per frame requested from pace()), the maximum
+        calls, sync calls and bridge time in any frame, and the details of the most recent frames.
+    """
+    return dict(
+        functions={name: stats.to_dict() for name, stats in sorted(_function_stats.items(), key=lambda kv: -kv[1].total_time)},
+        frames=dict(_frame_totals, recent=list(_frames)),
+    )
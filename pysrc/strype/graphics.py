@@ -1,7 +1,13 @@
 from strype_bridge import strype_graphics_internal as _strype_graphics_internal, strype_graphics_input_internal as _strype_input_internal
+import strype._asset_cache as _asset_cache
 import math as _math
+import numbers as _numbers
+import array as _array
 import collections as _collections
+import functools as _functools
+import itertools as _itertools
 import re as _re
+import sys as _sys
 import time as _time
 
 # This file is automatically processed to extract types for TigerPython, using the "# type" annotations
@@ -50,8 +56,15 @@ def color_from_string(html_string):
     :raises ValueError: If the string is not recognised as a color name or valid 6 or 8 digit hex string.
     :return: A :class:`Color` object.
     """
-    if html_string.lower() in _color_map:
-        html_string = _color_map[html_string.lower()]
+    # Color objects can be modified, so we must make a new one each time, but the parsing is cached:
+    return Color(*_rgba_from_string(html_string))
+
+# Programs tend to use the same few colors over and over (often in a loop, e.g. set_pixel(x, y, "red")),
+# so we cache the parsing.  Internal code which only needs the values uses this directly, to avoid making a Color:
+@_functools.lru_cache(maxsize=256)
+def _rgba_from_string(html_string):
+    # type: (str) -> tuple[int, int, int, int]
+    html_string = _color_map.get(html_string.lower(), html_string)
     # Now it's hex or unrecognised:
     if not html_string.startswith("#"):
         raise ValueError(f"Color \"{html_string} is not a known color name and does not start with a \"#\"")
@@ -65,12 +78,18 @@ def color_from_string(html_string):
     else:
         raise ValueError("Hex string should have either 6 or 8 digits")
 
-    return Color(r, g, b, a)
+    return r, g, b, a
 
 class Color:
     """
     A Color class with red, green, blue components, and an optional alpha value. 
     """
+    
+    # Programs can make a Color for every pixel they look at, so we use slots to make them smaller and quicker to create.
+    # _html is the result of _to_html(), cached, and _html_for is the (red, green, blue, alpha) it was made from,
+    # as the user may have changed them since.
+    __slots__ = ("red", "green", "blue", "alpha", "_html", "_html_for")
+    
     def __init__(self, red, green, blue, alpha = 255):
         # type: (int, int, int, int) -> None
         """
@@ -86,6 +105,7 @@ class Color:
         self.green = _round_and_clamp_0_255(green)
         self.blue = _round_and_clamp_0_255(blue)
         self.alpha = _round_and_clamp_0_255(alpha)
+        self._html_for = None
 
     def _to_html(self):
         # type: () -> str
@@ -94,11 +114,11 @@ class Color:
         
         :return: The HTML version of this Color as string.
         """
-        r = _round_and_clamp_0_255(self.red)
-        g = _round_and_clamp_0_255(self.green)
-        b = _round_and_clamp_0_255(self.blue)
-        a = _round_and_clamp_0_255(self.alpha)
-        return "#{:02x}{:02x}{:02x}{:02x}".format(r, g, b, a)
+        rgba = (self.red, self.green, self.blue, self.alpha)
+        if rgba != self._html_for:
+            self._html = "#{:02x}{:02x}{:02x}{:02x}".format(*(_round_and_clamp_0_255(v) for v in rgba))
+            self._html_for = rgba
+        return self._html
 
 _Dimension = _collections.namedtuple("Dimension", ["width", "height"])
 
@@ -201,9 +221,9 @@ class Image:
         :param color: The color to use.  The color can be either an HTML color name (e.g. "magenta"), an HTML hex string (e.g. "#ff00c0"), or a :class:`Color` object.
         """
         if isinstance(color, str):
-            color = color_from_string(color)
-        
-        _strype_graphics_internal.canvas_setPixel(self.__image, x, y, color.red, color.green, color.blue, color.alpha)
+            _strype_graphics_internal.canvas_setPixel(self.__image, x, y, *_rgba_from_string(color))
+        else:
+            _strype_graphics_internal.canvas_setPixel(self.__image, x, y, color.red, color.green, color.blue, color.alpha)
 
     def _bulk_get_pixels(self):
         # type: () -> list[int]
@@ -227,6 +247,102 @@ class Image:
         """
         _strype_graphics_internal.canvas_setAllPixelsRGBA(self.__image, rgba_array)
 
+    def pixels(self):
+        # type: () -> PixelBuffer
+        """
+        Get all the pixels of the image at once, as a :class:`PixelBuffer`.  This is much faster than calling
+        `get_pixel()` and `set_pixel()` for every pixel.  It is best used in a `with` block, which puts your
+        changes back into the image at the end of the block::
+        
+            with image.pixels() as pixels:
+                for i in range(0, len(pixels), 4):
+                    # Swap red and blue:
+                    pixels[i], pixels[i + 2] = pixels[i + 2], pixels[i]
+        
+        :return: A :class:`PixelBuffer` with a copy of the current pixels of the image.
+        """
+        return PixelBuffer(self)
+
+    def grayscale(self):
+        # type: () -> None
+        """
+        Turn the image into shades of gray, based on how bright each pixel is.
+        """
+        _strype_graphics_internal.canvas_applyFilter(self.__image, "grayscale", [])
+
+    def invert(self):
+        # type: () -> None
+        """
+        Invert the colors of the image, like a photo negative.  For example, black becomes white, and red becomes cyan.
+        """
+        _strype_graphics_internal.canvas_applyFilter(self.__image, "invert", [])
+
+    def adjust(self, brightness = 1.0, contrast = 1.0):
+        # type: (float, float) -> None
+        """
+        Adjust the brightness and contrast of the image.
+        
+        :param brightness: How much to multiply the brightness by.  1 leaves it unchanged, 0.5 makes the image half as bright, 2 makes it twice as bright.
+        :param contrast: How much to multiply the contrast by.  1 leaves it unchanged, less than 1 makes the colors closer to gray, more than 1 makes them further apart.
+        """
+        _strype_graphics_internal.canvas_applyFilter(self.__image, "adjust", [brightness, contrast])
+
+    def box_blur(self, radius = 1):
+        # type: (int) -> None
+        """
+        Blur the image, by setting each pixel to the average of the pixels around it.
+        
+        :param radius: How many pixels either side of each pixel to average.  Larger values blur more.
+        """
+        _strype_graphics_internal.canvas_applyFilter(self.__image, "boxBlur", [radius])
+
+    def gaussian_blur(self, radius = 2):
+        # type: (int) -> None
+        """
+        Blur the image smoothly, using a Gaussian blur.  This looks more natural than `box_blur()`.
+        
+        :param radius: How many pixels either side of each pixel are used.  Larger values blur more.
+        """
+        _strype_graphics_internal.canvas_applyFilter(self.__image, "gaussianBlur", [radius])
+
+    def convolve(self, kernel):
+        # type: (list[list[float]]) -> None
+        """
+        Apply a convolution kernel to the image.  Each pixel's red, green and blue become the sum of
+        the values of the pixels around it, multiplied by the corresponding weights in the kernel.  For example, this
+        kernel sharpens the image::
+        
+            image.convolve([[0, -1, 0], [-1, 5, -1], [0, -1, 0]])
+        
+        :param kernel: A square list of lists of weights, usually 3x3 or 5x5 (the size must be odd, so that there is a middle).
+        """
+        size = len(kernel)
+        if size % 2 == 0 or any(len(row) != size for row in kernel):
+            raise ValueError("Kernel must be a square list of lists, with an odd size (e.g. 3x3 or 5x5)")
+        _strype_graphics_internal.canvas_applyFilter(self.__image, "convolve", [size] + [float(w) for row in kernel for w in row])
+
+    def threshold(self, level = 128):
+        # type: (int) -> None
+        """
+        Turn every pixel black or white, depending on whether its brightness is below the given level or not.
+        
+        :param level: The brightness (0-255) at or above which pixels become white.
+        """
+        _strype_graphics_internal.canvas_applyFilter(self.__image, "threshold", [level])
+
+    def replace_color(self, old_color, new_color, tolerance = 0):
+        # type: (Color | str, Color | str, int) -> None
+        """
+        Replace every pixel of one color with another color.
+        
+        :param old_color: The color to replace.  It can be either an HTML color name (e.g. "magenta"), an HTML hex string (e.g. "#ff00c0"), or a :class:`Color` object.
+        :param new_color: The color to replace it with, in any of the same forms as old_color.
+        :param tolerance: How far (0-255) each of the red, green, blue and alpha values can be from those of old_color and still be replaced.
+        """
+        old_rgba = _rgba_from_string(old_color) if isinstance(old_color, str) else (old_color.red, old_color.green, old_color.blue, old_color.alpha)
+        new_rgba = _rgba_from_string(new_color) if isinstance(new_color, str) else (new_color.red, new_color.green, new_color.blue, new_color.alpha)
+        _strype_graphics_internal.canvas_applyFilter(self.__image, "replaceColor", [*old_rgba, *new_rgba, tolerance])
+
     def clear(self):
         # type: () -> None
         """
@@ -246,6 +362,18 @@ class Image:
         dim = _strype_graphics_internal.getCanvasDimensions(image._Image__image)
         _strype_graphics_internal.canvas_drawImagePart(self.__image, image._Image__image, x, y, 0, 0, dim[0], dim[1], 1.0)
 
+    def fill_pattern(self, image, offset_x = 0, offset_y = 0):
+        # type: (Image, float, float) -> None
+        """
+        Fill the whole of this image with copies of another image, tiled next to each other like wallpaper.
+        This is much faster than drawing each copy yourself with `draw_image`.
+        
+        :param image: The image to tile.  This must be of type :class:`Image`.
+        :param offset_x: The x coordinate for the top left corner of one of the copies (the rest are placed around it).
+        :param offset_y: The y coordinate for the top left corner of one of the copies (the rest are placed around it).
+        """
+        _strype_graphics_internal.canvas_fillPattern(self.__image, image._Image__image, offset_x, offset_y)
+
     def _draw_part_of_image(self, image, x, y, sx, sy, width, height, scale = 1.0):
         # type: (Image, float, float, float, float, float, float, float) -> None
         """
@@ -299,12 +427,10 @@ class Image:
         :param max_height: The maximum height of the text (or 0 for no maximum).
         :return: A named tuple width width and height of the actually drawn area.
         """
-        if font_family is not None:
-            loaded = _strype_graphics_internal.canvas_loadFont("google", font_family)
-            if not loaded:
-                raise Exception("Could not load font " + font_family)
-        dim = _strype_graphics_internal.canvas_drawText(self.__image, text, x, y, font_size, max_width, max_height, font_family)
-        return _Dimension(dim[0], dim[1])
+        # Measuring is cached, so once we know the size we don't need to wait for the text to be drawn:
+        size = _measure_text(text, font_size, max_width, max_height, font_family)
+        _strype_graphics_internal.canvas_drawMeasuredText(self.__image, text, x, y, font_size, max_width, max_height, font_family)
+        return size
         
     def draw_rounded_rect(self, x, y, width, height, corner_size = 10):
         # type: (float, float, float, float, float) -> None
@@ -453,8 +579,404 @@ class Image:
         _strype_graphics_internal.canvas_downloadPNG(self.__image, filename)
         Image.__last_download = _time.time()
 
+class PixelBuffer(bytearray):
+    """
+    The pixels of an :class:`Image`, as a bytearray of 0-255 values (see `Image.pixels()`).  There are four values
+    for each pixel: red, green, blue and alpha, in that order.  The first four values are the pixel at the top-left (0, 0)
+    of the image, the next four are the pixel at (1, 0), and so on.  At the end of each row it continues at the left of
+    the next row.  So the red value of the pixel at (x, y) is at index `(y * width + x) * 4`.
+    
+    Changes are not seen in the image until `write_back()` is called, which happens automatically at the end of a `with` block.
+    
+    Like any bytearray, the buffer is flat: `numpy.asarray(pixels)` gives a one-dimensional array of
+    `width * height * 4` values.  Use `as_array()` for an array of shape (height, width, 4).
+    """
+    
+    # Attributes:
+    # __image: the Image which the pixels came from
+    
+    def __init__(self, image):
+        # type: (Image) -> None
+        self.width, self.height = image.get_width(), image.get_height()
+        super().__init__(self.width * self.height * 4)
+        self.__image = image
+        # Copies the whole Javascript array into our buffer in one go:
+        _strype_graphics_internal.canvas_getAllPixels(image._Image__image).assign_to(self)
+    
+    def write_back(self):
+        # type: () -> None
+        """
+        Put the pixels back into the image, so that changes become visible.
+        """
+        if len(self) != self.width * self.height * 4:
+            raise ValueError("PixelBuffer must stay the same length (" + str(self.width * self.height * 4) + ") but is now " + str(len(self)))
+        _strype_graphics_internal.canvas_setAllPixelsFromBuffer(self.__image._Image__image, self)
+    
+    def __enter__(self):
+        # type: () -> PixelBuffer
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        # type: (Any, Any, Any) -> None
+        # If there was an error, we leave the image as it was:
+        if exc_type is None:
+            self.write_back()
+    
+    def as_array(self):
+        # type: () -> Any
+        """
+        Get the pixels as a NumPy array of shape (height, width, 4), so that the red value of the pixel at (x, y)
+        is `array[y, x, 0]`.  The array shares its values with this buffer (nothing is copied), so changes to the
+        array are written back to the image along with the buffer.  This needs NumPy to be installed.
+        
+        :return: A NumPy array of 0-255 values, of shape (height, width, 4).
+        """
+        # We import NumPy here as it is slow to load and often not used:
+        import numpy
+        return numpy.frombuffer(self, dtype=numpy.uint8).reshape(self.height, self.width, 4)
+
+class SpriteSheet:
+    """
+    A sprite sheet (sometimes called a texture atlas) is a single image which holds many frames of the same size,
+    laid out in a grid.  The frames are numbered from 0, going left to right along the top row, then along the next row, and so on.
+    
+    An Actor can be given a sprite sheet instead of an image, and will show one frame of it at a time (see `Actor.set_frame`
+    and `Actor.animate`).  Changing frame does not load or send any images, so it is much faster than calling
+    `Actor.set_image` with a different image for each frame, and all the actors using the same sprite sheet share one copy of it.
+    """
+    
+    # Attributes:
+    # __image: the RemoteImage or RemoteCanvas of the whole sheet, which is shared by all the actors showing it.
+    # __columns: the number of frames in each row of the sheet
+    # __frame_count: the total number of frames in the sheet
+    
+    def __init__(self, image, frame_width, frame_height):
+        # type: (Image | str, int, int) -> None
+        """
+        Create a sprite sheet from an image.  If the size of the image is not a multiple of the frame size,
+        the leftover part at the right or bottom is not used.
+        
+        :param image: An :class:`Image` object, or the name of an image to load (see `load_image`).  If you pass an Image, later
+                      drawing on it will change the frames too.
+        :param frame_width: The width of each frame, in pixels.
+        :param frame_height: The height of each frame, in pixels.
+        """
+        if isinstance(image, Image):
+            self.__image = image._Image__image
+            width, height = image.get_width(), image.get_height()
+        elif isinstance(image, str):
+            # Unlike load_image, we don't need an editable copy, so we can use the (cached) loaded image itself:
+            self.__image = _load_image_bitmap(image)
+            width, height = self.__image.width, self.__image.height
+        else:
+            raise TypeError("SpriteSheet image parameter must be Image")
+        if frame_width < 1 or frame_height < 1 or frame_width > width or frame_height > height:
+            raise ValueError("Invalid frame size " + str(frame_width) + " * " + str(frame_height) + " for an image of size " + str(width) + " * " + str(height))
+        self.__frame_width = int(frame_width)
+        self.__frame_height = int(frame_height)
+        self.__columns = width // self.__frame_width
+        self.__frame_count = self.__columns * (height // self.__frame_height)
+    
+    def get_frame_count(self):
+        # type: () -> int
+        """
+        Return the number of frames in this sprite sheet.
+        
+        :return: The number of frames.
+        """
+        return self.__frame_count
+    
+    def get_frame_width(self):
+        # type: () -> int
+        """
+        Return the width of each frame of this sprite sheet.
+        
+        :return: The width of each frame, in pixels.
+        """
+        return self.__frame_width
+    
+    def get_frame_height(self):
+        # type: () -> int
+        """
+        Return the height of each frame of this sprite sheet.
+        
+        :return: The height of each frame, in pixels.
+        """
+        return self.__frame_height
+    
+    def get_frame(self, index):
+        # type: (int) -> Image
+        """
+        Return a copy of one frame of this sprite sheet, as a new :class:`Image`.
+        
+        :param index: The number of the frame, from 0 up to one less than `get_frame_count()`.
+        :return: A new :class:`Image` with the contents of the frame.
+        """
+        self._check_frame(index)
+        img = Image(self.__frame_width, self.__frame_height)
+        _strype_graphics_internal.canvas_drawImagePart(img._Image__image, self.__image, 0, 0, (index % self.__columns) * self.__frame_width, (index // self.__columns) * self.__frame_height, self.__frame_width, self.__frame_height, 1.0)
+        return img
+    
+    def _check_frame(self, index):
+        # type: (int) -> None
+        if not 0 <= index < self.__frame_count:
+            raise IndexError("Frame " + str(index) + " is out of range; the sprite sheet has " + str(self.__frame_count) + " frames")
+    
+    def _show_on(self, sprite_id, frames, fps, start_time):
+        # type: (int, list[int], float, float) -> None
+        # Makes the given sprite show the given frames of this sheet in turn (see SpriteFrames in worker_bridge_type.ts):
+        _flush_if_pending(sprite_id)
+        _strype_graphics_internal.setSpriteFrames(sprite_id, self.__frame_width, self.__frame_height, self.__columns, frames, fps, start_time)
+
+def load_sprite_sheet(name, frame_width, frame_height):
+    # type: (str, int, int) -> SpriteSheet
+    """
+    Load the given image as a :class:`SpriteSheet`, which is split into frames of the given size.
+    
+    :param name: The name of the image to load, as for `load_image`.
+    :param frame_width: The width of each frame, in pixels.
+    :param frame_height: The height of each frame, in pixels.
+    :return: A :class:`SpriteSheet` of the image.
+    """
+    return SpriteSheet(name, frame_width, frame_height)
+
 _actorsInWorld = dict()
 # type: dict[int, Actor]
+# Counts the changes made to single actors (rather than through an ActorGroup), such as set_location or remove,
+# so that groups can tell when they need to read their actors again (see ActorGroup.__refresh):
+_actor_changes = 0
+# type: int
+# Maps each tag to the actors in the world with that tag, keyed by id, so in the order they were added (like _actorsInWorld).
+# Unhashable tags can't be in here, so actors with those are only found by looking through _actorsInWorld:
+_actorsByTag = dict()
+# type: dict[Any, dict[int, Actor]]
+# Maps each (hashable) tag to the number that stands for it on the Javascript side, so that queries there can filter by tag:
+_tagIds = dict()
+# type: dict[Any, int]
+
+def _tag_id(tag):
+    # type: (Any) -> int | None
+    # Gives None (which Javascript takes to mean don't filter) for None and for unhashable tags:
+    if tag is None:
+        return None
+    try:
+        return _tagIds.setdefault(tag, len(_tagIds) + 1)
+    except TypeError:
+        return None
+
+def _actors_with_tag(tag):
+    # type: (Any) -> list[Actor]
+    if tag is None:
+        return list(_actorsInWorld.values())
+    try:
+        return list(_actorsByTag.get(tag, {}).values())
+    except TypeError:
+        return [a for a in _actorsInWorld.values() if a.get_tag() == tag]
+
+def _has_actors_with_tag(tag):
+    # type: (Any) -> bool
+    # Lets tag-filtered queries skip asking Javascript when no actor could match.  Only gives False when it's certain:
+    try:
+        return tag is None or bool(_actorsByTag.get(tag))
+    except TypeError:
+        return True
+
+def _filter_by_tag(ids, tag):
+    # type: (list[int], Any) -> list[Actor]
+    # Turns sprite ids from Javascript into actors, dropping those which aren't actors (e.g. speech bubbles).
+    # When the tag has an id, Javascript has already filtered by it, so we only need to check unhashable tags here:
+    actors = [a for a in map(_actorsInWorld.get, ids) if a is not None]
+    if tag is not None and _tag_id(tag) is None:
+        actors = [a for a in actors if a.get_tag() == tag]
+    return actors
+
+def _js_number(number):
+    # type: (float) -> float
+    # Pyodide gives us Javascript numbers as an int if they are whole, otherwise a float.  Values we keep on
+    # the Python side go through this so that they look the same as if they had come back from Javascript:
+    if isinstance(number, float) and number.is_integer() and abs(number) <= 9007199254740991:
+        return int(number)
+    return number
+
+def _actor_changed():
+    # type: () -> None
+    global _actor_changes
+    _actor_changes += 1
+
+def _numpy_for(values):
+    # type: (Any) -> Any
+    # Gives the numpy module if values is a NumPy array, otherwise None.  We never import NumPy ourselves (it is
+    # big, and most programs don't use it), so if values is an array then the program has already imported it:
+    numpy = _sys.modules.get("numpy")
+    return numpy if numpy is not None and isinstance(values, numpy.ndarray) else None
+
+def _clamp_to_world(x, y):
+    # type: (float, float) -> tuple[float, float]
+    # The same clamping as the Javascript side does to the location of a sprite:
+    return _js_number(max(-399, min(x, 400))), _js_number(max(-299, min(y, 300)))
+
+# The ways that an actor moving by itself can behave at the edge of the world (see Actor.set_edge_mode):
+_EDGE_MODES = ("stop", "wrap", "bounce")
+# type: tuple[str, ...]
+
+def _position_along(start, velocity, seconds, low, high, edge):
+    # type: (float, float, float, float, float, str) -> tuple[float, float]
+    # Where something moving along one axis is after the given number of seconds, kept between low and high as the
+    # edge mode says, and its velocity then.  The same sums as positionAlong in image_and_collisions.ts:
+    position = start + velocity * seconds
+    span = high - low
+    if edge == "wrap":
+        return low + (position - low) % span, velocity
+    elif edge == "bounce":
+        # Bouncing back and forth repeats every 2 * span, and is going backwards in the second half:
+        offset = (position - low) % (2 * span)
+        return (low + offset, velocity) if offset <= span else (low + 2 * span - offset, -velocity)
+    else:
+        return max(low, min(position, high)), velocity
+
+# Whether sprite changes are batched up (see set_batching):
+_batching = False
+# type: bool
+# While batching, maps sprite id to a [x, y, rotation, image] list of its pending changes (None for unchanged):
+_pending_transforms = {}
+# type: dict[int, list[Any]]
+# While batching, maps the id of each sprite which has been made but not yet sent to its [id, image, collidable,
+# x, y, tag] (see _add_sprite).  These are sent before _pending_transforms, which may include changes to them:
+_pending_adds = {}
+# type: dict[int, list[Any]]
+# The ids kept back for sprites made while batching (see reserveSpriteIds): the next one to use, and the end of the block:
+_next_sprite_id = 0
+# type: int
+_end_sprite_id = 0
+# type: int
+_SPRITE_ID_BLOCK = 64
+_last_transforms_flush = _time.time()
+# type: float
+# Even if the program never calls pace(), we send pending changes this often, so the world doesn't appear frozen:
+_max_batch_seconds = 1 / 30
+# type: float
+
+def _add_sprite(image, collidable, x = 0, y = 0, tag = None):
+    # type: (Any, bool, float, float, int | None) -> int
+    # Makes a new sprite and returns its id.  While batching, the id is one we have kept back, so that the sprite
+    # itself can be sent later along with the other pending changes:
+    global _next_sprite_id, _end_sprite_id
+    if not _batching:
+        return _strype_graphics_internal.addSprite(image, collidable, x, y, tag)
+    if _next_sprite_id == _end_sprite_id:
+        _next_sprite_id = _strype_graphics_internal.reserveSpriteIds(_SPRITE_ID_BLOCK)
+        _end_sprite_id = _next_sprite_id + _SPRITE_ID_BLOCK
+    sprite_id = _next_sprite_id
+    _next_sprite_id += 1
+    _pending_adds[sprite_id] = [sprite_id, image, collidable, x, y, tag]
+    _flush_if_batch_is_old()
+    return sprite_id
+
+def _remove_sprite(sprite_id):
+    # type: (int) -> None
+    # A sprite which hasn't been sent yet is just forgotten:
+    _pending_transforms.pop(sprite_id, None)
+    if _pending_adds.pop(sprite_id, None) is None:
+        _strype_graphics_internal.removeImage(sprite_id)
+
+def _sprite_exists(sprite_id):
+    # type: (int) -> bool
+    return sprite_id in _pending_adds or _strype_graphics_internal.imageExists(sprite_id)
+
+def _flush_if_pending(sprite_id):
+    # type: (int) -> None
+    # Must be called before a bridge call which needs the sprite to exist with its latest image (as the
+    # collision queries need everything to be sent; see _flush_sprite_updates):
+    if sprite_id in _pending_adds:
+        _flush_sprite_updates()
+    else:
+        pending = _pending_transforms.get(sprite_id)
+        if pending is not None and pending[3] is not None:
+            _flush_sprite_updates()
+
+def _sprite_image_size(sprite_id):
+    # type: (int) -> tuple[float, float]
+    # The width and height of the sprite's image (or of its frame, for a sprite sheet).  An image which hasn't been
+    # sent yet is the whole image (as setting frames flushes first), so we needn't flush to find its size:
+    pending = _pending_transforms.get(sprite_id)
+    image = pending[3] if pending is not None else None
+    if image is None and sprite_id in _pending_adds:
+        image = _pending_adds[sprite_id][1]
+    if image is not None:
+        return image.width, image.height
+    size = _strype_graphics_internal.getImageSize(sprite_id).to_py()
+    return size['width'], size['height']
+
+def _set_sprite_location(sprite_id, x, y):
+    # type: (int, float, float) -> None
+    if _batching:
+        _pending_transforms.setdefault(sprite_id, [None, None, None, None])[0:2] = (x, y)
+        _flush_if_batch_is_old()
+    else:
+        _strype_graphics_internal.setImageLocation(sprite_id, x, y)
+
+def _set_sprite_rotation(sprite_id, rotation):
+    # type: (int, float) -> None
+    if _batching:
+        _pending_transforms.setdefault(sprite_id, [None, None, None, None])[2] = rotation
+        _flush_if_batch_is_old()
+    else:
+        _strype_graphics_internal.setImageRotation(sprite_id, rotation)
+
+def _set_sprite_image(sprite_id, image):
+    # type: (int, Any) -> None
+    if _batching:
+        _pending_transforms.setdefault(sprite_id, [None, None, None, None])[3] = image
+        _flush_if_batch_is_old()
+    else:
+        _strype_graphics_internal.updateImage(sprite_id, image)
+
+def _flush_if_batch_is_old():
+    # type: () -> None
+    if _time.time() - _last_transforms_flush >= _max_batch_seconds:
+        _flush_sprite_updates()
+
+def _flush_sprite_updates():
+    # type: () -> None
+    # Sends all pending sprite changes in one bridge call (and one message to the main thread).  This must be
+    # called before anything which depends on where the sprites are, such as collision checks:
+    global _last_transforms_flush
+    _last_transforms_flush = _time.time()
+    _flush_output_if_due()
+    if _pending_adds:
+        adds = list(_pending_adds.values())
+        transforms = [[sprite_id] + changes for sprite_id, changes in _pending_transforms.items()]
+        _pending_adds.clear()
+        _pending_transforms.clear()
+        _strype_graphics_internal.applySpriteUpdates(adds, transforms)
+    elif _pending_transforms:
+        transforms = [[sprite_id] + changes for sprite_id, changes in _pending_transforms.items()]
+        _pending_transforms.clear()
+        _strype_graphics_internal.setSpriteTransforms(transforms)
+
+def _flush_output_if_due():
+    # type: () -> None
+    # Printed output is batched by the runner and normally only sent when more output arrives, so a program which
+    # prints and then just moves actors around could hold back its last output.  We check for overdue output at
+    # the points where sprite changes are sent (sys.stdout may be a plain stream without flush_if_due):
+    flush_if_due = getattr(_sys.stdout, "flush_if_due", None)
+    if flush_if_due is not None:
+        flush_if_due()
+
+def _send_sprite_transforms(transforms):
+    # type: (list[list[float | None]]) -> None
+    # Sends the [sprite_id, x, y, rotation] changes (None for unchanged) of many sprites in one bridge call,
+    # or adds them to the pending changes if we are batching:
+    if _batching:
+        for sprite_id, x, y, rotation in transforms:
+            pending = _pending_transforms.setdefault(sprite_id, [None, None, None, None])
+            if x is not None:
+                pending[0:2] = (x, y)
+            if rotation is not None:
+                pending[2] = rotation
+        _flush_if_batch_is_old()
+    elif transforms:
+        _strype_graphics_internal.setSpriteTransforms(transforms)
 
 class Actor:
     """
@@ -466,18 +988,33 @@ class Actor:
     # __id: the identifier of the Sprite that represents this actor on screen.  Should never be None
     #       Note: this can change during an Actor's lifetime, if you call re_add
     # __editable_image: the editable image of this actor, if the user has ever called get_image() on us.
+    # __shared_image: whether __editable_image is shared with other actors (e.g. a cached show_text image),
+    #       so must be copied before we hand it out from get_image().
+    # __sheet: the SpriteSheet which this actor shows frames of, or None if it shows a whole image.
+    # __frames: if __sheet is not None, the (frames, fps, start time in milliseconds) of the frames being shown.
     # __tag: the user-supplied tag of the actor.  Useful to leave the type flexible, we just pass it in and out.
     # __say: the identifier of the Sprite with the current speech bubble for this actor.  Is None when there is no current speech.
     # Note that __say can be removed on the Javascript side without our code executing, due to a timeout.  So
     # whenever we use it, we should check it's still actually present.
+    # __say_size: the (width, height) of the current speech bubble's image, if there is one.
+    # __precise: whether precise collisions are turned on (see set_precise_collisions)
+    # __x, __y, __rotation, __scale: the position (clamped to the world, as the sprite's is), rotation and scale of
+    #       the Sprite.  Python is the only thing which changes these, so we keep them here to save asking Javascript,
+    #       and only send changes across.  They are only valid while the actor is in the world (see __in_world).
+    #       If the actor is moving by itself, they are where it was when _catch_up was last called.
+    # __motion: None, or if the actor is moving by itself (see set_velocity), the (start_x, start_y, start_rotation,
+    #       vx, vy, angular_velocity, edge, start_time) which the sprite also has (see SpriteMotion in worker_bridge_type.ts).
+    #       start_time is in milliseconds, like Javascript's Date.now().
+    # __edge_mode: what happens at the edge of the world when moving by ourselves (see set_edge_mode).
     
     def __init__(self, image, x = 0, y = 0, tag = None):
-        # type: (Image | str, float, float, Any | None) -> None
+        # type: (Image | SpriteSheet | str, float, float, Any | None) -> None
         """
         Create a new Actor.  An actor has an image and a location.  It can optionally have a tag.  A tag (usually a string) 
         can be used to group actors and identify them later for collision detection.
         
-        The image parameter must be an :class:`Image` object.
+        The image parameter must be an :class:`Image` object.  It can also be a :class:`SpriteSheet`, in which case the
+        actor shows the first frame of it (see `set_frame` and `animate` to change the frame).
 
         The (x, y) coordinate determines the location of the actor.  The graphics world coordinate system has x coordinates from -399 to 400, 
         and y coordinates from -299 to 300.  The origin (0, 0) point is in the center; (-399, -299) is the bottom left.
@@ -489,17 +1026,41 @@ class Actor:
         """
         # Beware: this is also called during re_add, after construction
         if isinstance(image, Image):
-            self.__id = _strype_graphics_internal.addSprite(image._Image__image, True, x, y)
+            self.__id = _add_sprite(image._Image__image, True, x, y, _tag_id(tag))
             self.__editable_image = image
         elif isinstance(image, str):
-            self.__id = _strype_graphics_internal.addSprite(_load_image_bitmap(image), True, x, y)
+            self.__id = _add_sprite(_load_image_bitmap(image), True, x, y, _tag_id(tag))
+            self.__editable_image = None
+        elif isinstance(image, SpriteSheet):
+            self.__id = _add_sprite(image._SpriteSheet__image, True, x, y, _tag_id(tag))
             self.__editable_image = None
         else:
             raise TypeError("Actor constructor parameter must be Image")
         _actorsInWorld[self.__id] = self
+        _actor_changed()
+        try:
+            _actorsByTag.setdefault(tag, {})[self.__id] = self
+        except TypeError:
+            pass
         self.__say = None
+        self.__say_size = None
+        self.__precise = False
         self.__tag = tag
-        _strype_graphics_internal.setImageRotation(self.__id, 0)
+        # New sprites have rotation 0 and scale 1, and addSprite clamps the location like set_location does:
+        self.__x, self.__y = _clamp_to_world(x, y)
+        self.__rotation = 0
+        self.__scale = 1
+        self.__motion = None
+        self.__edge_mode = "stop"
+        self.__sheet = None
+        self.__frames = None
+        self.__shared_image = False
+        if isinstance(image, SpriteSheet):
+            self.__show_frames(image, (0,), 0)
+        
+    def __in_world(self):
+        # type: () -> bool
+        return _actorsInWorld.get(self.__id) is self
         
     def set_location(self, x, y):
         # type: (float | None, float | None) -> None
@@ -512,11 +1073,19 @@ class Actor:
         :param x: The new X coordinate of the actor.  If you pass None, the X will not be changed.
         :param y: The new Y coordinate of the actor.  If you pass None, the Y will not be changed.
         """
-        if x is None:
-            x = self.get_exact_x()
-        if y is None:
-            y = self.get_exact_y()
-        _strype_graphics_internal.setImageLocation(self.__id, x, y)
+        if not self.__in_world():
+            return
+        if self.__motion is not None:
+            vx, vy = self._catch_up()
+        x, y = _clamp_to_world(self.__x if x is None else x, self.__y if y is None else y)
+        if x != self.__x or y != self.__y:
+            self.__x, self.__y = x, y
+            _actor_changed()
+            if self.__motion is not None:
+                # Carry on moving from the new location:
+                self.__start_motion(vx, vy, self.__motion[5])
+            else:
+                _set_sprite_location(self.__id, x, y)
         self._update_say_position()
         
     def set_rotation(self, degrees):
@@ -527,7 +1096,18 @@ class Actor:
         
         :param degrees: The rotation in degrees (0 points right, 90 points up, 180 points left, 270 points down).
         """
-        _strype_graphics_internal.setImageRotation(self.__id, degrees)
+        if not self.__in_world():
+            return
+        if self.__motion is not None:
+            vx, vy = self._catch_up()
+        if degrees != self.__rotation:
+            self.__rotation = _js_number(degrees)
+            _actor_changed()
+            if self.__motion is not None:
+                # Carry on turning from the new rotation:
+                self.__start_motion(vx, vy, self.__motion[5])
+            else:
+                _set_sprite_rotation(self.__id, degrees)
         # Note: no need to update say position if we are just rotating
                 
     def get_rotation(self):
@@ -537,7 +1117,10 @@ class Actor:
         
         :return: The rotation of this Actor, in degrees, or None if the actor has been removed from the world.
         """
-        return _strype_graphics_internal.getImageRotation(self.__id)
+        if not self.__in_world():
+            return None
+        self._catch_up()
+        return self.__rotation
     
     def get_tag(self):
         # type: () -> Any | None
@@ -555,12 +1138,19 @@ class Actor:
         
         If you later need to add it back to the world, you can use the `re_add` method.
         """
-        # This call makes sure __editable_image stores the image in case we later need to re-add:
-        self.get_image()
-        _strype_graphics_internal.removeImage(self.__id)
+        # This call makes sure __editable_image stores the image in case we later need to re-add
+        # (if we are showing a sprite sheet, or a shared image, we keep that instead):
+        if self.__sheet is None and not self.__shared_image:
+            self.get_image()
+        _remove_sprite(self.__id)
         # Also remove any speech bubble:
         self.say("")
         del _actorsInWorld[self.__id]
+        _actor_changed()
+        try:
+            del _actorsByTag[self.__tag][self.__id]
+        except (KeyError, TypeError):
+            pass
 
     def re_add(self, x = 0, y = 0):
         # type: (int, int) -> None
@@ -575,7 +1165,18 @@ class Actor:
         if self.__id in _actorsInWorld:
             self.set_location(x, y)
         else:
-            self.__init__(self.__editable_image, x, y, self.__tag)
+            precise = self.__precise
+            sheet, frames, shared_image = self.__sheet, self.__frames, self.__shared_image
+            (vx, vy), angular_velocity, edge_mode = self._catch_up(), self.get_angular_velocity(), self.__edge_mode
+            self.__init__(self.__editable_image if sheet is None else sheet, x, y, self.__tag)
+            self.__shared_image = shared_image
+            self.set_precise_collisions(precise)
+            # Carry on moving by ourselves, from the new location:
+            self.__edge_mode = edge_mode
+            self.__start_motion(vx, vy, angular_velocity)
+            if sheet is not None:
+                # Carry on with the same frames, and the same place in the animation:
+                self.__show_frames(sheet, *frames)
 
     def get_x(self):
         # type: () -> int | None
@@ -587,9 +1188,11 @@ class Actor:
         :return: The current x coordinate, as an integer, or None if the actor has been removed from the world.
         """
         
-         # Gets X with rounding (towards zero):
-        location = _strype_graphics_internal.getImageLocation(self.__id)
-        return int(location.x) if location else None
+        # Gets X with rounding (towards zero):
+        if not self.__in_world():
+            return None
+        self._catch_up()
+        return int(self.__x)
 
     def get_y(self):
         # type: () -> int | None
@@ -601,8 +1204,10 @@ class Actor:
         :return: The current y coordinate, as an integer, or None if the actor has been removed from the world.
         """
         # Gets Y with rounding (towards zero):
-        location = _strype_graphics_internal.getImageLocation(self.__id)
-        return int(location.y) if location else None
+        if not self.__in_world():
+            return None
+        self._catch_up()
+        return int(self.__y)
 
     def get_exact_x(self):
         # type: () -> float | None
@@ -613,8 +1218,10 @@ class Actor:
         :return: The exact x coordinate, or None if the actor has been removed from the world.
         """
         # Gets X with no rounding:
-        location = _strype_graphics_internal.getImageLocation(self.__id)
-        return location.x if location else None
+        if not self.__in_world():
+            return None
+        self._catch_up()
+        return self.__x
 
     def get_exact_y(self):
         # type: () -> float | None
@@ -625,8 +1232,10 @@ class Actor:
         :return: The exact y coordinate, or None if the actor has been removed from the world.
         """
         # Gets Y with no rounding:
-        location = _strype_graphics_internal.getImageLocation(self.__id)
-        return location.y if location else None
+        if not self.__in_world():
+            return None
+        self._catch_up()
+        return self.__y
     
     def move(self, distance):
         # type: (float) -> None
@@ -638,11 +1247,12 @@ class Actor:
         
         :param distance: The distance to move (in pixels).  Negative amounts move backwards.
         """
-        cur = _strype_graphics_internal.getImageLocation(self.__id)
-        if cur is not None:
-            rot = _math.radians(_strype_graphics_internal.getImageRotation(self.__id))
-            self.set_location(cur.x + distance * _math.cos(rot), cur.y + distance * _math.sin(rot))
-        # If cur is None, do nothing
+        if self.__in_world():
+            if self.__motion is not None:
+                self._catch_up()
+            rot = _math.radians(self.__rotation)
+            self.set_location(self.__x + distance * _math.cos(rot), self.__y + distance * _math.sin(rot))
+        # If we are not in the world, do nothing
     
     def turn(self, degrees):
         # type: (float) -> None
@@ -651,10 +1261,135 @@ class Actor:
         
         :param degrees: The amount to turn.  Positive amounts turn anti-clockwise, negative amounts turn clockwise.
         """
-        rotation = _strype_graphics_internal.getImageRotation(self.__id)
-        if rotation is not None:
-            self.set_rotation(rotation + degrees)
-        # If rotation is None, do nothing
+        if self.__in_world():
+            if self.__motion is not None:
+                self._catch_up()
+            self.set_rotation(self.__rotation + degrees)
+        # If we are not in the world, do nothing
+    
+    def _catch_up(self):
+        # type: () -> tuple[float, float]
+        # If we are moving by ourselves, updates __x, __y and __rotation to where we are now (as motionAt in
+        # image_and_collisions.ts does for the sprite).  Returns our velocity now, which bouncing may have reversed:
+        if self.__motion is None:
+            return 0, 0
+        start_x, start_y, start_rotation, vx, vy, angular_velocity, edge, start_time = self.__motion
+        seconds = max(0, _time.time() * 1000 - start_time) / 1000
+        x, vx = _position_along(start_x, vx, seconds, -399, 400, edge)
+        y, vy = _position_along(start_y, vy, seconds, -299, 300, edge)
+        self.__x, self.__y = _clamp_to_world(x, y)
+        self.__rotation = _js_number(start_rotation + angular_velocity * seconds)
+        return vx, vy
+    
+    def __start_motion(self, vx, vy, angular_velocity):
+        # type: (float, float, float) -> None
+        # Starts moving by ourselves (or stops, if everything is zero) from where we are now, which must be up to date:
+        if vx == 0 and vy == 0 and angular_velocity == 0:
+            if self.__motion is None:
+                return
+            self.__motion = None
+            edge = None
+        else:
+            self.__motion = (self.__x, self.__y, self.__rotation, vx, vy, angular_velocity, self.__edge_mode, _time.time() * 1000)
+            edge = self.__edge_mode
+        _actor_changed()
+        if self.__in_world():
+            # This has our latest location and rotation, so any batched up changes (apart from a new image) are out of date:
+            _flush_if_pending(self.__id)
+            _pending_transforms.pop(self.__id, None)
+            _strype_graphics_internal.setSpriteMotion(self.__id, self.__x, self.__y, self.__rotation, vx, vy, angular_velocity, edge, 0 if self.__motion is None else self.__motion[7])
+    
+    def set_velocity(self, vx, vy):
+        # type: (float, float) -> None
+        """
+        Make the actor move by itself, at the given speed in each direction.  The actor keeps moving while the rest of
+        your program runs, without you having to move it each time round a loop, and it moves smoothly even if your program is busy.
+        The location methods (like `get_x()`) give where it has got to, and methods like `set_location()` and `move()`
+        move it from there, after which it carries on moving by itself.  Use `set_edge_mode()` to choose what
+        happens when it reaches the edge of the world.  To stop the actor moving by itself, call `set_velocity(0, 0)`.
+        
+        Note that a speech bubble (see `say`) is only moved along with the actor when you call one of the actor's methods which moves it.
+        
+        :param vx: How far to move in the X direction each second, in pixels.  Positive values move right.
+        :param vy: How far to move in the Y direction each second, in pixels.  Positive values move up.
+        """
+        if self.__motion is None:
+            angular_velocity = 0
+        else:
+            self._catch_up()
+            angular_velocity = self.__motion[5]
+        self.__start_motion(vx, vy, angular_velocity)
+    
+    def get_velocity(self):
+        # type: () -> tuple[float, float]
+        """
+        Return the velocity which the actor is moving by itself at (see `set_velocity`).  If it has bounced off the
+        edge of the world, this is the velocity that it is moving at now.
+        
+        :return: A tuple of how far the actor moves in the X direction and in the Y direction each second, in pixels.
+        """
+        return self._catch_up()
+    
+    def set_angular_velocity(self, degrees_per_second):
+        # type: (float) -> None
+        """
+        Make the actor turn by itself, at the given speed.  Like `set_velocity`, the actor keeps turning while the rest
+        of your program runs.  If the actor is also moving by itself, its direction of movement does not change as it turns.
+        To stop the actor turning by itself, call `set_angular_velocity(0)`.
+        
+        :param degrees_per_second: How far to turn each second, in degrees.  Positive amounts turn anti-clockwise, negative amounts turn clockwise.
+        """
+        vx, vy = self._catch_up()
+        self.__start_motion(vx, vy, degrees_per_second)
+    
+    def get_angular_velocity(self):
+        # type: () -> float
+        """
+        Return how fast the actor is turning by itself (see `set_angular_velocity`).
+        
+        :return: How far the actor turns each second, in degrees.
+        """
+        return 0 if self.__motion is None else self.__motion[5]
+    
+    def set_edge_mode(self, mode):
+        # type: (str) -> None
+        """
+        Choose what happens when the actor reaches the edge of the world while moving by itself (see `set_velocity`).
+        
+        :param mode: "stop" to stay at the edge (the default), "wrap" to come back into the world on the opposite side,
+                     or "bounce" to bounce back off the edge.
+        """
+        if mode not in _EDGE_MODES:
+            raise ValueError("Edge mode must be one of " + ", ".join(_EDGE_MODES) + " but was: " + str(mode))
+        vx, vy = self._catch_up()
+        self.__edge_mode = mode
+        if self.__motion is not None:
+            self.__start_motion(vx, vy, self.__motion[5])
+    
+    def _set_transform(self, x, y, rotation):
+        # type: (float, float, float) -> list[float | None] | None
+        # Used by ActorGroup to change many actors at once.  Sets our location (clamped, as set_location does) and
+        # rotation without sending them, and returns the [id, x, y, rotation] change to send (None for the parts which
+        # haven't changed), or None if nothing changed or we are not in the world:
+        if not self.__in_world():
+            return None
+        vx, vy = self._catch_up()
+        x, y = _clamp_to_world(x, y)
+        moved = x != self.__x or y != self.__y
+        turned = rotation != self.__rotation
+        if not moved and not turned:
+            return None
+        self.__x, self.__y = x, y
+        self.__rotation = _js_number(rotation)
+        change = [self.__id, x if moved else None, y if moved else None, rotation if turned else None]
+        if self.__motion is not None:
+            # We can't send this with the others, as we carry on moving by ourselves from here:
+            self.__start_motion(vx, vy, self.__motion[5])
+            change = None
+        # (This must come after restarting our motion, as it asks where we are now:)
+        if moved and self.__say is not None:
+            self._update_say_position()
+        return change
 
     def is_at_edge(self, distance = 2):
         # type: (float) -> bool
@@ -665,10 +1400,11 @@ class Actor:
         :param distance: The amount of pixels to use as edge of world.  Must be greater than zero.
         :return: True if the actor is within `distance` pixels of the edge of the world, False otherwise. 
         """
-        x = self.get_exact_x()
-        y = self.get_exact_y()
-        if x is None or y is None:
+        if not self.__in_world():
             return False
+        self._catch_up()
+        x = self.__x
+        y = self.__y
         return x <= (-399 + distance) or x >= (400 - distance) or y <= (-299 + distance) or y >= (300 - distance)
    
     def is_touching(self, actor_or_tag = None):
@@ -677,7 +1413,8 @@ class Actor:
         Check if this actor is touching the another actor.
         
         Two actors are deemed to be touching if the bounding rectangles of their images are 
-        overlapping (even if the actor is transparent at that point).
+        overlapping (even if the actor is transparent at that point), unless one of them has
+        precise collisions turned on (see `set_precise_collisions()`).
         
         The parameter can be either a specific actor (of type :class:`Actor`) or a tag.  If a tag is used,
         this function will return True if any actor with this tag is touched.
@@ -686,12 +1423,30 @@ class Actor:
         :return: True if this actor overlaps that actor (or an actor with the given tag), False if it does not.
         """
         if isinstance(actor_or_tag, Actor):
+            _flush_sprite_updates()
             return _strype_input_internal.checkCollision(self.__id, actor_or_tag.__id)
         else:
             # All other types are assumed to be a tag:
             # Slightly odd construct but we convert list (implicitly boolean) to explicitly boolean:
             return True if self.get_all_touching(actor_or_tag) else False
 
+    def set_precise_collisions(self, precise):
+        # type: (bool) -> None
+        """
+        Turn precise collisions on or off for this actor.  They are off to begin with.
+        
+        Normally, actors are touching if the rectangles of their images overlap, even if the images are
+        transparent there.  With precise collisions on, this actor only touches other actors where
+        the solid (non-transparent) parts of its image overlap them.  This is a little slower, and the very
+        first check for each image is slower still, but after that it is nearly as fast as the normal check.
+        
+        :param precise: True to turn precise collisions on, False to turn them off.
+        """
+        self.__precise = bool(precise)
+        if self.__in_world():
+            _flush_if_pending(self.__id)
+            _strype_input_internal.setPreciseCollision(self.__id, self.__precise)
+
     def get_touching(self, tag = None):
         # type: (Any | None) -> Actor | None
         """
@@ -701,7 +1456,8 @@ class Actor:
         passed as a parameter, only actors with that tag will be considered.
                 
         Two actors are deemed to be touching if the bounding rectangles of their images are 
-        overlapping (even if the actor is transparent at that point).
+        overlapping (even if the actor is transparent at that point), unless one of them has
+        precise collisions turned on (see `set_precise_collisions()`).
         
         :param tag: The tag of the actor to check for touching, or None to check all actors.
         :return: The :class:`Actor` we are touching, if any, or None if we are not touching any actor. 
@@ -725,7 +1481,10 @@ class Actor:
         :param tag: The tag to use to filter the returned actors (or None to return all actors)
         :return: A list of all touching actors.
         """
-        return [_actorsInWorld.get(a) for a in _strype_input_internal.getAllTouchingAssociated(self.__id) if _actorsInWorld.get(a) is not None and (tag is None or tag == _actorsInWorld.get(a).get_tag())]
+        if not _has_actors_with_tag(tag):
+            return []
+        _flush_sprite_updates()
+        return _filter_by_tag(_strype_input_internal.getAllTouchingAssociated(self.__id, _tag_id(tag)), tag)
     
     def remove_touching(self, actor_or_tag = None):
         # type: (Actor | Any | None) -> None
@@ -759,7 +1518,10 @@ class Actor:
         :param tag: The tag to use to filter the actors (or None to consider all actors)
         :return: A list of all actors within a given range.
         """
-        return [_actorsInWorld.get(a) for a in _strype_input_internal.getAllNearbyAssociated(self.__id, distance) if _actorsInWorld.get(a) is not None and (tag is None or tag == _actorsInWorld.get(a).get_tag())]
+        if not _has_actors_with_tag(tag):
+            return []
+        _flush_sprite_updates()
+        return _filter_by_tag(_strype_input_internal.getAllNearbyAssociated(self.__id, distance, _tag_id(tag)), tag)
 
     def get_image(self):
         # type: () -> Image
@@ -767,34 +1529,117 @@ class Actor:
         Return the image of this actor.  The image object returned is the actual actor's live image -- drawing on it will 
         become visible on the actor's image.
         
+        If the actor is showing a frame of a :class:`SpriteSheet`, this is a copy of the whole sprite sheet,
+        which only this actor shows.
+        
         :return: The actor's :class:`Image`.
         """
         # Note: we don't want to have an editable image by default because it is slower to render
         # the editable canvas than to render the unedited image (I think!?)
         # That is, if you load an image from a file it's kept internally as an HTML Image,
         # but if you call get_image() we turn it into an off-screen canvas so that it can be edited.
+        if self.__shared_image:
+            # Drawing on a shared image would change every actor showing it, so we switch to our own copy:
+            self.set_image(self.__editable_image.clone())
         if self.__editable_image is None:
             # The -42, -42 sizing indicates we will set the image ourselves afterwards:
             self.__editable_image = Image(-42, -42)
+            _flush_if_pending(self.__id)
             self.__editable_image._Image__image = _strype_graphics_internal.makeImageEditableForSprite(self.__id) 
         return self.__editable_image
     
     def set_image(self, image):
-        # type: (Image | str) -> None
+        # type: (Image | SpriteSheet | str) -> None
         """
         Set an actor's image
         
-        The image parameter must be an :class:`Image` object.
+        The image parameter must be an :class:`Image` object, or a :class:`SpriteSheet` (in which case the actor shows its first frame).
         :param image: An :class:`Image` object.
         """
         if isinstance(image, Image):
-            _strype_graphics_internal.updateImage(self.__id, image._Image__image)
+            _set_sprite_image(self.__id, image._Image__image)
             self.__editable_image = image
         elif isinstance(image, str):
-            _strype_graphics_internal.updateImage(self.__id, _load_image_bitmap(image))
+            _set_sprite_image(self.__id, _load_image_bitmap(image))
+            self.__editable_image = None
+        elif isinstance(image, SpriteSheet):
+            _set_sprite_image(self.__id, image._SpriteSheet__image)
             self.__editable_image = None
+            self.__shared_image = False
+            self.__show_frames(image, (0,), 0)
+            return
         else:
             raise TypeError("Actor image parameter must be Image")
+        self.__shared_image = False
+        if self.__sheet is not None:
+            self.__sheet = None
+            self.__frames = None
+            _flush_if_pending(self.__id)
+            _strype_graphics_internal.setSpriteFrames(self.__id, 0, 0, 0, None, 0, 0)
+    
+    def __show_frames(self, sheet, frames, fps, start_time = None):
+        # type: (SpriteSheet, tuple[int, ...], float, float | None) -> None
+        # Shows the given frames of the sheet in turn, which are only sent across if they have changed.  The start
+        # time (in milliseconds, like Javascript's Date.now()) is when the animation was at its first frame:
+        if sheet is self.__sheet and self.__frames is not None and self.__frames[:2] == (frames, fps):
+            return
+        for index in frames:
+            sheet._check_frame(index)
+        if start_time is None:
+            start_time = _time.time() * 1000
+        self.__sheet = sheet
+        self.__frames = (frames, fps, start_time)
+        sheet._show_on(self.__id, list(frames), fps, start_time)
+        self._update_say_position()
+    
+    def __get_sheet(self):
+        # type: () -> SpriteSheet
+        if self.__sheet is None:
+            raise TypeError("Actor is not showing a SpriteSheet; pass one to the Actor constructor or to set_image first")
+        return self.__sheet
+    
+    def set_frame(self, index):
+        # type: (int) -> None
+        """
+        Show the given frame of the actor's :class:`SpriteSheet`, stopping any animation.  The actor's image must be a sprite sheet.
+        
+        :param index: The number of the frame, from 0 up to one less than the sprite sheet's `get_frame_count()`.
+        """
+        self.__show_frames(self.__get_sheet(), (index,), 0)
+    
+    def animate(self, frames = None, fps = 10):
+        # type: (list[int] | None, float) -> None
+        """
+        Animate the actor by showing frames of its :class:`SpriteSheet` in turn, over and over, until `set_frame`,
+        `animate` or `set_image` is called.  The actor's image must be a sprite sheet.  The animation carries on by itself,
+        without your program having to do anything for each frame.  Calling `animate` again with the same frames and speed
+        carries on with the current animation rather than starting again, so it is fine to call it every time round a loop.
+        
+        :param frames: The list of frame numbers to show in order, or None to show all the frames of the sprite sheet.
+        :param fps: How many frames to show per second.
+        """
+        sheet = self.__get_sheet()
+        frames = tuple(range(sheet.get_frame_count()) if frames is None else frames)
+        if not frames:
+            raise ValueError("animate needs at least one frame")
+        if fps < 0:
+            raise ValueError("fps must not be negative")
+        self.__show_frames(sheet, frames, fps)
+    
+    def get_frame(self):
+        # type: () -> int | None
+        """
+        Return the number of the frame of its :class:`SpriteSheet` which the actor is currently showing.
+        
+        :return: The frame number, or None if the actor is not showing a sprite sheet.
+        """
+        if self.__sheet is None:
+            return None
+        frames, fps, start_time = self.__frames
+        if fps <= 0 or len(frames) == 1:
+            return frames[0]
+        # The same sum as sequenceIndexAt in image_and_collisions.ts:
+        return frames[int(max(0, _time.time() * 1000 - start_time) * fps / 1000) % len(frames)]
     
     def say(self, text, font_size = 24, max_width = 300, max_height = 200, font_family = None):
         # type: (str, float, float, float, str | None) -> None
@@ -816,38 +1661,28 @@ class Actor:
         """
         
         # Remove any existing speech bubble:
-        if self.__say is not None and _strype_graphics_internal.imageExists(self.__say):
-            _strype_graphics_internal.removeImage(self.__say)
+        if self.__say is not None and _sprite_exists(self.__say):
+            _remove_sprite(self.__say)
             self.__say = None
+            _actor_changed()
         # Then add a new one if text is not blank and we are in the world:
-        if text and _strype_graphics_internal.imageExists(self.__id):
-            padding = 10
-            # We first make an image just with the text on, which also tells us the size:
-            textOnlyImg = Image(max_width, max_height)
-            textOnlyImg.set_fill("white")
-            textOnlyImg.fill()
-            textOnlyImg.set_fill("black")
-            textOnlyImg.set_stroke(None)
-            textDimensions = textOnlyImg.draw_text(text, 0, 0, font_size, max_width, max_height, font_family)
-            # Now we prepare an image of the right size plus padding:
-            sayImg = Image(textDimensions.width + 2 * padding, textDimensions.height + 2 * padding)
-            # We draw a rounded rect for the background, then draw the text on:
-            sayImg.set_fill("white")
-            sayImg.set_stroke("#555555FF")
-            sayImg.draw_rounded_rect(2, 2, textDimensions.width + 2 * padding - 4, textDimensions.height + 2 * padding - 4, padding)
-            sayImg._draw_part_of_image(textOnlyImg, padding, padding, 0, 0, textDimensions.width, textDimensions.height)
-            self.__say = _strype_graphics_internal.addSprite(sayImg._Image__image, False)
+        if text and _sprite_exists(self.__id):
+            sayImg = _speech_bubble_image(text, font_size, max_width, max_height, font_family)
+            say_image = sayImg._Image__image
+            self.__say = _add_sprite(say_image, False)
+            self.__say_size = (say_image.width, say_image.height)
+            _actor_changed()
             self._update_say_position()
             
     def _update_say_position(self):
         # type: () -> None
         # Update the speech bubble position to be relative to our new position and scale:
-        if self.__say is not None and _strype_graphics_internal.imageExists(self.__say):
-            say_dim = _strype_graphics_internal.getImageSize(self.__say).to_py()
-            our_dim = _strype_graphics_internal.getImageSize(self.__id).to_py()
-            scale = _strype_graphics_internal.getImageScale(self.__id)
-            width = our_dim['width'] * scale
-            height = our_dim['height'] * scale
+        if self.__say is not None and _sprite_exists(self.__say):
+            say_dim = {'width': self.__say_size[0], 'height': self.__say_size[1]}
+            our_width, our_height = _sprite_image_size(self.__id)
+            scale = self.__scale
+            width = our_width * scale
+            height = our_height * scale
             # Based on where speech bubbles generally appear, we try the following in order:
             placements = [
                     [1, 1],  # Above right
@@ -869,7 +1704,7 @@ class Actor:
                 # If it fits or its our last fallback:
                 if fits or p == [0,0] :
                     # Here we do halve both widths/heights because we are placing the centre:
-                    _strype_graphics_internal.setImageLocation(self.__say, self.get_x() + p[0]*(width/2 + say_dim['width']/2), self.get_y() + p[1]*(height/2 + say_dim['height']/2))
+                    _set_sprite_location(self.__say, self.get_x() + p[0]*(width/2 + say_dim['width']/2), self.get_y() + p[1]*(height/2 + say_dim['height']/2))
                     break
         else:
             self.__say = None
@@ -887,30 +1722,328 @@ class Actor:
         :param max_height: The maximum height of the text (or 0 for no maximum).
         """
         self.say(text, font_size, max_width, max_height)
+        _flush_if_pending(self.__say)
         _strype_graphics_internal.removeImageAfter(self.__say, seconds)
 
-def _load_image_bitmap(name):
-    import re
-    # Important we check this first, so we don't list the filesystem (slow for cloud) if unneeded:
-    # This is copied from the conditions in loadAndWaitForImage, see there:
-    if name.startswith("http:") or name.startswith("https:") or name.startswith("data:") or name.startswith(":") or (":" not in name and re.match(r'^[^./]+\.[^/]+/.+', name)):
-        return _strype_graphics_internal.loadAndWaitForImage(name)
-    else:
-        # We load it from our virtual file system, either the current dir or /strype/graphics/
-        # To pass it on, it's probably faster to turn it into a data URL than e.g. read bytes
-        # and pass a long list of numbers which Pyodide has to convert item by array item to Javascript: 
-        import base64
-        import mimetypes
+class ActorGroup:
+    """
+    A group of actors which can be moved, turned and removed all at once.  Changing a whole group is much faster
+    than changing each actor in turn, because the changes are all sent to the screen together.  This is useful for
+    things like particles, snow or flocks of birds, which have hundreds of actors.
+    
+    Each actor in the group also has a step: an amount to move in X and Y each time `step_all()` is called.  This is
+    separate from `Actor.set_velocity`, which makes an actor move by itself at a speed in pixels per second; an actor
+    moving by itself is still moved by its step too.
+    
+    Many methods take a list of values, one for each actor in the order they are in the group.  NumPy arrays can be
+    used instead of lists (and are worked on all at once, rather than one value at a time), and the arrays returned by
+    `get_xs()` etc can be used with NumPy (e.g. `numpy.asarray(group.get_xs())`).
+    Actors which have been removed from the world stay in the group, but are left alone by all the methods.
+    """
+    
+    # Attributes:
+    # __actors: the list of Actors in the group
+    # __ids: the sprite id of each actor, in the same order as __actors
+    # __xs, __ys, __rotations: the location and rotation of each actor, as array("d") in the same order as __actors.
+    #       The group methods work on these columns, and copy the changes to the actors (see __write).  If an actor
+    #       is changed by itself, the columns are read from the actors again (see __refresh).
+    # __step_xs, __step_ys: the steps of the actors (see step_all), as array("d") in the same order as __actors
+    # __plain: the indexes of the actors in the world which only need their columns changing to move them
+    # __special: the indexes of the actors in the world which are moving by themselves or have a speech bubble,
+    #       so are moved one at a time (see Actor._set_transform)
+    # __synced_at: the value of _actor_changes when the columns were last read from the actors, or None if they
+    #       need reading again
+    
+    def __init__(self, actors = None):
+        # type: (list[Actor] | None) -> None
+        """
+        Create a new group of actors.
+        
+        :param actors: The actors to put in the group, or None to start with an empty group.
+        """
+        self.__actors = []
+        self.__ids = []
+        self.__xs = _array.array("d")
+        self.__ys = _array.array("d")
+        self.__rotations = _array.array("d")
+        self.__step_xs = _array.array("d")
+        self.__step_ys = _array.array("d")
+        self.__plain = []
+        self.__special = []
+        self.__synced_at = None
+        for actor in actors or []:
+            self.add(actor)
+    
+    def add(self, actor, step_x = 0, step_y = 0):
+        # type: (Actor, float, float) -> None
+        """
+        Add an actor to the end of the group.
+        
+        :param actor: The :class:`Actor` to add.
+        :param step_x: How far `step_all()` moves the actor in the X direction.
+        :param step_y: How far `step_all()` moves the actor in the Y direction.
+        """
+        if not isinstance(actor, Actor):
+            raise TypeError("ActorGroup can only contain Actor objects")
+        self.__actors.append(actor)
+        self.__step_xs.append(step_x)
+        self.__step_ys.append(step_y)
+        self.__synced_at = None
+    
+    def get_actors(self):
+        # type: () -> list[Actor]
+        """
+        Return the actors in the group.
+        
+        :return: A new list of the actors in the group, in order.
+        """
+        return list(self.__actors)
+    
+    def __len__(self):
+        # type: () -> int
+        return len(self.__actors)
+    
+    def __iter__(self):
+        # type: () -> Any
+        return iter(list(self.__actors))
+    
+    def __per_actor(self, values, name):
+        # type: (Any, str) -> Any
+        # Gives a list (or NumPy array) with a value for each actor, from either a single number or a list of them:
+        if isinstance(values, _numbers.Real):
+            return [values] * len(self.__actors)
+        if _numpy_for(values) is None:
+            values = list(values)
+        if len(values) != len(self.__actors):
+            raise ValueError(name + " must have one value for each of the " + str(len(self.__actors)) + " actors in the group, but has " + str(len(values)))
+        return values
+    
+    def __column(self, values, name):
+        # type: (Any, str) -> _array.array
+        # Gives an array("d") with a value for each actor, from either a single number or a list or NumPy array of them:
+        values = self.__per_actor(values, name)
+        numpy = _numpy_for(values)
+        column = _array.array("d")
+        if numpy is not None:
+            column.frombytes(numpy.asarray(values, dtype="d").tobytes())
+        else:
+            column.extend(values)
+        return column
+    
+    def __refresh(self):
+        # type: () -> None
+        # Reads the columns from the actors again if any actor has been changed by itself since we last did, and
+        # brings the actors which are moving by themselves up to date:
+        actors = self.__actors
+        if self.__synced_at != _actor_changes:
+            self.__ids = [actor._Actor__id for actor in actors]
+            self.__xs = _array.array("d", [actor._Actor__x for actor in actors])
+            self.__ys = _array.array("d", [actor._Actor__y for actor in actors])
+            self.__rotations = _array.array("d", [actor._Actor__rotation for actor in actors])
+            self.__plain = []
+            self.__special = []
+            for i, actor in enumerate(actors):
+                if actor._Actor__in_world():
+                    if actor._Actor__motion is not None or actor._Actor__say is not None:
+                        self.__special.append(i)
+                    else:
+                        self.__plain.append(i)
+            self.__synced_at = _actor_changes
+        for i in self.__special:
+            actor = actors[i]
+            actor._catch_up()
+            self.__xs[i], self.__ys[i], self.__rotations[i] = actor._Actor__x, actor._Actor__y, actor._Actor__rotation
+    
+    def __write(self, xs, ys, rotations):
+        # type: (Any, Any, Any) -> None
+        # Sets the location (clamped, as set_location does) and rotation of every actor in the world from the given
+        # columns, and sends all the changes together.  Must be called straight after __refresh:
+        xs, ys, rotations = [values.tolist() if _numpy_for(values) is not None else values for values in (xs, ys, rotations)]
+        actors, ids = self.__actors, self.__ids
+        old_xs, old_ys, old_rotations = self.__xs, self.__ys, self.__rotations
+        changes = []
+        for i in self.__plain:
+            # The same clamping as _clamp_to_world, but only going through _js_number for the values which changed:
+            x, y, rotation = max(-399, min(xs[i], 400)), max(-299, min(ys[i], 300)), rotations[i]
+            moved = x != old_xs[i] or y != old_ys[i]
+            turned = rotation != old_rotations[i]
+            if moved or turned:
+                actor = actors[i]
+                if moved:
+                    old_xs[i], old_ys[i] = x, y
+                    actor._Actor__x, actor._Actor__y = _js_number(x), _js_number(y)
+                if turned:
+                    old_rotations[i] = rotation
+                    actor._Actor__rotation = _js_number(rotation)
+                changes.append([ids[i], x if moved else None, y if moved else None, rotation if turned else None])
+        for i in self.__special:
+            actor = actors[i]
+            change = actor._set_transform(xs[i], ys[i], rotations[i])
+            if change is not None:
+                changes.append(change)
+            old_xs[i], old_ys[i], old_rotations[i] = actor._Actor__x, actor._Actor__y, actor._Actor__rotation
+        # Restarting the motion of the special actors counts as a change, but we are up to date with it:
+        self.__synced_at = _actor_changes
+        _send_sprite_transforms(changes)
+    
+    def get_xs(self):
+        # type: () -> list[float]
+        """
+        Return the X coordinates of the actors in the group.
+        
+        :return: An array of the X coordinate of each actor, in order.
+        """
+        self.__refresh()
+        return _array.array("d", self.__xs)
+    
+    def get_ys(self):
+        # type: () -> list[float]
+        """
+        Return the Y coordinates of the actors in the group.
+        
+        :return: An array of the Y coordinate of each actor, in order.
+        """
+        self.__refresh()
+        return _array.array("d", self.__ys)
+    
+    def get_rotations(self):
+        # type: () -> list[float]
+        """
+        Return the rotations of the actors in the group.
+        
+        :return: An array of the rotation (in degrees) of each actor, in order.
+        """
+        self.__refresh()
+        return _array.array("d", self.__rotations)
+    
+    def set_locations(self, xs, ys):
+        # type: (list[float], list[float]) -> None
+        """
+        Set the location of every actor in the group.  As with `Actor.set_location`, locations outside the world
+        are adjusted to the nearest point inside the world.
+        
+        :param xs: The new X coordinate for each actor, in order.
+        :param ys: The new Y coordinate for each actor, in order.
+        """
+        xs, ys = self.__per_actor(xs, "xs"), self.__per_actor(ys, "ys")
+        self.__refresh()
+        self.__write(xs, ys, self.__rotations)
+    
+    def move_all(self, distance):
+        # type: (float | list[float]) -> None
+        """
+        Move every actor in the group forward in its own direction, as `Actor.move` does.
+        
+        :param distance: The distance to move (in pixels), either one number for all the actors or a list with the distance for each actor.
+        """
+        distances = self.__per_actor(distance, "distance")
+        self.__refresh()
+        numpy = _numpy_for(distances)
+        if numpy is not None:
+            radians = numpy.radians(numpy.asarray(self.__rotations))
+            distances = numpy.asarray(distances, dtype="d")
+            self.__write(numpy.asarray(self.__xs) + distances * numpy.cos(radians),
+                         numpy.asarray(self.__ys) + distances * numpy.sin(radians), self.__rotations)
+        else:
+            radians = [_math.radians(rotation) for rotation in self.__rotations]
+            self.__write([x + d * _math.cos(r) for x, d, r in zip(self.__xs, distances, radians)],
+                         [y + d * _math.sin(r) for y, d, r in zip(self.__ys, distances, radians)], self.__rotations)
+    
+    def turn_all(self, degrees):
+        # type: (float | list[float]) -> None
+        """
+        Turn every actor in the group, as `Actor.turn` does.
+        
+        :param degrees: The amount to turn, either one number for all the actors or a list with the amount for each actor.
+                        Positive amounts turn anti-clockwise, negative amounts turn clockwise.
+        """
+        amounts = self.__per_actor(degrees, "degrees")
+        self.__refresh()
+        numpy = _numpy_for(amounts)
+        if numpy is not None:
+            self.__write(self.__xs, self.__ys, numpy.asarray(self.__rotations) + numpy.asarray(amounts, dtype="d"))
+        else:
+            self.__write(self.__xs, self.__ys, [rotation + d for rotation, d in zip(self.__rotations, amounts)])
+    
+    def set_steps(self, step_xs, step_ys):
+        # type: (float | list[float], float | list[float]) -> None
+        """
+        Set how far each actor in the group moves each time `step_all()` is called.
+        
+        :param step_xs: The step in the X direction, either one number for all the actors or a list with the step for each actor.
+        :param step_ys: The step in the Y direction, either one number for all the actors or a list with the step for each actor.
+        """
+        self.__step_xs, self.__step_ys = self.__column(step_xs, "step_xs"), self.__column(step_ys, "step_ys")
+    
+    def get_steps(self):
+        # type: () -> tuple[list[float], list[float]]
+        """
+        Return how far each actor in the group moves each time `step_all()` is called.
+        
+        :return: A tuple of two arrays: the X step of each actor in order, and the Y step of each actor in order.
+        """
+        return _array.array("d", self.__step_xs), _array.array("d", self.__step_ys)
+    
+    def step_all(self):
+        # type: () -> None
+        """
+        Move every actor in the group by its step: its X step is added to its X coordinate, and its Y step to its
+        Y coordinate.  Call this once each time round your main loop to keep the actors moving.  (To make actors
+        move by themselves at a steady speed instead, see `Actor.set_velocity`.)
+        """
+        self.__refresh()
+        self.__write([x + dx for x, dx in zip(self.__xs, self.__step_xs)], [y + dy for y, dy in zip(self.__ys, self.__step_ys)], self.__rotations)
+    
+    def remove_where(self, mask):
+        # type: (list[bool]) -> list[Actor]
+        """
+        Remove some of the actors from the world and from the group.  For example, `group.remove_where([y < -290 for y in group.get_ys()])`
+        removes all the actors which have reached the bottom of the world.
+        
+        :param mask: A list with a value for each actor, in order: the actors with a true value are removed.
+        :return: The list of actors which were removed.
+        """
+        mask = self.__per_actor(mask, "mask")
+        if _numpy_for(mask) is not None:
+            mask = mask.tolist()
+        removed = []
+        kept = []
+        for i, (actor, remove) in enumerate(zip(self.__actors, mask)):
+            if remove:
+                removed.append(actor)
+            else:
+                kept.append(i)
+        for actor in removed:
+            if actor._Actor__in_world():
+                actor.remove()
+        self.__actors = [self.__actors[i] for i in kept]
+        self.__step_xs = _array.array("d", [self.__step_xs[i] for i in kept])
+        self.__step_ys = _array.array("d", [self.__step_ys[i] for i in kept])
+        self.__synced_at = None
+        return removed
+
+@_functools.lru_cache(maxsize=None)
+def _load_font(font_family):
+    # type: (str) -> None
+    # Each font only needs loading once.  If loading fails, the exception means lru_cache won't remember it:
+    if not _strype_graphics_internal.canvas_loadFont("google", font_family):
+        raise Exception("Could not load font " + font_family)
+
+@_functools.lru_cache(maxsize=1024)
+def _measure_text(text, font_size, max_width, max_height, font_family):
+    # type: (str, float, float, float, str | None) -> _Dimension
+    # Gets the size that draw_text will draw the text at.  This is cached, as text is often drawn repeatedly
+    # (e.g. in show_text and say) and measuring it means waiting for the main thread:
+    if font_family is not None:
+        _load_font(font_family)
+    dim = _strype_graphics_internal.measureText(text, font_size, max_width, max_height, font_family)
+    return _Dimension(dim[0], dim[1])
 
-        # If both fail, it will give an informative error (no such file):
-        try:
-            with open(name, "rb") as f:
-                encoded = base64.b64encode(f.read()).decode("ascii")
-        except:
-            with open("/images/" + name, "rb") as f:
-                encoded = base64.b64encode(f.read()).decode("ascii")
-        mime_type, _ = mimetypes.guess_type(name)
-        return _strype_graphics_internal.loadAndWaitForImage(f"data:{mime_type};base64,{encoded}")
+def _load_image_bitmap(name):
+    # Loaded images are cached (see _asset_cache), so that e.g. making an Actor from the same file
+    # for each enemy in a game only loads the file once.  Only the images themselves are shared,
+    # which is safe because they can't be drawn on; load_image copies them into a new canvas:
+    return _asset_cache.load("image", name, "/images/", _strype_graphics_internal.loadAndWaitForImage, _strype_graphics_internal.loadAndWaitForImageBytes, lambda img: img.width * img.height * 4)
 
 def load_image(name):
     # type: (str) -> Image
@@ -938,6 +2071,8 @@ def get_clicked_actor():
     
     :return: The most recently clicked :class:`Actor`, or None if no actor was clicked since the last call.
     """
+    # Clicks are matched to sprites on the main thread, so it needs to know where they are:
+    _flush_sprite_updates()
     clicked = _strype_input_internal.getAndResetClickedItems()
     if clicked:
         # Sorting by actor ID is equivalent to sorting by insertion order.
@@ -959,6 +2094,7 @@ def get_mouse_click():
     
     :return: A named tuple with details of the last click: `(x, y, button, click_count)` where button is 0 for primary (left), 1 for secondary (right) or 2 for middle; or None if the mouse was not clicked since the last call.
     """
+    _flush_output_if_due()
     c = _strype_input_internal.getAndResetClickDetails()
     if c is None:
         return None
@@ -974,6 +2110,7 @@ def get_mouse():
     
     :return: A named tuple with details of the mouse state: `(x, y, button0, button1, button2)` where the last three items are booleans where True indicates the button is held: button0 for primary (left), button1 for secondary (right), button2 for middle.
     """
+    _flush_output_if_due()
     c = _strype_input_internal.getMouseDetails()
     return _MouseDetails(c[0], c[1], c[2][0], c[2][1], c[2][2])
 
@@ -1001,6 +2138,8 @@ def key_pressed(keyname):
     global _last_pressed_keys_fetch
     # If they do a 30 fps game we'll fetch once per animation frame, more often than that (or multiple times in same frame) and we'll use cache:
     if now - _last_pressed_keys_fetch > 30:
+        # Programs often poll this in a loop while waiting for the user, so don't hold back their output meanwhile:
+        _flush_output_if_due()
         _cached_pressed_keys = _collections.defaultdict(lambda: False, _strype_input_internal.getPressedKeys().to_py())
         _last_pressed_keys_fetch = now
     # Allow " " as a synonym for "space":
@@ -1017,6 +2156,9 @@ def get_key():
     
     :return: The key that was pressed.
     """
+    # We may wait a long time, so show everything before we do:
+    _flush_sprite_updates()
+    _sys.stdout.flush()
     return _strype_input_internal.waitForNextKey()
 
 def set_background(image_or_color, scale_to_fit = False):
@@ -1054,9 +2196,8 @@ def set_background(image_or_color, scale_to_fit = False):
             # image then subtract the width/height of half of the copies we need: 
             x_offset = (800 - w) / 2 - (horiz_copies - 1) / 2 * w
             y_offset = (600 - h) / 2 - (vert_copies - 1) / 2 * h
-            for i in range(0, horiz_copies):
-                for j in range(0, vert_copies):
-                    dest.draw_image(image, x_offset + i * w, y_offset + j * h)
+            # Then the copies are all drawn in one go:
+            dest.fill_pattern(image, x_offset, y_offset)
         else:
             scale = max(800 / w, 600 / h)
             dest._draw_part_of_image(image, (800 - scale * w) / 2, (600 - scale * h) / 2, 0, 0, w, h, scale)
@@ -1109,7 +2250,7 @@ def get_actors(tag = None):
         :param tag: The tag to use to filter the returned actors (or None to return all actors)
         :return: A list of all actors (that have not been removed via the `remove()` call).
         """
-    return [_actorsInWorld.get(a) for a in _strype_input_internal.getAllActors() if _actorsInWorld.get(a) is not None and (tag is None or tag == _actorsInWorld.get(a).get_tag())]
+    return _actors_with_tag(tag)
 
 def get_actor_at(x, y, tag = None):
     # type: (float, float, Any | None) -> Actor | None
@@ -1123,12 +2264,49 @@ def get_actor_at(x, y, tag = None):
         :param tag: An optional tag used to constrain which actors to consider (if None, consider all actors).
         :return: An actor touching the given position, or None if there is none. 
     """
-    all = [_actorsInWorld.get(a) for a in _strype_input_internal.getAllAt(x, y) if _actorsInWorld.get(a) is not None]
-    if tag is None:
-        with_tag = all
-    else:
-        with_tag = [a for a in all if a.get_tag() == tag]
-    return next(reversed(with_tag), None)
+    if not _has_actors_with_tag(tag):
+        return None
+    _flush_sprite_updates()
+    return next(reversed(_filter_by_tag(_strype_input_internal.getAllAt(x, y, _tag_id(tag)), tag)), None)
+
+def get_collisions(tag_a = None, tag_b = None):
+    # type: (Any | None, Any | None) -> list[tuple[Actor, Actor]]
+    """
+        Gets all the pairs of actors which are touching each other.
+        
+        Each pair is a tuple of two actors, where the first has tag_a and the second has tag_b.  For example,
+        `get_collisions("bullet", "enemy")` gives every bullet that is touching an enemy, along with the enemy
+        it is touching.  This is much faster than calling `get_all_touching()` on every bullet.  If a tag is None,
+        actors with any tag (or no tag) can be in that position.  Each touching pair of actors is only included once.
+        
+        Two actors are deemed to be touching if the bounding rectangles of their images are 
+        overlapping (even if the actor is transparent at that point), unless one of them has
+        precise collisions turned on (see `set_precise_collisions()`).
+        
+        :param tag_a: The tag of the first actor in each pair, or None for any actor.
+        :param tag_b: The tag of the second actor in each pair, or None for any actor.
+        :return: A list of (actor, actor) tuples, one for each pair of touching actors.
+    """
+    if not _has_actors_with_tag(tag_a) or not _has_actors_with_tag(tag_b):
+        return []
+    _flush_sprite_updates()
+    tag_id_a, tag_id_b = _tag_id(tag_a), _tag_id(tag_b)
+    # The result is flattened, as [a, b, a, b, ...] ids, to save converting lots of little lists:
+    ids = _strype_input_internal.getCollisionPairs(tag_id_a, tag_id_b)
+    pairs = []
+    for i in range(0, len(ids) - 1, 2):
+        a, b = _actorsInWorld.get(ids[i]), _actorsInWorld.get(ids[i + 1])
+        if a is None or b is None:
+            continue
+        if (tag_a is None or tag_id_a is not None) and (tag_b is None or tag_id_b is not None):
+            # Javascript has already checked the tags:
+            pairs.append((a, b))
+        # Otherwise one of the tags is unhashable, and was not checked, so the pair may be either way round:
+        elif (tag_a is None or a.get_tag() == tag_a) and (tag_b is None or b.get_tag() == tag_b):
+            pairs.append((a, b))
+        elif (tag_a is None or b.get_tag() == tag_a) and (tag_b is None or a.get_tag() == tag_b):
+            pairs.append((b, a))
+    return pairs
 
 def remove_actors(tag = None):
     # type: (Any | None) -> list[Actor]
@@ -1162,11 +2340,16 @@ def pause(seconds):
     
     :param seconds: The amount of seconds to wait for.
     """
+    _flush_sprite_updates()
     _time.sleep(seconds)
 
 _last_frame = _time.time()
 # type: float
 
+# If set, this is called with actions_per_second at the start of every call to pace().
+# It is used by strype._bridge_instrumentation to group its statistics into frames:
+_pace_hook = None
+
 def pace(actions_per_second = 25):
     # type: (float) -> None
     """
@@ -1187,6 +2370,10 @@ def pace(actions_per_second = 25):
     :param actions_per_second: The amount of times you want to call pace() per second, 25 by default.
     """    
     global _last_frame
+    # The end of a frame, so show its changes:
+    _flush_sprite_updates()
+    if _pace_hook is not None:
+        _pace_hook(actions_per_second)
     now = _time.time()
     # We sleep for 1/Nth minus the time since we last slept.  If it's negative (because we can't keep
     # up that frame rate), we just "sleep" for 0, so go as fast as we can:
@@ -1194,9 +2381,63 @@ def pace(actions_per_second = 25):
     _last_frame = now + sleep_for
     _time.sleep(sleep_for)
 
+def set_batching(enabled):
+    # type: (bool) -> None
+    """
+    Turn batching of actor changes on or off.  It is off by default.
+    
+    Normally, every new actor and every change to an actor's location, rotation or image is sent to the screen
+    straight away.  With batching on, these are saved up and sent together, which is much faster if you have 
+    lots of actors.  Only the latest location, rotation and image of each actor is sent.
+    The changes are sent when you call `pace()` or `pause()`, when you check for touching actors or clicks, 
+    at the end of the program, and otherwise at least 30 times a second.
+    
+    :param enabled: True to turn batching on, False to turn it off (which sends any saved up changes).
+    """
+    global _batching, _next_sprite_id, _end_sprite_id
+    _batching = bool(enabled)
+    if not _batching:
+        _flush_sprite_updates()
+        # Give up the rest of the kept back ids, so that ids carry on going up in the order actors are made:
+        _next_sprite_id = _end_sprite_id = 0
+
 # Maps from integer (x,y) position to a (text, font_size, Actor) tuple that shows the image text
 _shown_text = {}
 
+# The images for show_text and say are cached, so that showing the same text again (e.g. a score going back to
+# an earlier value, or an actor repeating itself) reuses the image rather than drawing it again.  The images are
+# shared by everything showing the same text, so must not be drawn on once they have been made (show_text marks
+# its actors as sharing their image, so that get_image() gives out a copy).
+@_functools.lru_cache(maxsize=64)
+def _shown_text_image(text, font_size):
+    # type: (str, float) -> Image
+    textDimensions = _measure_text(text, font_size, 800, 600, "Inconsolata")
+    img = Image(textDimensions.width + font_size, textDimensions.height + font_size)
+    # We draw a rounded rect for the background, then draw the text on:
+    img.set_fill(Color(0, 0, 0, 80))
+    img.set_stroke(None)
+    img.draw_rounded_rect(0, 0, img.get_width(), img.get_height())
+    img.set_fill("white")
+    img.set_stroke("black")
+    img.draw_text(text, round(font_size / 2), round(font_size / 2), font_size, 800, 600, "Inconsolata")
+    return img
+
+@_functools.lru_cache(maxsize=64)
+def _speech_bubble_image(text, font_size, max_width, max_height, font_family):
+    # type: (str, float, float, float, str | None) -> Image
+    padding = 10
+    textDimensions = _measure_text(text, font_size, max_width, max_height, font_family)
+    # We prepare an image of the right size plus padding:
+    img = Image(textDimensions.width + 2 * padding, textDimensions.height + 2 * padding)
+    # We draw a rounded rect for the background, then draw the text on:
+    img.set_fill("white")
+    img.set_stroke("#555555FF")
+    img.draw_rounded_rect(2, 2, textDimensions.width + 2 * padding - 4, textDimensions.height + 2 * padding - 4, padding)
+    img.set_fill("black")
+    img.set_stroke(None)
+    img.draw_text(text, padding, padding, font_size, max_width, max_height, font_family)
+    return img
+
 def show_text(text, x = 0, y = 0, font_size = 24):
     # type: (str | None, float, float, float) -> None
     """
@@ -1222,19 +2463,8 @@ def show_text(text, x = 0, y = 0, font_size = 24):
     # the old text is gone before the new text appears (avoids flickering):
     new_actor = None
     if text is not None:
-        # We first make an image just with the text on, which also tells us the size:
-        textOnlyImg = Image(800, 600)
-        textOnlyImg.set_fill("white")
-        textOnlyImg.set_stroke("black")
-        textDimensions = textOnlyImg.draw_text(text, 0, 0, font_size, 800, 600, "Inconsolata")
-        # Now we prepare an image of the right size:
-        croppedImg = Image(textDimensions.width + font_size, textDimensions.height + font_size)
-        # We draw a rounded rect for the background, then draw the text on:
-        croppedImg.set_fill(Color(0, 0, 0, 80))
-        croppedImg.set_stroke(None)
-        croppedImg.draw_rounded_rect(0, 0, croppedImg.get_width(), croppedImg.get_height())
-        croppedImg._draw_part_of_image(textOnlyImg, round(font_size / 2), round(font_size / 2), 0, 0, textDimensions.width, textDimensions.height)
-        new_actor = Actor(croppedImg, x, y)
+        new_actor = Actor(_shown_text_image(text, font_size), x, y)
+        new_actor._Actor__shared_image = True
     # Now remove the old actor, once the new one (if any) is already showing:
     if existing is not None:
         existing[2].remove()
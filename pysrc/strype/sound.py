@@ -1,4 +1,5 @@
 from strype_bridge import strype_sound_internal as _strype_sound_internal 
+import strype._asset_cache as _asset_cache
 import time as _time
 
 class Sound:
@@ -165,24 +166,7 @@ def load_sound(source):
     # If they mistakenly try to load a sound (e.g. a literal) just let it through:
     if isinstance(source, Sound):
         return source
-    import re
-    if source.startswith("http:") or source.startswith("https:") or source.startswith("data:")  or source.startswith(":") or (":" not in source and re.match(r'^[^./]+\.[^/]+/.+', source)):
-        buffer = _strype_sound_internal.loadAndWaitForAudioBuffer(source)
-    else:
-        # We load it from our virtual file system, either the current dir or /strype/graphics/
-        # To pass it on, it's probably faster to turn it into a data URL than e.g. read bytes
-        # and pass a long list of numbers which Pyodide has to convert item by array item to Javascript: 
-        import base64
-        import mimetypes
-
-        # If both fail, it will give an informative error (no such file):
-        try:
-            with open(source, "rb") as f:
-                encoded = base64.b64encode(f.read()).decode("ascii")
-        except:
-            with open("/sounds/" + source, "rb") as f:
-                encoded = base64.b64encode(f.read()).decode("ascii")
-        mime_type, _ = mimetypes.guess_type(source)
-        buffer = _strype_sound_internal.loadAndWaitForAudioBuffer(f"data:{mime_type};base64,{encoded}")
-
-    return Sound(buffer, -4242)
+    # Loaded sounds are cached (see _asset_cache), so loading the same file again doesn't need to decode it again.
+    # Each Sound gets its own copy, as they can be changed with set_samples, and are played and stopped separately:
+    buffer = _asset_cache.load("sound", source, "/sounds/", _strype_sound_internal.loadAndWaitForAudioBuffer, lambda contents, mime_type: _strype_sound_internal.loadAndWaitForAudioBufferBytes(contents), lambda snd: snd.numSamples * snd.numberOfChannels * 4)
+    return Sound(_strype_sound_internal.copy(buffer), -4242)
@@ -0,0 +1,391 @@
+# This script is a benchmark for developers.  It is NOT run live by Strype,
+# but instead run manually with a normal CPython, e.g.:
+#   python3 scripts/benchmarks/graphics_benchmark.py
+#   python3 scripts/benchmarks/graphics_benchmark.py --compare
+#   python3 scripts/benchmarks/graphics_benchmark.py --save-baseline
+# It runs representative strype.graphics workloads through python_runner against the headless
+# stand-in for strype_bridge (scripts/stubs/strype_headless.py), and reports for each one:
+#   - ops/sec of its hot loop (what an "op" is depends on the workload, see WORKLOADS)
+#   - bridge calls per op, counted with strype._bridge_instrumentation (each of which is a call
+#     from Python into Javascript in Strype, and many of which are messages to the main thread)
+#   - peak memory allocated by Python during the hot loop, measured with tracemalloc
+# As the bridge is implemented in Python here, the times include the headless bridge's own work,
+# so they are only useful for comparing changes to the Python wrapper layer (strype.graphics)
+# with each other on the same machine.  The bridge call counts are exact, and the same on any machine.
+#
+# With --compare, the results are compared with the stored baseline (graphics_benchmark_baseline.json)
+# and the script exits with status 1 if any workload made more bridge calls per op.  Only the bridge call
+# counts are checked, as the baseline may well come from a different machine (or Python version):
+# workloads which got slower, or used more memory, by more than --tolerance are listed for information.
+
+import argparse
+import json
+import os
+import sys
+import tracemalloc
+
+_here = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_here, "..", "stubs"))
+
+from strype_headless import HeadlessRunner  # noqa: E402
+
+BASELINE_FILE = os.path.join(_here, "graphics_benchmark_baseline.json")
+MEMORY_SLACK_KB = 64
+
+# Each workload is (name, ops, setup code, hot loop code).  Only the hot loop is timed,
+# and it should perform `ops` operations:
+WORKLOADS = [
+    (
+        "actors_move_turn",
+        50 * 100 * 2,
+        """
+actors = [Actor(Image(20, 20), -300 + i * 12, -200 + i * 8) for i in range(50)]
+""",
+        """
+for frame in range(100):
+    for a in actors:
+        a.move(2)
+        a.turn(3)
+""",
+    ),
+    (
+        "actors_move_turn_batched",
+        50 * 100 * 2,
+        """
+actors = [Actor(Image(20, 20), -300 + i * 12, -200 + i * 8) for i in range(50)]
+set_batching(True)
+""",
+        """
+for frame in range(100):
+    for a in actors:
+        a.move(2)
+        a.turn(3)
+    pace(1000)
+""",
+    ),
+    (
+        "actor_group_move_turn",
+        50 * 100 * 2,
+        """
+group = ActorGroup([Actor(Image(20, 20), -300 + i * 12, -200 + i * 8) for i in range(50)])
+""",
+        """
+for frame in range(100):
+    group.move_all(2)
+    group.turn_all(3)
+""",
+    ),
+    (
+        "actors_velocity_read",
+        50 * 100,
+        """
+actors = [Actor(Image(20, 20), -300 + i * 12, -200 + i * 8) for i in range(50)]
+for a in actors:
+    a.set_edge_mode("bounce")
+    a.set_velocity(60, 40)
+    a.set_angular_velocity(90)
+""",
+        """
+for frame in range(100):
+    for a in actors:
+        a.get_x()
+""",
+    ),
+    (
+        "actors_edge_check",
+        50 * 100,
+        """
+actors = [Actor(Image(20, 20), -300 + i * 12, -200 + i * 8) for i in range(50)]
+""",
+        """
+for frame in range(100):
+    for a in actors:
+        if a.is_at_edge():
+            a.turn(180)
+        a.move(5)
+""",
+    ),
+    (
+        "get_all_touching_tagged",
+        100 * 20,
+        """
+actors = [Actor(Image(30, 30), (i % 20) * 35 - 350, (i // 20) * 35 - 100, tag="a" if i % 2 else "b") for i in range(200)]
+""",
+        """
+for frame in range(20):
+    for a in actors[1::2]:
+        a.get_all_touching("b")
+""",
+    ),
+    (
+        # The same as get_all_touching_tagged, but in one call per frame:
+        "get_collisions_tagged",
+        100 * 20,
+        """
+actors = [Actor(Image(30, 30), (i % 20) * 35 - 350, (i // 20) * 35 - 100, tag="a" if i % 2 else "b") for i in range(200)]
+""",
+        """
+for frame in range(20):
+    get_collisions("a", "b")
+""",
+    ),
+    (
+        "get_actors_tagged",
+        1000,
+        """
+actors = [Actor(Image(10, 10), (i % 40) * 20 - 390, (i // 40) * 20 - 290, tag="enemy" if i % 50 == 0 else None) for i in range(1000)]
+""",
+        """
+for frame in range(1000):
+    get_actors("enemy")
+""",
+    ),
+    (
+        "get_set_pixel_sweep",
+        800 * 600 * 2 // 4,
+        """
+img = Image(800, 600)
+img.set_fill("skyblue")
+img.fill()
+""",
+        """
+# Every 4th row, so that the sweep doesn't take minutes with the headless bridge:
+for y in range(0, 600, 4):
+    for x in range(800):
+        c = img.get_pixel(x, y)
+        img.set_pixel(x, y, Color(c.blue, c.green, c.red, c.alpha))
+""",
+    ),
+    (
+        # The same swap as get_set_pixel_sweep, but over every row, using Image.pixels():
+        "pixels_buffer_sweep",
+        800 * 600 * 2,
+        """
+img = Image(800, 600)
+img.set_fill("skyblue")
+img.fill()
+""",
+        """
+with img.pixels() as pixels:
+    pixels[0::4], pixels[2::4] = pixels[2::4], pixels[0::4]
+""",
+    ),
+    (
+        "show_text_every_frame",
+        200,
+        "",
+        """
+for frame in range(200):
+    show_text("Score: " + str(frame // 2), 0, 250)
+""",
+    ),
+    (
+        "show_text_cycling",
+        200,
+        "",
+        """
+for frame in range(200):
+    show_text("Lives: " + str(frame % 4), 0, 250)
+""",
+    ),
+    (
+        "set_background_tiled",
+        10,
+        """
+tile = load_image("backgrounds/bricks3.png")
+""",
+        """
+for i in range(10):
+    set_background(tile)
+""",
+    ),
+    (
+        "load_image_library",
+        10 * 3,
+        """
+names = ["fish.png", "game-over.png", "golden-eagle.png", "hawk.png", "mouse.png", "panda.png", "rock.png",
+         "rocket.png", "shark.png", "shrimp.png"]
+""",
+        """
+for i in range(3):
+    for name in names:
+        load_image(name)
+""",
+    ),
+    (
+        "spawn_actors_same_image",
+        100,
+        """
+Actor("fish.png").remove()
+""",
+        """
+for i in range(100):
+    Actor("fish.png", -300 + i * 6, 0)
+""",
+    ),
+    (
+        "spawn_actors_batched",
+        100,
+        """
+Actor("fish.png").remove()
+set_batching(True)
+""",
+        """
+for i in range(100):
+    Actor("fish.png", -300 + i * 6, 0).say("Hi")
+pace(1000)
+""",
+    ),
+    (
+        "actors_animate_sprite_sheet",
+        50 * 100,
+        """
+sheet = SpriteSheet(Image(160, 40), 40, 40)
+actors = [Actor(sheet, -300 + i * 12, -200 + i * 8) for i in range(50)]
+""",
+        """
+for frame in range(100):
+    for a in actors:
+        a.animate([0, 1, 2, 3], 12)
+""",
+    ),
+]
+
+
+def make_program(setup, loop):
+    # The memory used by the hot loop is the peak during it, above what was in use when it started:
+    return (
+        "from strype.graphics import *\n"
+        "import time as _bench_time, tracemalloc as _bench_tracemalloc\n"
+        + setup
+        + "if _bench_tracemalloc.is_tracing():\n"
+        + "    _bench_tracemalloc.reset_peak()\n"
+        + "    _bench_memory_start = _bench_tracemalloc.get_traced_memory()[0]\n"
+        + "_bench_start = _bench_time.perf_counter()\n"
+        + loop
+        + "_bench_seconds = _bench_time.perf_counter() - _bench_start\n"
+        + "if _bench_tracemalloc.is_tracing():\n"
+        + "    _bench_memory_peak = _bench_tracemalloc.get_traced_memory()[1] - _bench_memory_start\n"
+    )
+
+
+def run_once(program, instrument=False, trace_memory=False):
+    """
+    Runs the program, returning its __main__ globals, and the bridge stats if instrument is true.
+    If trace_memory is true, memory is traced with tracemalloc during the run.
+    """
+    errors = []
+
+    def callback(event_type, data):
+        if event_type == "output":
+            errors.extend(p["text"] for p in data["parts"] if p["type"] == "traceback")
+
+    runner = HeadlessRunner(callback=callback, filename="graphics_benchmark_program.py")
+    bridge_stats = None
+    if instrument:
+        import strype._bridge_instrumentation as instrumentation
+        instrumentation.enable()
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        runner.run(program)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+        if instrument:
+            bridge_stats = instrumentation.get_stats()
+            instrumentation.disable()
+    if errors:
+        raise RuntimeError("Benchmark program failed:\n" + "".join(errors))
+    return runner.console.locals, bridge_stats
+
+
+def run_workload(ops, setup, loop, repeat):
+    program = make_program(setup, loop)
+    best = min(run_once(program)[0]["_bench_seconds"] for _ in range(repeat))
+    _, bridge_stats = run_once(program, instrument=True)
+    peak = run_once(program, trace_memory=True)[0]["_bench_memory_peak"]
+    # Only count the calls made by the hot loop, by subtracting those made by a run of just the setup:
+    _, setup_stats = run_once(make_program(setup, ""), instrument=True)
+
+    def total_calls(stats):
+        return sum(f["calls"] for f in stats["functions"].values())
+
+    return {
+        "ops_per_second": ops / best if best > 0 else float("inf"),
+        "bridge_calls_per_op": (total_calls(bridge_stats) - total_calls(setup_stats)) / ops,
+        "peak_memory_kb": peak / 1024,
+    }
+
+
+def compare(name, result, baseline, tolerance):
+    """
+    Returns (regressions, notes): a list of descriptions of how result has regressed from baseline in ways which
+    are the same on any machine (i.e. bridge calls), and a list of descriptions of changes which depend on the
+    machine (time and memory), for information only.  Both are empty if nothing changed beyond tolerance.
+    """
+    regressions = []
+    notes = []
+    if result["bridge_calls_per_op"] > baseline["bridge_calls_per_op"] + 1e-9:
+        regressions.append(f"{name}: bridge calls/op rose from {baseline['bridge_calls_per_op']:.3f} to {result['bridge_calls_per_op']:.3f}")
+    if result["ops_per_second"] < baseline["ops_per_second"] * (1 - tolerance):
+        notes.append(f"{name}: ops/sec fell from {baseline['ops_per_second']:.1f} to {result['ops_per_second']:.1f}")
+    # With some slack for workloads which allocate next to nothing, where tracemalloc's own noise would dominate:
+    if result["peak_memory_kb"] > baseline["peak_memory_kb"] * (1 + tolerance) + MEMORY_SLACK_KB:
+        notes.append(f"{name}: peak memory rose from {baseline['peak_memory_kb']:.0f}KB to {result['peak_memory_kb']:.0f}KB")
+    return regressions, notes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark strype.graphics against the headless bridge")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs to take the best time from")
+    parser.add_argument("--workload", action="append", help="Only run the named workload (can be repeated)")
+    parser.add_argument("--compare", action="store_true", help="Compare with the baseline, and fail if any workload made more bridge calls")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Fractional slowdown or memory increase to report with --compare")
+    parser.add_argument("--save-baseline", action="store_true", help="Save the results as the new baseline")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare or args.save_baseline:
+        try:
+            with open(BASELINE_FILE) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            if args.compare:
+                parser.error("No baseline to compare with; run with --save-baseline first")
+
+    results = {}
+    problems = []
+    notes = []
+    print(f"{'workload':<26}{'ops/sec':>12}{'bridge calls/op':>17}{'peak memory (KB)':>18}{'vs baseline':>13}")
+    for name, ops, setup, loop in WORKLOADS:
+        if args.workload and name not in args.workload:
+            continue
+        result = results[name] = run_workload(ops, setup, loop, args.repeat)
+        relative = ""
+        if args.compare and name in baseline:
+            relative = f"{result['ops_per_second'] / baseline[name]['ops_per_second']:.2f}x"
+            workload_problems, workload_notes = compare(name, result, baseline[name], args.tolerance)
+            problems += workload_problems
+            notes += workload_notes
+        print(f"{name:<26}{result['ops_per_second']:>12.1f}{result['bridge_calls_per_op']:>17.3f}{result['peak_memory_kb']:>18.0f}{relative:>13}")
+
+    if args.save_baseline:
+        baseline.update(results)
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print("Saved baseline to " + BASELINE_FILE)
+    if notes:
+        print("\nSlower or bigger than the baseline (for information only, as this depends on the machine):")
+        for note in notes:
+            print("  " + note)
+    if problems:
+        print("\nRegressions compared to the baseline:")
+        for problem in problems:
+            print("  " + problem)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
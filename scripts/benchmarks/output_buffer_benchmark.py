@@ -0,0 +1,59 @@
+# This script is a benchmark for developers.  It is NOT run live by Strype,
+# but instead run manually with a normal CPython, e.g.:
+#   python3 scripts/benchmarks/output_buffer_benchmark.py
+# It runs a print-heavy program through python_runner and counts how many
+# output callbacks (each of which is a worker-to-main-thread message in Strype)
+# are made per 10,000 prints, with and without batching in the OutputBuffer.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "pysrc"))
+
+from python_runner import Runner  # noqa: E402
+
+PRINTS = 10000
+
+PROGRAM = f"""
+for i in range({PRINTS}):
+    print(i)
+"""
+
+
+def run_once(output_config):
+    counts = {"callbacks": 0, "chars": 0}
+
+    def callback(event_type, data):
+        if event_type == "output":
+            counts["callbacks"] += 1
+            counts["chars"] += sum(len(p["text"]) for p in data["parts"])
+
+    runner = Runner(callback=callback, output_config=output_config)
+    start = time.perf_counter()
+    runner.run(PROGRAM)
+    counts["seconds"] = time.perf_counter() - start
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count output callbacks per 10,000 prints")
+    parser.add_argument("--repeat", type=int, default=3, help="Number of runs to take the best time from")
+    args = parser.parse_args()
+
+    configs = [
+        ("unbatched", {"batching": False}),
+        ("batched (defaults)", {}),
+        ("batched (flush_time=1s)", {"flush_time": 1}),
+    ]
+    print(f"{'mode':<26}{'callbacks':>10}{'per 10k prints':>16}{'best time (s)':>15}")
+    for name, config in configs:
+        results = [run_once(config) for _ in range(args.repeat)]
+        best = min(results, key=lambda r: r["seconds"])
+        per_10k = best["callbacks"] * 10000 / PRINTS
+        print(f"{name:<26}{best['callbacks']:>10}{per_10k:>16.1f}{best['seconds']:>15.4f}")
+
+
+if __name__ == "__main__":
+    main()
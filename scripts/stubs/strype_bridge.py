@@ -0,0 +1,6 @@
+# Headless stand-in for the strype_bridge Javascript module which Strype registers in Pyodide
+# (see src/stryperuntime/pyodide_bridge.js and strype_headless.py).
+
+import strype_graphics_input_internal  # noqa: F401
+import strype_graphics_internal  # noqa: F401
+import strype_sound_internal  # noqa: F401
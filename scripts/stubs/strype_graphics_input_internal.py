@@ -0,0 +1,87 @@
+# Headless version of src/stryperuntime/strype_graphics_input_internal.ts (see strype_headless.py).
+# Input comes from the press_key, click etc. functions in strype_headless, not from a user.
+
+import strype_headless as _headless
+
+
+def getAndResetClickedItems():
+    state = _headless.world.input
+    items, state.clicked_items = state.clicked_items, []
+    return _headless.JsArray(items)
+
+
+def getAndResetClickDetails():
+    state = _headless.world.input
+    details, state.click_details = state.click_details, None
+    return None if details is None else _headless.JsArray(details)
+
+
+def getMouseDetails():
+    state = _headless.world.input
+    return _headless.JsArray([state.mouse_x, state.mouse_y, _headless.JsArray(state.buttons)])
+
+
+def getPressedKeys():
+    return _headless.JsMap(_headless.world.input.pressed_keys)
+
+
+def waitForNextKey():
+    # There is no user to wait for, so if no key has been pressed this gives None, like undefined in the browser:
+    queue = _headless.world.input.key_queue
+    return queue.popleft() if queue else None
+
+
+def checkCollision(id_a, id_b):
+    return _headless.world.sprites.check_collision(id_a, id_b)
+
+
+def getAllTouchingAssociated(sprite_id, tag=None):
+    return _headless.JsArray(_headless.world.sprites.get_all_overlapping(sprite_id, tag))
+
+
+def getAllAt(x, y, tag=None):
+    return _headless.JsArray(_headless.world.sprites.get_all_at(x, y, tag))
+
+
+def getCollisionPairs(tag_a=None, tag_b=None):
+    return _headless.JsArray(_headless.world.sprites.get_collision_pairs(tag_a, tag_b))
+
+
+def getAllActors():
+    return _headless.JsArray(_headless.world.sprites.get_all_actors())
+
+
+def getAllNearbyAssociated(sprite_id, radius, tag=None):
+    return _headless.JsArray(_headless.world.sprites.get_all_nearby(sprite_id, radius, tag))
+
+
+def setCollidable(sprite_id, collidable):
+    sprite = _headless.world.sprites.get(sprite_id)
+    if sprite is not None:
+        sprite.collidable = bool(collidable)
+
+
+def setPreciseCollision(sprite_id, precise):
+    sprite = _headless.world.sprites.get(sprite_id)
+    if sprite is not None:
+        sprite.precise = bool(precise)
+
+
+# Strype builtins related content:
+
+def clearConsole():
+    _headless.world.console_clears += 1
+
+
+def getCurrentCloudName():
+    return None
+
+
+def getBridgeMessageCounts():
+    # Nothing is sent to a main thread, so there are never any messages:
+    return _headless.JsArray([0, 0, 0])
+
+
+def getAssetFileURL(path):
+    # The assets are read from src/assetsFilesystem by HeadlessRunner.open instead:
+    return None
@@ -0,0 +1,244 @@
+# Headless version of src/stryperuntime/strype_graphics_internal.ts (see strype_headless.py).
+# RemoteImage and RemoteCanvas are both represented by strype_headless_canvas.Canvas.
+
+import time
+import urllib.request
+
+import strype_headless as _headless
+from strype_headless_canvas import Canvas, decode_data_url, parse_color
+
+
+def loadAndWaitForImage(filename):
+    if filename.startswith("data:"):
+        return Canvas.from_bytes(decode_data_url(filename))
+    if filename.startswith("http:") or filename.startswith("https:") or filename.startswith("//"):
+        with urllib.request.urlopen(("https:" + filename) if filename.startswith("//") else filename) as response:
+            return Canvas.from_bytes(response.read())
+    # Library assets (":library:filename") need the browser to find them:
+    raise ValueError("Unable to load image in the headless backend: " + filename)
+
+
+def loadAndWaitForImageBytes(contents, mime_type):
+    return Canvas.from_bytes(bytes(contents))
+
+
+def setBackground(img):
+    _headless.world.sprites.set_background(img)
+
+
+def addSprite(image, collidable, x=0, y=0, tag=None):
+    return _headless.world.sprites.add_sprite(image, collidable, x, y, tag)
+
+
+def updateImage(sprite_id, image):
+    sprite = _headless.world.sprites.get(sprite_id)
+    if sprite is not None:
+        sprite.img = image
+
+
+def imageExists(image):
+    return _headless.world.sprites.has_sprite(image)
+
+
+def setSpriteFrames(sprite_id, width, height, columns, sequence, fps, start_time):
+    sprite = _headless.world.sprites.get(sprite_id)
+    if sprite is not None:
+        sprite.frames = None if sequence is None else (width, height, columns, list(sequence), fps, start_time)
+
+
+def setSpriteMotion(sprite_id, x, y, rotation, vx, vy, angular_velocity, edge, start_time):
+    sprite = _headless.world.sprites.get(sprite_id)
+    if sprite is not None:
+        sprite.motion = None if edge is None else (x, y, rotation, vx, vy, angular_velocity, edge, start_time)
+        sprite.x, sprite.y = _headless._clamp_location(x, y)
+        sprite.rotation = rotation
+        if sprite.motion is not None:
+            sprite.advance_motion(time.time() * 1000)
+
+
+def getImageSize(img):
+    sprite = _headless.world.sprites.get(img)
+    if sprite is None:
+        return None
+    _, _, width, height = sprite.frame_rect()
+    return _headless.JsObject(width=width, height=height)
+
+
+def setImageLocation(img, x, y):
+    sprite = _headless.world.sprites.get(img)
+    if sprite is not None:
+        sprite.x, sprite.y = _headless._clamp_location(x, y)
+
+
+def setImageRotation(img, r):
+    sprite = _headless.world.sprites.get(img)
+    if sprite is not None:
+        sprite.rotation = r
+
+
+def setImageScale(img, s):
+    sprite = _headless.world.sprites.get(img)
+    if sprite is not None:
+        sprite.scale = s
+
+
+def setSpriteTransforms(transforms):
+    for sprite_id, x, y, rotation, *image in transforms:
+        if x is not None and y is not None:
+            setImageLocation(sprite_id, x, y)
+        if rotation is not None:
+            setImageRotation(sprite_id, rotation)
+        if image and image[0] is not None:
+            updateImage(sprite_id, image[0])
+
+
+def reserveSpriteIds(count):
+    sprites = _headless.world.sprites
+    first = sprites.next_sprite_id
+    sprites.next_sprite_id += count
+    return first
+
+
+def applySpriteUpdates(adds, transforms):
+    for sprite_id, image, collidable, x, y, tag in adds:
+        _headless.world.sprites.add_sprite(image, collidable, x, y, tag, force_id=sprite_id)
+    setSpriteTransforms(transforms)
+
+
+def getImageLocation(img):
+    _headless.world.sprites.check_for_scheduled_removals()
+    sprite = _headless.world.sprites.get(img)
+    return None if sprite is None else _headless.JsObject(x=sprite.x, y=sprite.y)
+
+
+def getImageRotation(img):
+    _headless.world.sprites.check_for_scheduled_removals()
+    sprite = _headless.world.sprites.get(img)
+    return None if sprite is None else sprite.rotation
+
+
+def getImageScale(img):
+    sprite = _headless.world.sprites.get(img)
+    return None if sprite is None else sprite.scale
+
+
+def removeImage(img):
+    _headless.world.sprites.remove_sprite(img, None)
+
+
+def removeImageAfter(img, secs):
+    _headless.world.sprites.remove_sprite(img, time.time() + secs)
+
+
+def makeImageEditableForSprite(sprite_id):
+    # Every headless image is already editable:
+    sprite = _headless.world.sprites.get(sprite_id)
+    return None if sprite is None else sprite.img
+
+
+def makeCanvasOfSize(width, height):
+    return Canvas(width, height)
+
+
+def htmlImageToCanvas(image_element):
+    return image_element.copy()
+
+
+def getCanvasDimensions(img):
+    return _headless.JsArray([img.width, img.height])
+
+
+def canvas_fillWhole(img):
+    img.fill_whole()
+
+
+def canvas_clearRect(img, x, y, width, height):
+    img.clear_rect(x, y, width, height)
+
+
+def canvas_setFill(img, color):
+    img.fill = parse_color(color)
+
+
+def canvas_setStroke(img, color):
+    img.stroke = parse_color(color)
+
+
+def canvas_getPixel(img, x, y):
+    return _headless.JsArray(img.get_pixel(x, y))
+
+
+def canvas_setPixel(img, x, y, r, g, b, a):
+    # Like the Uint8ClampedArray in the browser, values are rounded and clamped to 0-255:
+    img.set_pixel(x, y, [min(255, max(0, round(v))) for v in (r, g, b, a)])
+
+
+def canvas_getAllPixels(img):
+    return _headless.JsTypedArray(img.pixels)
+
+
+def canvas_setAllPixelsRGBA(img, pixels):
+    pixels = bytes(pixels)
+    img.pixels[:len(pixels)] = pixels
+
+
+def canvas_setAllPixelsFromBuffer(img, pixels):
+    img.pixels[:] = bytes(pixels)
+
+
+def canvas_drawImagePart(dest, src, dx, dy, sx, sy, sw, sh, scale):
+    dest.draw_image_part(src, dx, dy, sx, sy, sw, sh, scale)
+
+
+def canvas_fillPattern(dest, src, offset_x, offset_y):
+    dest.fill_pattern(src, offset_x, offset_y)
+
+
+def canvas_line(img, x, y, x2, y2):
+    img.line(x, y, x2, y2)
+
+
+def canvas_roundedRect(img, x, y, width, height, corner_size):
+    img.rounded_rect(x, y, width, height, corner_size)
+
+
+def canvas_arc(img, x, y, width, height, angle_start_deg, angle_delta_deg):
+    img.arc(x, y, width, height, angle_start_deg, angle_delta_deg)
+
+
+def polygon_xy_pairs(img, xy_pairs):
+    img.polygon(xy_pairs)
+
+
+def canvas_applyFilter(img, filter_name, params):
+    img.apply_filter(filter_name, list(params))
+
+
+def canvas_loadFont(provider, font_name):
+    # There are no fonts to load, and measuring text doesn't depend on the font:
+    return True
+
+
+def canvas_drawText(img, text, x, y, font_size, max_width, max_height, font_name):
+    # The text is measured, and recorded on the canvas, but not drawn:
+    width_height = img.measure_text(text, font_size, max_width, max_height)
+    img.texts.append((text, x, y, font_size))
+    return _headless.JsArray(width_height)
+
+
+def canvas_drawMeasuredText(img, text, x, y, font_size, max_width, max_height, font_name):
+    img.texts.append((text, x, y, font_size))
+
+
+def measureText(text, font_size, max_width, max_height, font_name):
+    return _headless.JsArray(Canvas.measure_text(text, font_size, max_width, max_height))
+
+
+def canvas_downloadPNG(src, filename_stem):
+    _headless.world.downloads.append((filename_stem + ".png", src.to_png()))
+
+
+def cloneImage(img, scale, rotate, flip):
+    if scale == 1 and rotate == 0 and flip == "none":
+        return img.copy()
+    return img.transformed(scale, rotate, flip)
@@ -0,0 +1,501 @@
+# A headless stand-in for the strype_bridge Javascript module, so that Strype programs (and the strype
+# modules themselves) can be run, tested and benchmarked with a normal CPython, without a browser.
+# It is NOT used live by Strype.  Like the benchmarks, it is run manually, e.g.:
+#   python3 scripts/stubs/strype_headless.py my_program.py
+# or from Python:
+#   sys.path.insert(0, "scripts/stubs")
+#   from strype_headless import HeadlessRunner, press_key, world
+#   HeadlessRunner(inputs=["Alice"]).run(source_code)
+#
+# The strype_bridge module (scripts/stubs/strype_bridge.py) re-exports the strype_*_internal modules in
+# this directory, which implement the same functions as the Typescript files of the same name
+# in src/stryperuntime, on top of the state in this module:
+#   - the sprites in the world (a port of SpriteManager in image_and_collisions.ts), with collisions between
+#     their rotated and scaled bounding boxes, like detect-collisions in the browser
+#   - images and canvases, as pure-Python RGBA pixel buffers (see strype_headless_canvas.py)
+#   - sounds, as arrays of float samples
+#   - the keyboard and mouse, which are driven by calling press_key, click etc.
+#   - downloads and played sounds, which are recorded for inspection rather than delivered anywhere
+# The turtle bridge (strype_turtle_internal) is not provided.
+
+import array
+import builtins
+import collections
+import contextlib
+import io
+import math
+import os
+import sys
+import time
+import types
+
+_here = os.path.dirname(os.path.abspath(__file__))
+_root = os.path.join(_here, "..", "..")
+sys.path.insert(0, os.path.join(_root, "pysrc"))
+if _here not in sys.path:
+    sys.path.insert(0, _here)
+
+from python_runner import PatchedSleepRunner, PatchedStdinRunner  # noqa: E402
+from strype_headless_canvas import Canvas  # noqa: E402
+
+WORLD_WIDTH = 800
+WORLD_HEIGHT = 600
+
+# The directories of the Strype asset filesystem, as mounted in Pyodide, and where they are in this repository:
+ASSET_DIRS = {name: os.path.join(_root, "src", "assetsFilesystem", name) for name in ("books", "data", "images", "sounds")}
+
+# The real sleep, before the runner replaces it:
+_real_sleep = time.sleep
+# The real open, which HeadlessRunner.open wraps while a program runs:
+_real_open = io.open
+
+
+# Pyodide returns Javascript objects and arrays to Python as JsProxy objects.  These have the same
+# interface as far as the strype modules are concerned (attribute or index access, and to_py()):
+
+class JsObject(types.SimpleNamespace):
+    def to_py(self):
+        return dict(vars(self))
+
+
+class JsArray(list):
+    def to_py(self):
+        return list(self)
+
+
+class JsMap(dict):
+    def to_py(self):
+        return dict(self)
+
+
+class JsTypedArray(bytearray):
+    def to_py(self):
+        return memoryview(self)
+
+    @property
+    def byteLength(self):
+        return len(self)
+
+    def assign_to(self, to):
+        # Like Pyodide, the sizes must match:
+        if len(memoryview(to).cast("B")) != len(self):
+            raise ValueError("cannot assign to TypedArray of a different size")
+        memoryview(to).cast("B")[:] = self
+
+
+class Sprite:
+    __slots__ = ("id", "img", "x", "y", "rotation", "scale", "collidable", "remove_at_time", "tag", "precise", "frames", "motion")
+
+    def __init__(self, sprite_id, img, x, y, collidable, tag=None):
+        self.id = sprite_id
+        self.img = img
+        self.x = x
+        self.y = y
+        self.rotation = 0
+        self.scale = 1.0
+        self.collidable = collidable
+        self.remove_at_time = None
+        self.tag = tag
+        self.precise = False
+        # (width, height, columns, sequence, fps, start_time) if the image is a sprite sheet, as SpriteFrames in worker_bridge_type.ts:
+        self.frames = None
+        # (start_x, start_y, start_rotation, vx, vy, angular_velocity, edge, start_time) if moving by itself, as SpriteMotion in worker_bridge_type.ts:
+        self.motion = None
+
+    def advance_motion(self, now):
+        # Moves to where the motion says we are at the given time (in milliseconds), as motionAt in image_and_collisions.ts:
+        start_x, start_y, start_rotation, vx, vy, angular_velocity, edge, start_time = self.motion
+        seconds = max(0, now - start_time) / 1000
+        self.x, self.y = _clamp_location(_position_along(start_x, vx, seconds, -WORLD_WIDTH / 2 + 1, WORLD_WIDTH / 2, edge),
+                                         _position_along(start_y, vy, seconds, -WORLD_HEIGHT / 2 + 1, WORLD_HEIGHT / 2, edge))
+        self.rotation = start_rotation + angular_velocity * seconds
+
+    def frame_rect(self):
+        # The (x, y, width, height) of the part of the image which is shown, as getFrameRect in image_and_collisions.ts:
+        if self.frames is None:
+            return 0, 0, self.img.width, self.img.height
+        width, height, columns, sequence, fps, start_time = self.frames
+        index = 0 if fps <= 0 or len(sequence) <= 1 else int(max(0, time.time() * 1000 - start_time) * fps / 1000) % len(sequence)
+        frame = sequence[index]
+        return (frame % columns) * width, (frame // columns) * height, width, height
+
+    def corners(self):
+        # The corners of the rotated and scaled image, in world coordinates:
+        _, _, width, height = self.frame_rect()
+        half_w = width * self.scale / 2
+        half_h = height * self.scale / 2
+        radians = math.radians(self.rotation)
+        cos, sin = math.cos(radians), math.sin(radians)
+        return [
+            (self.x + dx * cos - dy * sin, self.y + dx * sin + dy * cos)
+            for dx, dy in ((-half_w, -half_h), (half_w, -half_h), (half_w, half_h), (-half_w, half_h))
+        ]
+
+    def contains(self, x, y):
+        radians = math.radians(self.rotation)
+        cos, sin = math.cos(radians), math.sin(radians)
+        dx, dy = x - self.x, y - self.y
+        local_x, local_y = dx * cos + dy * sin, -dx * sin + dy * cos
+        _, _, width, height = self.frame_rect()
+        return abs(local_x) <= width * self.scale / 2 and abs(local_y) <= height * self.scale / 2
+
+    def solid_at(self, x, y):
+        # Whether the given world point is on the sprite, and (if precise collisions are on) on a solid pixel of it.
+        # Like collision_masks.ts, a pixel is solid if its alpha is at least 128:
+        if not self.contains(x, y):
+            return False
+        if not self.precise:
+            return True
+        radians = math.radians(self.rotation)
+        cos, sin = math.cos(radians), math.sin(radians)
+        dx, dy = x - self.x, y - self.y
+        local_x, local_y = (dx * cos + dy * sin) / self.scale, (-dx * sin + dy * cos) / self.scale
+        left, top, width, height = self.frame_rect()
+        px, py = math.floor(local_x + width / 2), math.floor(height / 2 - local_y)
+        return 0 <= px < width and 0 <= py < height and left + px < self.img.width and top + py < self.img.height and self.img.get_pixel(left + px, top + py)[3] >= 128
+
+
+def _position_along(start, velocity, seconds, low, high, edge):
+    # As positionAlong in image_and_collisions.ts:
+    position = start + velocity * seconds
+    span = high - low
+    if edge == "wrap":
+        return low + (position - low) % span
+    if edge == "bounce":
+        offset = (position - low) % (2 * span)
+        return low + offset if offset <= span else low + 2 * span - offset
+    return max(low, min(position, high))
+
+
+def _boxes_overlap(corners_a, corners_b):
+    # Separating axis test for two convex quadrilaterals:
+    for corners in (corners_a, corners_b):
+        for (ax, ay), (bx, by) in zip(corners, corners[1:] + corners[:1]):
+            axis_x, axis_y = ay - by, bx - ax
+            projected_a = [x * axis_x + y * axis_y for x, y in corners_a]
+            projected_b = [x * axis_x + y * axis_y for x, y in corners_b]
+            if max(projected_a) < min(projected_b) or max(projected_b) < min(projected_a):
+                return False
+    return True
+
+
+def _overlap_precisely(a, b):
+    # Given two sprites whose boxes overlap, checks if they really touch, if either uses precise collisions.
+    # Rather than masks, this just checks each pixel in the overlap of their bounding boxes:
+    if not a.precise and not b.precise:
+        return True
+    a_corners, b_corners = a.corners(), b.corners()
+    left = math.floor(max(min(x for x, _ in a_corners), min(x for x, _ in b_corners)))
+    right = math.ceil(min(max(x for x, _ in a_corners), max(x for x, _ in b_corners)))
+    bottom = math.floor(max(min(y for _, y in a_corners), min(y for _, y in b_corners)))
+    top = math.ceil(min(max(y for _, y in a_corners), max(y for _, y in b_corners)))
+    return any(
+        a.solid_at(x + 0.5, y + 0.5) and b.solid_at(x + 0.5, y + 0.5)
+        for y in range(bottom, top) for x in range(left, right)
+    )
+
+
+def _clamp_location(x, y):
+    return (max(-WORLD_WIDTH / 2 + 1, min(x, WORLD_WIDTH / 2)),
+            max(-WORLD_HEIGHT / 2 + 1, min(y, WORLD_HEIGHT / 2)))
+
+
+class SpriteManager:
+    """
+    The sprites in the world, as in the SpriteManager of image_and_collisions.ts.
+    Id 0 is always the background.
+    """
+
+    def __init__(self):
+        background = Canvas(WORLD_WIDTH, WORLD_HEIGHT)
+        background.fill = (255, 255, 255, 255)
+        background.fill_whole()
+        # Since we go from -399 to 400, -299 to 300, the actual centre is 0.5, 0.5:
+        self.sprites = {0: Sprite(0, background, 0.5, 0.5, False)}
+        self.next_sprite_id = 1
+
+    def check_for_scheduled_removals(self):
+        now = time.time()
+        for sprite in [s for s in self.sprites.values() if s.remove_at_time is not None and s.remove_at_time <= now]:
+            del self.sprites[sprite.id]
+        # Like catchUpWithTime in Javascript, this also moves the sprites which are moving by themselves:
+        for sprite in self.sprites.values():
+            if sprite.motion is not None:
+                sprite.advance_motion(now * 1000)
+
+    def get(self, sprite_id):
+        return self.sprites.get(sprite_id)
+
+    def set_background(self, img):
+        self.sprites[0].img = img
+
+    def add_sprite(self, img, collidable, x=0, y=0, tag=None, force_id=None):
+        if force_id is None:
+            sprite_id = self.next_sprite_id
+            self.next_sprite_id += 1
+        else:
+            sprite_id = force_id
+        x, y = _clamp_location(x, y)
+        self.sprites[sprite_id] = Sprite(sprite_id, img, x, y, collidable, tag)
+        return sprite_id
+
+    def has_sprite(self, sprite_id):
+        self.check_for_scheduled_removals()
+        return sprite_id in self.sprites
+
+    def remove_sprite(self, sprite_id, remove_at_time):
+        if sprite_id <= 0 or sprite_id not in self.sprites:
+            return
+        if remove_at_time is not None and remove_at_time > time.time():
+            self.sprites[sprite_id].remove_at_time = remove_at_time
+        else:
+            del self.sprites[sprite_id]
+
+    def collidable_sprites(self):
+        self.check_for_scheduled_removals()
+        return [s for s in self.sprites.values() if s.collidable]
+
+    def check_collision(self, id_a, id_b):
+        self.check_for_scheduled_removals()
+        a, b = self.sprites.get(id_a), self.sprites.get(id_b)
+        return bool(a and b and a.collidable and b.collidable and _boxes_overlap(a.corners(), b.corners()) and _overlap_precisely(a, b))
+
+    def get_all_overlapping(self, sprite_id, tag=None):
+        self.check_for_scheduled_removals()
+        us = self.sprites.get(sprite_id)
+        if us is None or not us.collidable:
+            return []
+        corners = us.corners()
+        return [
+            s.id for s in self.collidable_sprites()
+            if s is not us and (tag is None or s.tag == tag) and _boxes_overlap(corners, s.corners()) and _overlap_precisely(us, s)
+        ]
+
+    def get_all_at(self, x, y, tag=None):
+        return [s.id for s in self.collidable_sprites() if (tag is None or s.tag == tag) and s.contains(x, y)]
+
+    def get_collision_pairs(self, tag_a=None, tag_b=None):
+        def matches(sprite, tag):
+            return tag is None or sprite.tag == tag
+
+        pairs = []
+        collidable = self.collidable_sprites()
+        for a in collidable:
+            if not matches(a, tag_a):
+                continue
+            corners = a.corners()
+            for b in collidable:
+                # As in Javascript, a pair which matches both ways round is only taken from the lower id:
+                if (b is not a and matches(b, tag_b) and not (b.id < a.id and matches(b, tag_a) and matches(a, tag_b))
+                        and _boxes_overlap(corners, b.corners()) and _overlap_precisely(a, b)):
+                    pairs += [a.id, b.id]
+        return pairs
+
+    def get_all_actors(self):
+        self.check_for_scheduled_removals()
+        return list(self.sprites)
+
+    def get_all_nearby(self, sprite_id, radius, tag=None):
+        self.check_for_scheduled_removals()
+        us = self.sprites.get(sprite_id)
+        if us is None:
+            return []
+        return [
+            s.id for s in self.collidable_sprites()
+            if s is not us and (tag is None or s.tag == tag) and (s.x - us.x) ** 2 + (s.y - us.y) ** 2 <= radius * radius
+        ]
+
+
+class InputState:
+    """
+    The keyboard and mouse, as the main thread would report them to the worker.
+    """
+
+    def __init__(self):
+        # Key name (as in Strype, e.g. "a", "left", "space") to whether it is held down:
+        self.pressed_keys = {}
+        # Keys typed but not yet returned by get_key/waitForNextKey:
+        self.key_queue = collections.deque()
+        self.mouse_x = 0
+        self.mouse_y = 0
+        self.buttons = [False, False, False]
+        # [x, y, button, click count] of the last click, if not yet consumed:
+        self.click_details = None
+        self.clicked_items = []
+
+
+class World:
+    def __init__(self):
+        self.sprites = SpriteManager()
+        self.input = InputState()
+        # (filename, bytes) of everything the program downloaded, e.g. with Image.download():
+        self.downloads = []
+        # The sound objects the program played, in order:
+        self.sounds_played = []
+        self.console_clears = 0
+
+
+world = World()
+
+
+def reset_world(keep_input=False):
+    """
+    Clears the world, the recordings, and the state kept by strype.graphics between runs.
+    The input state is also cleared, unless keep_input is true.
+    """
+    global world
+    input_state = world.input
+    world = World()
+    if keep_input:
+        world.input = input_state
+    graphics = sys.modules.get("strype.graphics")
+    if graphics is not None:
+        graphics._actorsInWorld.clear()
+        graphics._actorsByTag.clear()
+        graphics._tagIds.clear()
+        graphics._shown_text.clear()
+        graphics._bk_image = None
+        graphics._cached_pressed_keys = {}
+        graphics._last_pressed_keys_fetch = 0
+        graphics._batching = False
+        graphics._pending_transforms.clear()
+        graphics._shown_text_image.cache_clear()
+        graphics._speech_bubble_image.cache_clear()
+        graphics._measure_text.cache_clear()
+        graphics._load_font.cache_clear()
+    asset_cache = sys.modules.get("strype._asset_cache")
+    if asset_cache is not None:
+        asset_cache.clear()
+
+
+def _key_name(key):
+    key = key.lower()
+    return "space" if key == " " else key
+
+
+def press_key(key):
+    """
+    Holds down the given key (e.g. "a", "left", "space"), and queues it for get_key().
+    """
+    world.input.pressed_keys[_key_name(key)] = True
+    world.input.key_queue.append(_key_name(key))
+
+
+def release_key(key):
+    world.input.pressed_keys[_key_name(key)] = False
+
+
+def move_mouse(x, y):
+    world.input.mouse_x = x
+    world.input.mouse_y = y
+
+
+def click(x, y, button=0, click_count=1):
+    """
+    Clicks the mouse at the given world coordinates, recording which sprites were clicked on.
+    """
+    move_mouse(x, y)
+    world.input.click_details = [x, y, button, click_count]
+    world.input.clicked_items = [
+        s.id for s in world.sprites.sprites.values() if s.id != 0 and s.contains(x, y)
+    ]
+
+
+class Sound:
+    """
+    Stands in for RemoteSound: the samples of each channel as floats between -1 and 1.
+    """
+
+    def __init__(self, channels, sample_rate):
+        self.channels = [array.array("f", c) for c in channels]
+        self.sampleRate = sample_rate
+
+    @property
+    def numberOfChannels(self):
+        return len(self.channels)
+
+    @property
+    def numSamples(self):
+        return len(self.channels[0])
+
+
+class HeadlessRunner(PatchedStdinRunner, PatchedSleepRunner):
+    """
+    Runs Strype programs against the headless world.  Output is printed to the real stdout,
+    input() returns each of `inputs` in turn (then raises EOFError), and time.sleep() returns
+    immediately unless `realtime` is true.  Paths in the Strype asset filesystem
+    (e.g. "/images/cat-test.jpg") are read from src/assetsFilesystem.
+    """
+
+    def __init__(self, *, inputs=(), realtime=False, callback=None, **kwargs):
+        self.inputs = collections.deque(inputs)
+        self.realtime = realtime
+        super().__init__(callback=callback or self.default_callback, **kwargs)
+
+    def default_callback(self, event_type, data):
+        if event_type == "output":
+            for part in data["parts"]:
+                if part["type"] != "input":
+                    sys.__stdout__.write(part["text"])
+            sys.__stdout__.flush()
+        elif event_type == "input":
+            if not self.inputs:
+                raise EOFError("No more input for the headless runner")
+            return self.inputs.popleft()
+        elif event_type == "sleep":
+            if self.realtime:
+                _real_sleep(data["seconds"])
+
+    def open(self, file, *args, **kwargs):
+        if isinstance(file, str):
+            parts = file.lstrip("/").split("/", 1)
+            if file.startswith("/") and len(parts) == 2 and parts[0] in ASSET_DIRS:
+                file = os.path.join(ASSET_DIRS[parts[0]], parts[1])
+        return _real_open(file, *args, **kwargs)
+
+    @contextlib.contextmanager
+    def _execute_context(self):
+        # The asset filesystem only exists in Pyodide, so open() (and io.open, which pathlib uses)
+        # is replaced with self.open while the program runs:
+        builtins.open = io.open = self.open
+        try:
+            with super()._execute_context():
+                yield
+        finally:
+            builtins.open = io.open = _real_open
+
+    def post_run(self):
+        # As in StrypePyodideRunner:
+        graphics = sys.modules.get("strype.graphics")
+        if graphics is not None:
+            graphics._flush_sprite_updates()
+        super().post_run()
+
+    def reset(self):
+        super().reset()
+        # Keys pressed and clicks made before the run are kept for the program to see:
+        reset_world(keep_input=True)
+        # As in StrypePyodideRunner: from strype.builtins import *
+        import importlib
+        strype_builtins = importlib.import_module("strype.builtins")
+        target = self.console.locals
+        for name in getattr(strype_builtins, "__all__", dir(strype_builtins)):
+            if not name.startswith("_"):
+                target[name] = getattr(strype_builtins, name)
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Runs a Strype program without a browser")
+    parser.add_argument("program", help="the Python file to run")
+    parser.add_argument("--input", action="append", default=[], help="a line of input (can be repeated)")
+    parser.add_argument("--realtime", action="store_true", help="really sleep in time.sleep() and pace()")
+    args = parser.parse_args()
+    with open(args.program) as f:
+        source_code = f.read()
+    runner = HeadlessRunner(inputs=args.input, realtime=args.realtime, filename=args.program)
+    runner.run(source_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,513 @@
+# Pure-Python canvases for the headless stand-in for strype_bridge (see strype_headless.py).
+# A Canvas plays the part of both RemoteImage and RemoteCanvas: its pixels are kept in a bytearray
+# of RGBA values, four bytes per pixel, row by row from the top-left, which is the same layout as the
+# browser's ImageData.  Drawing is deliberately simple (no anti-aliasing, and text is measured but not drawn),
+# as the aim is to run Strype programs and check their results, not to match the browser pixel for pixel.
+
+import base64
+import math
+import re
+import struct
+import zlib
+
+TRANSPARENT = (0, 0, 0, 0)
+
+
+def parse_color(color):
+    """
+    Converts an HTML color as passed across the bridge (a color name, "#rgb", "#rrggbb" or "#rrggbbaa",
+    or None for transparent) into an (r, g, b, a) tuple.
+    """
+    if color is None:
+        return TRANSPARENT
+    lowered = color.strip().lower()
+    if lowered == "transparent":
+        return TRANSPARENT
+    if not lowered.startswith("#"):
+        # Imported here as strype.graphics itself imports strype_bridge:
+        from strype.graphics import _color_map
+        if lowered not in _color_map:
+            raise ValueError("Unknown color: " + color)
+        lowered = _color_map[lowered]
+    digits = lowered[1:]
+    if len(digits) in (3, 4):
+        digits = "".join(d * 2 for d in digits)
+    if len(digits) == 6:
+        digits += "ff"
+    if len(digits) != 8:
+        raise ValueError("Invalid color: " + color)
+    return tuple(int(digits[i:i + 2], 16) for i in range(0, 8, 2))
+
+
+def _clamp_byte(value):
+    # Like assigning to a Uint8ClampedArray:
+    return min(255, max(0, round(value)))
+
+
+class Canvas:
+    """
+    An image with RGBA pixels in a bytearray, and the current fill and stroke colors used for drawing on it.
+    """
+
+    def __init__(self, width, height, pixels=None):
+        self.width = int(width)
+        self.height = int(height)
+        if self.width < 1 or self.height < 1:
+            raise ValueError("Invalid canvas size: " + str(width) + " * " + str(height))
+        self.pixels = bytearray(self.width * self.height * 4) if pixels is None else bytearray(pixels)
+        self.fill = (0, 0, 0, 255)
+        self.stroke = (0, 0, 0, 255)
+        # (text, x, y, font size) of each text drawn, as the headless backend doesn't render text:
+        self.texts = []
+
+    def copy(self):
+        c = Canvas(self.width, self.height, self.pixels)
+        c.fill = self.fill
+        c.stroke = self.stroke
+        c.texts = list(self.texts)
+        return c
+
+    # Pixel access:
+
+    def index(self, x, y):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            raise IndexError("Pixel (" + str(x) + ", " + str(y) + ") is outside the image")
+        return (y * self.width + x) * 4
+
+    def get_pixel(self, x, y):
+        i = self.index(x, y)
+        return list(self.pixels[i:i + 4])
+
+    def set_pixel(self, x, y, rgba):
+        i = self.index(x, y)
+        self.pixels[i:i + 4] = bytes(rgba)
+
+    def blend_pixel(self, x, y, rgba):
+        # Draws rgba over the pixel at (x, y) (the canvas "source-over" operation), ignoring points outside:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            self.blend_at((y * self.width + x) * 4, rgba)
+
+    def blend_at(self, i, rgba):
+        r, g, b, a = rgba
+        if a == 255:
+            self.pixels[i:i + 4] = bytes(rgba)
+        elif a:
+            px = self.pixels
+            dest_a = px[i + 3]
+            out_a = a + dest_a * (255 - a) / 255
+            keep = dest_a * (255 - a) / 255
+            px[i] = round((r * a + px[i] * keep) / out_a)
+            px[i + 1] = round((g * a + px[i + 1] * keep) / out_a)
+            px[i + 2] = round((b * a + px[i + 2] * keep) / out_a)
+            px[i + 3] = round(out_a)
+
+    def fill_span(self, y, x0, x1, rgba):
+        # Draws rgba over pixels x0 (inclusive) to x1 (exclusive) of row y, clipped to the canvas:
+        y = int(y)
+        x0 = max(0, int(x0))
+        x1 = min(self.width, int(x1))
+        if not (0 <= y < self.height) or x0 >= x1 or rgba[3] == 0:
+            return
+        start = (y * self.width + x0) * 4
+        if rgba[3] == 255:
+            self.pixels[start:start + (x1 - x0) * 4] = bytes(rgba) * (x1 - x0)
+        else:
+            for i in range(start, start + (x1 - x0) * 4, 4):
+                self.blend_at(i, rgba)
+
+    # Drawing operations, matching the canvas_* functions of strype_graphics_internal:
+
+    def fill_whole(self):
+        if self.fill[3] == 255:
+            self.pixels[:] = bytes(self.fill) * (self.width * self.height)
+        else:
+            for y in range(self.height):
+                self.fill_span(y, 0, self.width, self.fill)
+
+    def clear_rect(self, x, y, width, height):
+        x0, x1 = max(0, round(x)), min(self.width, round(x + width))
+        if x0 >= x1:
+            return
+        blank = bytes((x1 - x0) * 4)
+        for row in range(max(0, round(y)), min(self.height, round(y + height))):
+            start = (row * self.width + x0) * 4
+            self.pixels[start:start + len(blank)] = blank
+
+    def line(self, x, y, x2, y2):
+        # Bresenham's line algorithm, in the stroke color:
+        x, y, x2, y2 = round(x), round(y), round(x2), round(y2)
+        dx, dy = abs(x2 - x), -abs(y2 - y)
+        sx, sy = (1 if x < x2 else -1), (1 if y < y2 else -1)
+        err = dx + dy
+        while True:
+            self.blend_pixel(x, y, self.stroke)
+            if x == x2 and y == y2:
+                break
+            e2 = 2 * err
+            if e2 >= dy:
+                err += dy
+                x += sx
+            if e2 <= dx:
+                err += dx
+                y += sy
+
+    def rounded_rect(self, x, y, width, height, corner_size):
+        x0, y0 = round(x), round(y)
+        x1, y1 = round(x + width), round(y + height)
+        corner = max(0, min(corner_size, (x1 - x0) / 2, (y1 - y0) / 2))
+        spans = []
+        for row in range(y0, y1):
+            # How far the row is inside a rounded corner, if it is:
+            dy = max(y0 + corner - (row + 0.5), (row + 0.5) - (y1 - corner), 0)
+            inset = corner - math.sqrt(max(0.0, corner * corner - dy * dy)) if dy else 0
+            spans.append((row, round(x0 + inset), round(x1 - inset)))
+        for row, start, end in spans:
+            self.fill_span(row, start, end, self.fill)
+        if self.stroke[3]:
+            for row, start, end in spans:
+                if row in (y0, y1 - 1):
+                    self.fill_span(row, start, end, self.stroke)
+                else:
+                    self.blend_pixel(start, row, self.stroke)
+                    self.blend_pixel(end - 1, row, self.stroke)
+
+    def arc(self, centre_x, centre_y, x_radius, y_radius, angle_start_deg, angle_delta_deg):
+        # Like the canvas ellipse() then fill() and stroke(): if it's not a full oval, the filled area is the
+        # segment between the arc and the straight line joining its ends.  Angles are in degrees, with 0 pointing
+        # right and positive going clockwise (i.e. with Y going down):
+        if x_radius <= 0 or y_radius <= 0:
+            return
+        full = abs(angle_delta_deg) >= 360
+        start, end, middle = (math.radians(a) for a in (angle_start_deg, angle_start_deg + angle_delta_deg, angle_start_deg + angle_delta_deg / 2))
+        ax, ay = x_radius * math.cos(start), y_radius * math.sin(start)
+        bx, by = x_radius * math.cos(end), y_radius * math.sin(end)
+
+        def side(px, py):
+            return (bx - ax) * (py - ay) - (by - ay) * (px - ax)
+
+        # Points on the same side of the chord as the middle of the arc are inside:
+        arc_side = side(x_radius * math.cos(middle), y_radius * math.sin(middle))
+        for row in range(max(0, math.floor(centre_y - y_radius)), min(self.height, math.ceil(centre_y + y_radius) + 1)):
+            py = row + 0.5 - centre_y
+            if abs(py) > y_radius:
+                continue
+            half = x_radius * math.sqrt(1 - (py / y_radius) ** 2)
+            left, right = round(centre_x - half), round(centre_x + half)
+            if full:
+                self.fill_span(row, left, right, self.fill)
+                if self.stroke[3]:
+                    self.blend_pixel(left, row, self.stroke)
+                    self.blend_pixel(right - 1, row, self.stroke)
+            else:
+                for col in range(max(0, left), min(self.width, right)):
+                    if side(col + 0.5 - centre_x, py) * arc_side > 0:
+                        self.blend_pixel(col, row, self.fill)
+
+    def polygon(self, xy_pairs):
+        # Scanline fill (even-odd rule), then the outline in the stroke color:
+        points = [(float(p[0]), float(p[1])) for p in xy_pairs]
+        if len(points) < 2:
+            return
+        if len(points) >= 3:
+            min_y = max(0, math.floor(min(p[1] for p in points)))
+            max_y = min(self.height - 1, math.ceil(max(p[1] for p in points)))
+            for row in range(min_y, max_y + 1):
+                scan_y = row + 0.5
+                crossings = []
+                for (ax, ay), (bx, by) in zip(points, points[1:] + points[:1]):
+                    if (ay <= scan_y < by) or (by <= scan_y < ay):
+                        crossings.append(ax + (scan_y - ay) * (bx - ax) / (by - ay))
+                crossings.sort()
+                for start, end in zip(crossings[0::2], crossings[1::2]):
+                    self.fill_span(row, round(start), round(end), self.fill)
+        if self.stroke[3]:
+            for (ax, ay), (bx, by) in zip(points, points[1:] + points[:1]):
+                self.line(ax, ay, bx, by)
+
+    def fill_pattern(self, src, offset_x, offset_y):
+        # Tiles src over the whole canvas, with the top-left of one copy at (offset_x, offset_y), starting
+        # from the copy which covers the top-left corner of this canvas:
+        left = offset_x - math.ceil(offset_x / src.width) * src.width
+        y = offset_y - math.ceil(offset_y / src.height) * src.height
+        while y < self.height:
+            x = left
+            while x < self.width:
+                self.draw_image_part(src, x, y, 0, 0, src.width, src.height, 1)
+                x += src.width
+            y += src.height
+
+    def draw_image_part(self, src, dx, dy, sx, sy, sw, sh, scale):
+        # Draws the (sx, sy, sw, sh) rectangle of src at (dx, dy) on this canvas, scaled by scale
+        # (nearest neighbour), using source-over compositing:
+        sx, sy = round(sx), round(sy)
+        sw = min(round(sw), src.width - sx)
+        sh = min(round(sh), src.height - sy)
+        if sw <= 0 or sh <= 0 or scale <= 0:
+            return
+        dest_w, dest_h = round(sw * scale), round(sh * scale)
+        dx, dy = round(dx), round(dy)
+        # Clip to this canvas:
+        col0, col1 = max(0, -dx), min(dest_w, self.width - dx)
+        if col0 >= col1:
+            return
+        source_cols = [sx + min(sw - 1, int(c / scale)) for c in range(col0, col1)]
+        contiguous = scale == 1
+        src_px, dest_px = src.pixels, self.pixels
+        for row in range(max(0, -dy), min(dest_h, self.height - dy)):
+            src_row = sy + min(sh - 1, int(row / scale))
+            src_start = (src_row * src.width) * 4
+            if contiguous:
+                segment = src_px[src_start + source_cols[0] * 4:src_start + (source_cols[-1] + 1) * 4]
+            else:
+                segment = b"".join(src_px[src_start + c * 4:src_start + c * 4 + 4] for c in source_cols)
+            dest_start = ((dy + row) * self.width + dx + col0) * 4
+            dest_end = dest_start + len(segment)
+            alphas = segment[3::4]
+            # Copying is the same as compositing if the source is opaque or the destination is fully transparent:
+            if alphas.count(255) == len(alphas) or dest_px[dest_start + 3:dest_end:4].count(0) == len(alphas):
+                dest_px[dest_start:dest_end] = segment
+            else:
+                for offset in range(0, len(segment), 4):
+                    if segment[offset + 3]:
+                        self.blend_at(dest_start + offset, tuple(segment[offset:offset + 4]))
+
+    def transformed(self, scale, rotate, flip):
+        """
+        Returns a new Canvas with a copy of this one, flipped ("horizontal", "vertical" or "none"),
+        then rotated clockwise by rotate degrees, then scaled.  The new canvas is just big enough
+        to contain the result, and corners outside the rotated image are transparent.
+        """
+        radians = math.radians(rotate)
+        cos, sin = math.cos(radians), math.sin(radians)
+        w, h = self.width * scale, self.height * scale
+        new_w = max(1, round(abs(w * cos) + abs(h * sin)))
+        new_h = max(1, round(abs(w * sin) + abs(h * cos)))
+        result = Canvas(new_w, new_h)
+        result.fill, result.stroke = self.fill, self.stroke
+        src, out = self.pixels, result.pixels
+        for row in range(new_h):
+            ry = row + 0.5 - new_h / 2
+            for col in range(new_w):
+                rx = col + 0.5 - new_w / 2
+                # Undo the rotation and scaling to find the source pixel:
+                ux = (rx * cos + ry * sin) / scale + self.width / 2
+                uy = (-rx * sin + ry * cos) / scale + self.height / 2
+                if flip == "horizontal":
+                    ux = self.width - ux
+                elif flip == "vertical":
+                    uy = self.height - uy
+                sx, sy = math.floor(ux), math.floor(uy)
+                if 0 <= sx < self.width and 0 <= sy < self.height:
+                    i = (sy * self.width + sx) * 4
+                    j = (row * new_w + col) * 4
+                    out[j:j + 4] = src[i:i + 4]
+        return result
+
+    def apply_filter(self, name, params):
+        # The same filters, with the same parameters, as src/stryperuntime/image_filters.ts:
+        d = self.pixels
+        if name == "grayscale" or name == "threshold":
+            for i in range(0, len(d), 4):
+                grey = 0.299 * d[i] + 0.587 * d[i + 1] + 0.114 * d[i + 2]
+                if name == "threshold":
+                    grey = 255 if grey >= params[0] else 0
+                d[i] = d[i + 1] = d[i + 2] = _clamp_byte(grey)
+        elif name == "invert":
+            for i in range(0, len(d), 4):
+                d[i], d[i + 1], d[i + 2] = 255 - d[i], 255 - d[i + 1], 255 - d[i + 2]
+        elif name == "adjust":
+            brightness, contrast = params
+            table = bytes(_clamp_byte(((v - 128) * contrast + 128) * brightness) for v in range(256))
+            for c in range(3):
+                d[c::4] = d[c::4].translate(table)
+        elif name == "boxBlur" or name == "gaussianBlur":
+            radius = max(0, round(params[0]))
+            if name == "boxBlur":
+                weights = [1 / (radius * 2 + 1)] * (radius * 2 + 1)
+            else:
+                sigma = max(radius / 2, 0.5)
+                weights = [math.exp(-(i * i) / (2 * sigma * sigma)) for i in range(-radius, radius + 1)]
+                weights = [w / sum(weights) for w in weights]
+            # Horizontally then vertically, as in Javascript:
+            result = self._convolve([[w] for w in weights], 4, self._convolve([weights], 4, list(d)))
+            d[:] = bytes(_clamp_byte(v) for v in result)
+        elif name == "convolve":
+            size = round(params[0])
+            result = self._convolve([params[1 + row * size:1 + (row + 1) * size] for row in range(size)], 3, list(d))
+            d[:] = bytes(_clamp_byte(v) for v in result)
+        elif name == "replaceColor":
+            old, new, tolerance = params[0:4], bytes(_clamp_byte(v) for v in params[4:8]), params[8]
+            for i in range(0, len(d), 4):
+                if all(abs(d[i + c] - old[c]) <= tolerance for c in range(4)):
+                    d[i:i + 4] = new
+
+    def _convolve(self, kernel, channels, source):
+        # Applies the kernel (a list of rows) to the first channels of each pixel of source (a list of values
+        # laid out like self.pixels), with pixels beyond the edge being copies of the edge pixel.
+        # Gives the unrounded result, with any other channels copied from source:
+        result = list(source)
+        half_h, half_w = len(kernel) // 2, len(kernel[0]) // 2
+        for y in range(self.height):
+            for x in range(self.width):
+                totals = [0.0] * channels
+                for ky, row in enumerate(kernel):
+                    sy = min(self.height - 1, max(0, y + ky - half_h))
+                    for kx, w in enumerate(row):
+                        start = (sy * self.width + min(self.width - 1, max(0, x + kx - half_w))) * 4
+                        for c in range(channels):
+                            totals[c] += source[start + c] * w
+                out = (y * self.width + x) * 4
+                result[out:out + channels] = totals
+        return result
+
+    @staticmethod
+    def measure_text(text, font_size, max_width, max_height):
+        """
+        Returns the [width, height] the text would take up.  There are no fonts in the headless backend,
+        so this assumes every character is 0.6 of the font size wide, and lines are 1.2 times the font size apart.
+        As in the browser, text is wrapped at spaces to fit max_width (if > 0), and the font size is reduced
+        to fit max_height (if > 0).
+        """
+        while True:
+            char_width = font_size * 0.6
+            lines = []
+            for paragraph in str(text).split("\n"):
+                line = ""
+                for word in paragraph.split(" "):
+                    candidate = word if not line else line + " " + word
+                    if max_width > 0 and line and len(candidate) * char_width > max_width:
+                        lines.append(line)
+                        line = word
+                    else:
+                        line = candidate
+                lines.append(line)
+            width = max(len(line) for line in lines) * char_width
+            height = len(lines) * font_size * 1.2
+            if max_height <= 0 or height <= max_height or font_size <= 1:
+                return [math.ceil(width), math.ceil(height)]
+            font_size -= 1
+
+    # Encoding and decoding:
+
+    def to_png(self):
+        raw = b"".join(
+            b"\x00" + bytes(self.pixels[row * self.width * 4:(row + 1) * self.width * 4])
+            for row in range(self.height)
+        )
+
+        def chunk(kind, data):
+            return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+        return (
+            b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", self.width, self.height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw))
+            + chunk(b"IEND", b"")
+        )
+
+    @staticmethod
+    def from_png(data):
+        """
+        Decodes a non-interlaced PNG with 8 or 16 bits per channel.  Other images need Pillow (see from_bytes).
+        """
+        if not data.startswith(b"\x89PNG\r\n\x1a\n"):
+            raise ValueError("Not a PNG image")
+        pos = 8
+        idat = []
+        palette = transparency = None
+        width = height = bit_depth = color_type = 0
+        while pos < len(data):
+            length, kind = struct.unpack(">I4s", data[pos:pos + 8])
+            body = data[pos + 8:pos + 8 + length]
+            pos += 12 + length
+            if kind == b"IHDR":
+                width, height, bit_depth, color_type, _, _, interlace = struct.unpack(">IIBBBBB", body)
+                if interlace or bit_depth not in (8, 16):
+                    raise ValueError("Unsupported PNG format")
+            elif kind == b"PLTE":
+                palette = [tuple(body[i:i + 3]) for i in range(0, len(body), 3)]
+            elif kind == b"tRNS":
+                transparency = body
+            elif kind == b"IDAT":
+                idat.append(body)
+            elif kind == b"IEND":
+                break
+        channels = {0: 1, 2: 3, 3: 1, 4: 2, 6: 4}[color_type]
+        bytes_per_pixel = channels * bit_depth // 8
+        stride = width * bytes_per_pixel
+        raw = zlib.decompress(b"".join(idat))
+        previous = bytearray(stride)
+        rows = []
+        for row in range(height):
+            start = row * (stride + 1)
+            filter_type = raw[start]
+            line = bytearray(raw[start + 1:start + 1 + stride])
+            for i in range(stride):
+                left = line[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+                up = previous[i]
+                if filter_type == 1:
+                    line[i] = (line[i] + left) & 0xff
+                elif filter_type == 2:
+                    line[i] = (line[i] + up) & 0xff
+                elif filter_type == 3:
+                    line[i] = (line[i] + (left + up) // 2) & 0xff
+                elif filter_type == 4:
+                    up_left = previous[i - bytes_per_pixel] if i >= bytes_per_pixel else 0
+                    p = left + up - up_left
+                    pa, pb, pc = abs(p - left), abs(p - up), abs(p - up_left)
+                    predictor = left if pa <= pb and pa <= pc else (up if pb <= pc else up_left)
+                    line[i] = (line[i] + predictor) & 0xff
+            rows.append(line)
+            previous = line
+        if bit_depth == 16:
+            # Keep the most significant byte of each sample:
+            rows = [line[0::2] for line in rows]
+        pixels = bytearray()
+        for line in rows:
+            if color_type == 6:
+                pixels += line
+            elif color_type == 2:
+                for i in range(0, len(line), 3):
+                    pixels += line[i:i + 3] + b"\xff"
+            elif color_type == 0:
+                for v in line:
+                    pixels += bytes((v, v, v, 255))
+            elif color_type == 4:
+                for i in range(0, len(line), 2):
+                    pixels += bytes((line[i], line[i], line[i], line[i + 1]))
+            else:
+                for v in line:
+                    alpha = transparency[v] if transparency and v < len(transparency) else 255
+                    pixels += bytes(palette[v]) + bytes((alpha,))
+        return Canvas(width, height, pixels)
+
+    @staticmethod
+    def from_bytes(data):
+        """
+        Decodes an image file.  PNGs are decoded directly; other formats (e.g. JPEG) need Pillow to be installed.
+        """
+        try:
+            return Canvas.from_png(data)
+        except (ValueError, KeyError, zlib.error, struct.error):
+            pass
+        try:
+            import io
+            from PIL import Image as PILImage  # type: ignore
+        except ImportError:
+            raise ValueError("The headless backend can only load PNG images unless Pillow is installed") from None
+        with PILImage.open(io.BytesIO(data)) as img:
+            img = img.convert("RGBA")
+            return Canvas(img.width, img.height, img.tobytes())
+
+
+def decode_data_url(url):
+    """
+    Returns the bytes encoded in a data: URL.
+    """
+    match = re.match(r"^data:([^,]*?)(;base64)?,(.*)$", url, re.DOTALL)
+    if not match:
+        raise ValueError("Invalid data URL")
+    if match.group(2):
+        return base64.b64decode(match.group(3))
+    from urllib.parse import unquote_to_bytes
+    return unquote_to_bytes(match.group(3))
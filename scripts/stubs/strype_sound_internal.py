@@ -0,0 +1,100 @@
+# Headless version of src/stryperuntime/strype_sound_internal.ts (see strype_headless.py).
+# Sounds are strype_headless.Sound objects.  Playing a sound just records it in world.sounds_played.
+
+import io
+import struct
+import wave
+
+import strype_headless as _headless
+from strype_headless_canvas import decode_data_url
+
+
+def _decode_wav(data):
+    with wave.open(io.BytesIO(data)) as w:
+        num_channels, sample_width, sample_rate = w.getnchannels(), w.getsampwidth(), w.getframerate()
+        frames = w.readframes(w.getnframes())
+    if sample_width == 1:
+        # 8-bit WAV samples are unsigned:
+        values = [(b - 128) / 128 for b in frames]
+    elif sample_width == 2:
+        values = [v / 32768 for v in struct.unpack("<%dh" % (len(frames) // 2), frames)]
+    elif sample_width == 3:
+        values = [int.from_bytes(frames[i:i + 3], "little", signed=True) / 8388608 for i in range(0, len(frames), 3)]
+    else:
+        values = [v / 2147483648 for v in struct.unpack("<%di" % (len(frames) // 4), frames)]
+    return _headless.Sound([values[c::num_channels] for c in range(num_channels)], sample_rate)
+
+
+def _encode_wav(sound):
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(sound.numberOfChannels)
+        w.setsampwidth(2)
+        w.setframerate(sound.sampleRate)
+        interleaved = [round(max(-1.0, min(1.0, v)) * 32767) for frame in zip(*sound.channels) for v in frame]
+        w.writeframes(struct.pack("<%dh" % len(interleaved), *interleaved))
+    return out.getvalue()
+
+
+def startAudioBuffer(sound):
+    _headless.world.sounds_played.append(sound)
+
+
+def playAudioBufferAndWait(sound):
+    _headless.world.sounds_played.append(sound)
+
+
+def stopAudioBuffer(sound):
+    pass
+
+
+def createAudioBuffer(seconds, sample_rate):
+    # Note that creating zero length sounds is undefined behaviour, so must have at least one sample:
+    return _headless.Sound([[0.0] * max(1, round(seconds * sample_rate))], sample_rate)
+
+
+def createAudioBufferFromSamples(samples, sample_rate):
+    return _headless.Sound([list(samples) or [0.0]], sample_rate)
+
+
+def loadAndWaitForAudioBuffer(path):
+    if not path.startswith("data:"):
+        raise ValueError("Unable to load sound in the headless backend: " + path)
+    return _decode_wav(decode_data_url(path))
+
+
+def loadAndWaitForAudioBufferBytes(contents):
+    return _decode_wav(bytes(contents))
+
+
+def getSamples(sound):
+    if sound.numberOfChannels > 1:
+        raise ValueError("Cannot get samples from stereo sound; convert to mono first")
+    return _headless.JsArray(sound.channels[0])
+
+
+def setSamples(sound, samples):
+    if sound.numberOfChannels > 1:
+        raise ValueError("Cannot set samples in stereo sound; convert to mono first")
+    sound.channels[0] = _headless.array.array("f", samples)
+
+
+def getNumSamples(sound):
+    return sound.numSamples
+
+
+def getSampleRate(sound):
+    return sound.sampleRate
+
+
+def downloadWAV(sound, filename_stem):
+    _headless.world.downloads.append((filename_stem + ".wav", _encode_wav(sound)))
+
+
+def copy(sound):
+    return _headless.Sound(sound.channels, sound.sampleRate)
+
+
+def copyToMono(sound):
+    mono = [sum(frame) / len(frame) for frame in zip(*sound.channels)]
+    return _headless.Sound([mono], sound.sampleRate)
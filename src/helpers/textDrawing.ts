@@ -78,18 +78,35 @@ function calculateTextToFit(ctx: OffscreenCanvasRenderingContext2D, text: string
     return {lines, fontSize, width: longestWidth, height: textHeight};
 }
 
-// Draws the given text on canvas dest at top-left of x, y with given fontSize in pixels.
-// If the text would be larger than maxWidth (and maxWidth is > 0) then it will be wrapped at white space in the text.
-// If the text would then be larger than maxHeight (and maxHeight is > 0), its font size will be reduced until it
-// fits inside maxWidth and maxHeight.  Note that it is invalid to supply maxHeight > 0 with maxWidth = 0.
-// Returns a Python dict with fields "width" and "height" with the actual width and height
-export function drawText(ctx : OffscreenCanvasRenderingContext2D, text : string, x : number, y : number, fontSize : number, maxWidth : number, maxHeight : number, fontName : string) : {width: number; height: number;} {
+function getTextMeasurement(ctx: OffscreenCanvasRenderingContext2D, text: string, fontSize: number, maxWidth: number, maxHeight: number, fontName : string) : TextMeasurement {
     const key = `${fontSize}:${fontName}:${maxWidth}:${maxHeight}:${text}`;
     let details = textMeasureCache.get(key);
     if (!details) {
         details = calculateTextToFit(ctx, text, fontSize, maxWidth, maxHeight, fontName);
         textMeasureCache.set(key, details);
     }
+    return details;
+}
+
+// A tiny canvas which is only used for measuring text, made when first needed:
+let measuringContext : OffscreenCanvasRenderingContext2D | null = null;
+
+// Returns the width and height which drawText would give for the same parameters, without drawing anything:
+export function measureText(text : string, fontSize : number, maxWidth : number, maxHeight : number, fontName : string) : {width: number; height: number;} {
+    if (measuringContext == null) {
+        measuringContext = new OffscreenCanvas(1, 1).getContext("2d") as OffscreenCanvasRenderingContext2D;
+    }
+    const details = getTextMeasurement(measuringContext, text, fontSize, maxWidth, maxHeight, fontName);
+    return {width: details.width, height: details.height};
+}
+
+// Draws the given text on canvas dest at top-left of x, y with given fontSize in pixels.
+// If the text would be larger than maxWidth (and maxWidth is > 0) then it will be wrapped at white space in the text.
+// If the text would then be larger than maxHeight (and maxHeight is > 0), its font size will be reduced until it
+// fits inside maxWidth and maxHeight.  Note that it is invalid to supply maxHeight > 0 with maxWidth = 0.
+// Returns a Python dict with fields "width" and "height" with the actual width and height
+export function drawText(ctx : OffscreenCanvasRenderingContext2D, text : string, x : number, y : number, fontSize : number, maxWidth : number, maxHeight : number, fontName : string) : {width: number; height: number;} {
+    const details = getTextMeasurement(ctx, text, fontSize, maxWidth, maxHeight, fontName);
     ctx.font = `${details.fontSize}px ${fontName}`;
 
     // Render each line of text on the canvas at (x, y)
@@ -0,0 +1,181 @@
+// Collision masks, for the precise (pixel-accurate) collision detection which actors can opt into
+// (see set_precise_collisions in graphics.py).  A mask is a packed bitmap of which pixels of an image are
+// solid.  The broad phase of collision detection (the boxes in SpriteManager) still happens as before, and
+// masks are only compared for pairs whose boxes overlap.
+//
+// Comparing two masks at arbitrary rotations pixel-by-pixel would be slow, so instead we make a version of each
+// mask which is rotated (to the nearest ROTATION_STEP degrees) and scaled into world orientation, and cache it.
+// Two such masks are then aligned with each other and can be compared 32 pixels at a time with bitwise AND.
+import { RemoteCanvas, RemoteImage } from "@/stryperuntime/worker_bridge_type";
+
+// Pixels with at least this alpha count as solid:
+const ALPHA_THRESHOLD = 128;
+// Rotations are rounded to multiples of this many degrees when making the world-oriented mask:
+const ROTATION_STEP = 5;
+// The maximum number of rotated/scaled masks we keep for each image, to stop us using ever more memory if
+// a program keeps changing the scale of an actor:
+const MAX_TRANSFORMS_PER_IMAGE = 128;
+
+// A part of an image (e.g. one frame of a sprite sheet), in pixels from its top-left:
+export type FrameRect = {x: number, y: number, width: number, height: number};
+
+export class CollisionMask {
+    // Each row takes rowWords 32-bit words.  Bit j of word k in a row is for column k*32 + j.
+    // Bits past the width are always zero.
+    public readonly rowWords: number;
+    public readonly bits: Uint32Array;
+
+    constructor(public readonly width: number, public readonly height: number) {
+        this.rowWords = Math.max(1, Math.ceil(width / 32));
+        this.bits = new Uint32Array(this.rowWords * height);
+    }
+
+    // Makes the mask of a width x height area of an image with the given pixels, which is rowWidth pixels wide.
+    // The area starts at (left, top) in the image, and any of it which is beyond the image's edges is not solid:
+    public static fromRGBA(width: number, height: number, pixelsRGBA: Uint8ClampedArray | Uint8Array, rowWidth = width, left = 0, top = 0) : CollisionMask {
+        const mask = new CollisionMask(width, height);
+        const rows = Math.floor(pixelsRGBA.length / (rowWidth * 4));
+        for (let y = 0; y < height && top + y < rows; y++) {
+            for (let x = 0; x < width && left + x < rowWidth; x++) {
+                if (pixelsRGBA[((top + y) * rowWidth + left + x) * 4 + 3] >= ALPHA_THRESHOLD) {
+                    mask.set(x, y);
+                }
+            }
+        }
+        return mask;
+    }
+
+    public static solid(width: number, height: number) : CollisionMask {
+        const mask = new CollisionMask(width, height);
+        for (let y = 0; y < height; y++) {
+            for (let x = 0; x < width; x++) {
+                mask.set(x, y);
+            }
+        }
+        return mask;
+    }
+
+    public get(x: number, y: number) : boolean {
+        return x >= 0 && y >= 0 && x < this.width && y < this.height && (this.bits[y * this.rowWords + (x >> 5)] & (1 << (x & 31))) != 0;
+    }
+
+    public set(x: number, y: number) : void {
+        this.bits[y * this.rowWords + (x >> 5)] |= 1 << (x & 31);
+    }
+
+    // Gets 32 bits from the given row, starting at the given column (in bit 0), with zeroes for anything outside the mask:
+    public bitsAt(row: number, col: number) : number {
+        if (col <= -32 || col >= this.width) {
+            return 0;
+        }
+        const base = row * this.rowWords;
+        if (col < 0) {
+            return (this.bits[base] << -col) >>> 0;
+        }
+        const word = col >> 5;
+        const shift = col & 31;
+        if (shift == 0) {
+            return this.bits[base + word];
+        }
+        const high = word + 1 < this.rowWords ? this.bits[base + word + 1] << (32 - shift) : 0;
+        return ((this.bits[base + word] >>> shift) | high) >>> 0;
+    }
+
+    // Makes a version of this mask rotated anti-clockwise (as sprites are) and scaled.  The result is the size of the
+    // bounding box of the rotated image, and has the same centre:
+    public transformed(rotationDegrees: number, scale: number) : CollisionMask {
+        const radians = rotationDegrees * Math.PI / 180;
+        const cos = Math.cos(radians);
+        const sin = Math.sin(radians);
+        // The small amount taken off stops rounding errors (e.g. cos(90) not being exactly 0) adding an extra pixel:
+        const width = Math.max(1, Math.ceil((Math.abs(this.width * cos) + Math.abs(this.height * sin)) * scale - 1e-9));
+        const height = Math.max(1, Math.ceil((Math.abs(this.width * sin) + Math.abs(this.height * cos)) * scale - 1e-9));
+        const result = new CollisionMask(width, height);
+        for (let row = 0; row < height; row++) {
+            // Work in world orientation (Y upwards) relative to the centre:
+            const dy = height / 2 - (row + 0.5);
+            for (let col = 0; col < width; col++) {
+                const dx = col + 0.5 - width / 2;
+                // Rotate back into the image's own orientation:
+                const localX = (dx * cos + dy * sin) / scale;
+                const localY = (-dx * sin + dy * cos) / scale;
+                if (this.get(Math.floor(localX + this.width / 2), Math.floor(this.height / 2 - localY))) {
+                    result.set(col, row);
+                }
+            }
+        }
+        return result;
+    }
+}
+
+// Checks whether two world-oriented masks overlap, given the world position of each of their centres:
+export function masksOverlap(a: CollisionMask, aX: number, aY: number, b: CollisionMask, bX: number, bY: number) : boolean {
+    // The offset of b's top-left from a's top-left, in pixels (rows go downwards, but world Y goes upwards):
+    const offsetX = Math.round((bX - b.width / 2) - (aX - a.width / 2));
+    const offsetY = Math.round((aY + a.height / 2) - (bY + b.height / 2));
+    const firstRow = Math.max(0, offsetY);
+    const lastRow = Math.min(a.height, offsetY + b.height);
+    const firstCol = Math.max(0, offsetX);
+    const lastCol = Math.min(a.width, offsetX + b.width);
+    for (let row = firstRow; row < lastRow; row++) {
+        for (let col = firstCol; col < lastCol; col += 32) {
+            // Anything past lastCol is outside one of the masks, so is zero in one of the two:
+            if ((a.bitsAt(row, col) & b.bitsAt(row - offsetY, col - offsetX)) != 0) {
+                return true;
+            }
+        }
+    }
+    return false;
+}
+
+// Keeps the mask for each image, and its rotated/scaled versions.  The pixels of images are held on the main thread,
+// so the cache is given a function to fetch them, which is only called the first time an image's mask is needed.
+export class CollisionMaskCache {
+    // Maps image key (see keyFor) to the mask of the image itself (or of one frame of it, if it is a sprite sheet),
+    // and the map from transform key to transformed mask:
+    private readonly masks = new Map<string, {mask: CollisionMask, transformed: Map<string, CollisionMask>}>();
+
+    constructor(private readonly getPixelsRGBA: (img: RemoteImage | RemoteCanvas) => Uint8ClampedArray | Uint8Array) {
+    }
+
+    private static keyFor(img: RemoteImage | RemoteCanvas) : string {
+        return img.handle.handleKind + img.handle.handle;
+    }
+
+    // Gets the world-oriented mask for the image (or the given frame of it) at the given rotation and scale.
+    // If precise is false, the mask is just the whole image or frame, as if every pixel was solid:
+    public get(img: RemoteImage | RemoteCanvas, frame: FrameRect | null, precise: boolean, rotation: number, scale: number) : CollisionMask {
+        const width = frame?.width ?? img.width;
+        const height = frame?.height ?? img.height;
+        const key = precise ? CollisionMaskCache.keyFor(img) + (frame ? "@" + frame.x + "," + frame.y + "," + width + "x" + height : "") : "solid" + width + "x" + height;
+        let entry = this.masks.get(key);
+        if (entry == undefined) {
+            const mask = precise ? CollisionMask.fromRGBA(width, height, this.getPixelsRGBA(img), img.width, frame?.x ?? 0, frame?.y ?? 0) : CollisionMask.solid(width, height);
+            entry = {mask, transformed: new Map()};
+            this.masks.set(key, entry);
+        }
+        const step = ((Math.round(rotation / ROTATION_STEP) * ROTATION_STEP) % 360 + 360) % 360;
+        const transformKey = step + "x" + scale;
+        let transformed = entry.transformed.get(transformKey);
+        if (transformed == undefined) {
+            if (entry.transformed.size >= MAX_TRANSFORMS_PER_IMAGE) {
+                entry.transformed.clear();
+            }
+            transformed = entry.mask.transformed(step, scale);
+            entry.transformed.set(transformKey, transformed);
+        }
+        return transformed;
+    }
+
+    // Must be called when the pixels of an image change:
+    public forget(img: RemoteImage | RemoteCanvas) : void {
+        const key = CollisionMaskCache.keyFor(img);
+        this.masks.delete(key);
+        // And the masks of any of its frames:
+        for (const other of this.masks.keys()) {
+            if (other.startsWith(key + "@")) {
+                this.masks.delete(other);
+            }
+        }
+    }
+}
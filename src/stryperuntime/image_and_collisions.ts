@@ -1,5 +1,6 @@
 import {System, Box, Point} from "detect-collisions";
-import {isRemoteImage, makeImageHandle, makeSpriteHandle, RemoteCanvas, RemoteImage, StrypeSpriteStateUpdate} from "@/stryperuntime/worker_bridge_type";
+import {CollisionMaskCache, FrameRect, masksOverlap} from "@/stryperuntime/collision_masks";
+import {isRemoteImage, makeImageHandle, makeSpriteHandle, RemoteCanvas, RemoteImage, SpriteEdgeMode, SpriteFrames, SpriteMotion, StrypeSpriteStateSingleUpdate, StrypeSpriteStateUpdate} from "@/stryperuntime/worker_bridge_type";
 
 // A Sprite is an item with an image, X Y position and rotation that is drawn on screen.
 // Note that there is not a 1-to-1 correspondence between Actors and Sprites because:
@@ -14,6 +15,78 @@ export interface Sprite {
     scale: number, // 1.0 means same size as original image
     collisionBox: Box | null, // The item in the collision detection system.  Null if the object is not collidable
     removeAtTime: number | null, // The time to remove at in millis, to compare against Date.now().  Used to schedule future timed removal, e.g. for say_f0r
+    tag: number | null, // The number standing for the tag of the Actor (see _tag_id in graphics.py), so queries can filter by it.  Null if untagged, or only known to Python
+    precise: boolean, // Whether collisions use the solid pixels of the image (see collision_masks.ts) rather than its whole box
+    frames: SpriteFrames | null, // If the image is a sprite sheet, which frames of it are shown.  Null to show the whole image
+    shownIndex: number, // The index into frames.sequence which was current when we last checked for redrawing (see isDirty)
+    motion: SpriteMotion | null, // How the sprite moves by itself, or null if it only moves when told to
+}
+
+// A change to a sprite for setSpriteTransforms: [id, x, y, rotation, image], with null for the parts which don't change:
+export type SpriteTransform = [number | null, number | null, number | null, number | null, (RemoteImage | RemoteCanvas | null)?];
+// A sprite for applySpriteUpdates to add: [id, image, collidable, x, y, tag]:
+export type SpriteAddition = [number, RemoteImage | RemoteCanvas, boolean, number, number, number | null];
+
+// Gets the index into frames.sequence which is shown at the given time:
+function sequenceIndexAt(frames: SpriteFrames, now: number) : number {
+    if (frames.fps <= 0 || frames.sequence.length <= 1) {
+        return 0;
+    }
+    return Math.floor(Math.max(0, now - frames.startTime) * frames.fps / 1000) % frames.sequence.length;
+}
+
+// Gets the part of the sprite's image which is shown at the given time, or null if it shows its whole image:
+export function getFrameRect(sprite: Sprite, now: number = Date.now()) : FrameRect | null {
+    const frames = sprite.frames;
+    if (frames == null) {
+        return null;
+    }
+    const frame = frames.sequence[sequenceIndexAt(frames, now)];
+    return {x: (frame % frames.columns) * frames.width, y: Math.floor(frame / frames.columns) * frames.height, width: frames.width, height: frames.height};
+}
+
+// Where something moving along one axis is after the given number of seconds, kept between low and high as the
+// edge mode says.  graphics.py has the same sums (see _position_along), so that Python agrees with us:
+function positionAlong(start: number, velocity: number, seconds: number, low: number, high: number, edge: SpriteEdgeMode) : number {
+    const position = start + velocity * seconds;
+    const span = high - low;
+    switch (edge) {
+    case "wrap":
+        return low + ((position - low) % span + span) % span;
+    case "bounce": {
+        // Bouncing back and forth repeats every 2 * span, and is going backwards in the second half:
+        const offset = ((position - low) % (2 * span) + 2 * span) % (2 * span);
+        return offset <= span ? low + offset : low + 2 * span - offset;
+    }
+    default:
+        return Math.max(low, Math.min(position, high));
+    }
+}
+
+// Gets where a moving sprite is at the given time:
+export function motionAt(motion: SpriteMotion, now: number) : {x: number, y: number, rotation: number} {
+    const seconds = Math.max(0, now - motion.startTime) / 1000;
+    return {
+        x: positionAlong(motion.startX, motion.vx, seconds, -WORLD_WIDTH/2 + 1, WORLD_WIDTH/2, motion.edge),
+        y: positionAlong(motion.startY, motion.vy, seconds, -WORLD_HEIGHT/2 + 1, WORLD_HEIGHT/2, motion.edge),
+        rotation: motion.startRotation + motion.angularVelocity * seconds,
+    };
+}
+
+function sameMotion(a: SpriteMotion | null, b: SpriteMotion | null) : boolean {
+    if (a == null || b == null) {
+        return a == b;
+    }
+    return a.startX == b.startX && a.startY == b.startY && a.startRotation == b.startRotation && a.vx == b.vx && a.vy == b.vy
+        && a.angularVelocity == b.angularVelocity && a.edge == b.edge && a.startTime == b.startTime;
+}
+
+function sameFrames(a: SpriteFrames | null, b: SpriteFrames | null) : boolean {
+    if (a == null || b == null) {
+        return a == b;
+    }
+    return a.width == b.width && a.height == b.height && a.columns == b.columns && a.fps == b.fps && a.startTime == b.startTime
+        && a.sequence.length == b.sequence.length && a.sequence.every((f, i) => f == b.sequence[i]);
 }
 
 export const WORLD_WIDTH = 800;
@@ -35,16 +108,26 @@ export class SpriteManager {
     private collisionSystem = new System();
     // A map to be able to look up the Sprite when we find an intersecting Box during collision detection:
     private boxToImageMap = new Map<Box, Sprite>();
+    // The sprites which are animating through more than one frame, which we need to redraw as time passes:
+    private animated = new Set<Sprite>();
+    // The sprites which are moving by themselves, whose positions we need to bring up to date as time passes:
+    private moving = new Set<Sprite>();
     private notify: (update: StrypeSpriteStateUpdate) => void;
+    // Only present if we were given a way to get the pixels of images, which is only possible on the web worker thread,
+    // and then precise collisions are checked in all the collision queries apart from calculateAllOverlappingAtPos:
+    private masks: CollisionMaskCache | null;
     
-    constructor(notify: (update: StrypeSpriteStateUpdate) => void) {
+    constructor(notify: (update: StrypeSpriteStateUpdate) => void, getPixelsRGBA?: (img: RemoteImage | RemoteCanvas) => Uint8ClampedArray | Uint8Array) {
         this.notify = notify;
+        this.masks = getPixelsRGBA ? new CollisionMaskCache(getPixelsRGBA) : null;
         this.clear();
     }
     
     public clear() : void {
         this.notify({request: "clear"});
         this.sprites.clear();
+        this.animated.clear();
+        this.moving.clear();
         const bk = {
             id: 0,
             img: {width: 800, height: 600, handle: makeImageHandle(0)}, // Special identifier indicating a black image
@@ -55,9 +138,14 @@ export class SpriteManager {
             scale: 1.0,
             collisionBox: null,
             removeAtTime: null,
+            tag: null,
+            precise: false,
+            frames: null,
+            shownIndex: 0,
+            motion: null,
         };
         this.sprites.set(0, bk);
-        this.notify({request: "add", id: makeSpriteHandle(0), x: bk.x, y: bk.y, rotation: bk.rotation, scale: bk.scale, image: bk.img, collidable: false});
+        this.notify({request: "add", id: makeSpriteHandle(0), x: bk.x, y: bk.y, rotation: bk.rotation, scale: bk.scale, image: bk.img, collidable: false, frames: null, motion: null});
         // We don't mark dirty on clear, because we don't trigger a re-render
         this.collisionSystem.clear();
     }
@@ -72,10 +160,10 @@ export class SpriteManager {
     }
 
     private sendUpdateFor(p: Sprite) {
-        this.notify({request: "update", id: makeSpriteHandle(p.id), image: p.img, x: p.x, y: p.y, scale: p.scale, rotation: p.rotation, collidable: p.collisionBox != null});
+        this.notify({request: "update", id: makeSpriteHandle(p.id), image: p.img, x: p.x, y: p.y, scale: p.scale, rotation: p.rotation, collidable: p.collisionBox != null, frames: p.frames, motion: p.motion});
     }
 
-    public addSprite(imageOrCanvas : RemoteImage | RemoteCanvas, collidable: boolean, x = 0, y = 0, forceId?: number): number {
+    public addSprite(imageOrCanvas : RemoteImage | RemoteCanvas, collidable: boolean, x = 0, y = 0, forceId?: number, tag: number | null = null): number {
         // We don't mark dirty for adding the background:
         // Note: undefined (didn't force an ID, auto-numbered) or non-zero (forced to non-background ID) marks as dirty
         // This is NOT the same as if (forceId) because undefined should go in:
@@ -88,13 +176,13 @@ export class SpriteManager {
         const clampedX = Math.max(-WORLD_WIDTH/2 + 1, Math.min(x, WORLD_WIDTH/2));
         const clampedY = Math.max(-WORLD_HEIGHT/2 + 1, Math.min(y, WORLD_HEIGHT/2));
         const box = collidable ? this.collisionSystem.createBox({x: clampedX, y: clampedY}, imageOrCanvas.width, imageOrCanvas.height, {isCentered: true}) : null;
-        const newImage = {id, img: imageOrCanvas, x: clampedX, y: clampedY, rotation: 0, scale: 1, collisionBox : box, removeAtTime: null};
+        const newImage = {id, img: imageOrCanvas, x: clampedX, y: clampedY, rotation: 0, scale: 1, collisionBox : box, removeAtTime: null, tag, precise: false, frames: null, shownIndex: 0, motion: null};
         this.sprites.set(id, newImage);
         if (box != null) {
             this.boxToImageMap.set(box, newImage);
         }
         
-        this.notify({request: "add", id: makeSpriteHandle(id), x: newImage.x, y: newImage.y, rotation: newImage.rotation, scale: newImage.scale, image: imageOrCanvas, collidable});
+        this.notify({request: "add", id: makeSpriteHandle(id), x: newImage.x, y: newImage.y, rotation: newImage.rotation, scale: newImage.scale, image: imageOrCanvas, collidable, frames: null, motion: null});
         return id;
     }
 
@@ -105,7 +193,7 @@ export class SpriteManager {
         }
         else {
             // Remove it if it was present, as it was scheduled for it:
-            this.sprites.delete(id);
+            this.deleteSprite(id);
             return false;
         }
     }
@@ -133,7 +221,7 @@ export class SpriteManager {
                 this.collisionSystem.remove(box);
                 this.boxToImageMap.delete(box);
             }
-            this.sprites.delete(id);
+            this.deleteSprite(id);
         }
         // Notify whether it was scheduled or immediate:
         this.notify({request: "remove", id: makeSpriteHandle(id), removeAtTime});
@@ -154,6 +242,64 @@ export class SpriteManager {
         }
     }
 
+    // Sets which frames of its image (which should be a sprite sheet) the sprite shows, or null to show the whole image:
+    public setSpriteFrames(id: number, frames: SpriteFrames | null): void {
+        const obj = this.sprites.get(id);
+        if (obj != undefined && !sameFrames(obj.frames, frames)) {
+            const oldSize = this.sizeOf(obj);
+            obj.frames = frames;
+            obj.shownIndex = frames == null ? 0 : sequenceIndexAt(frames, Date.now());
+            if (frames != null && frames.fps > 0 && frames.sequence.length > 1) {
+                this.animated.add(obj);
+            }
+            else {
+                this.animated.delete(obj);
+            }
+            this.dirty = true;
+            const newSize = this.sizeOf(obj);
+            if (obj.collisionBox != null && (newSize.width != oldSize.width || newSize.height != oldSize.height)) {
+                // To update box size, easiest to re-add:
+                this.setSpriteCollidable(id, false);
+                this.setSpriteCollidable(id, true);
+            }
+            this.sendUpdateFor(obj);
+        }
+    }
+
+    // Sets how the sprite moves by itself, or null to stop it moving by itself and put it at the given location and rotation
+    // (if it is moving, its location and rotation come from the motion instead):
+    public setSpriteMotion(id: number, motion: SpriteMotion | null, x: number, y: number, rotation: number): void {
+        const obj = this.sprites.get(id);
+        if (obj != undefined && !sameMotion(obj.motion, motion)) {
+            obj.motion = motion;
+            if (motion != null) {
+                this.moving.add(obj);
+            }
+            else {
+                this.moving.delete(obj);
+            }
+            const at = motion != null ? motionAt(motion, Date.now()) : {x, y, rotation};
+            this.moveTo(obj, at.x, at.y, at.rotation);
+            this.dirty = true;
+            this.sendUpdateFor(obj);
+        }
+    }
+
+    // Moves the sprite and its collision box, without sending an update:
+    private moveTo(obj: Sprite, x: number, y: number, rotation: number) : void {
+        obj.x = Math.max(-WORLD_WIDTH/2 + 1, Math.min(x, WORLD_WIDTH/2));
+        obj.y = Math.max(-WORLD_HEIGHT/2 + 1, Math.min(y, WORLD_HEIGHT/2));
+        obj.rotation = rotation;
+        obj.collisionBox?.setPosition(obj.x, obj.y);
+        obj.collisionBox?.setAngle(rotation * Math.PI / 180);
+        obj.collisionBox?.updateBody();
+    }
+
+    // The size of the part of the image which the sprite shows, ignoring rotation and scale:
+    private sizeOf(obj: Sprite) : {width: number, height: number} {
+        return obj.frames != null ? {width: obj.frames.width, height: obj.frames.height} : {width: obj.img.width, height: obj.img.height};
+    }
+
     public setSpriteLocation(id: number, x: number, y: number): void {
         const obj = this.sprites.get(id);
         if (obj != undefined && (obj.x != x || obj.y != y)) {
@@ -196,7 +342,8 @@ export class SpriteManager {
         if (obj) {
             if (collidable && !obj.collisionBox) {
                 // Need to add a collision box:
-                const box = this.collisionSystem.createBox({x:obj.x, y:obj.y}, obj.img.width, obj.img.height, {isCentered: true});
+                const size = this.sizeOf(obj);
+                const box = this.collisionSystem.createBox({x:obj.x, y:obj.y}, size.width, size.height, {isCentered: true});
                 box.setAngle(obj.rotation * Math.PI / 180);
                 box.setScale(obj.scale);
                 box.updateBody();
@@ -214,11 +361,94 @@ export class SpriteManager {
         }
     }
     
-    // Gets the image size, ignoring rotation and scale
+    // Sets the location, rotation and/or image of many sprites at once.  Each item is [id, x, y, rotation, image],
+    // where x and y, rotation or image can be null (or left off) to leave them unchanged.  Rather than one update per
+    // change, this sends a single bulk update with the final state of each changed sprite:
+    public setSpriteTransforms(transforms: SpriteTransform[]) : void {
+        this.applySpriteUpdates([], transforms);
+    }
+    
+    // Keeps back ids for sprites which will be added later with those ids (see applySpriteUpdates), so that the
+    // sprites can be given their ids before they are sent.  Returns the first of the count ids:
+    public reserveSpriteIds(count: number) : number {
+        const first = this.nextSpriteId;
+        this.nextSpriteId += count;
+        return first;
+    }
+    
+    // Adds the given sprites, each of which is [id, image, collidable, x, y, tag] with an id from reserveSpriteIds,
+    // then applies the transforms as setSpriteTransforms does.  All of the changes go in a single bulk update:
+    public applySpriteUpdates(adds: SpriteAddition[], transforms: SpriteTransform[]) : void {
+        const added : StrypeSpriteStateSingleUpdate[] = [];
+        const updates = new Map<number, StrypeSpriteStateSingleUpdate>();
+        const notify = this.notify;
+        // Updates contain the whole state of the sprite, so we only need to keep the latest for each sprite,
+        // and they must come after the sprites have been added:
+        this.notify = (u) => {
+            if (u.request == "add") {
+                added.push(u);
+            }
+            else if (u.request == "update") {
+                updates.set(u.id.handle, u);
+            }
+        };
+        try {
+            for (const [id, image, collidable, x, y, tag] of adds) {
+                this.addSprite(image, collidable, x, y, id, tag ?? null);
+            }
+            for (const [id, x, y, rotation, image] of transforms) {
+                if (id == null) {
+                    continue;
+                }
+                if (x != null && y != null) {
+                    this.setSpriteLocation(id, x, y);
+                }
+                if (rotation != null) {
+                    this.setSpriteRotation(id, rotation);
+                }
+                if (image != null) {
+                    this.setSpriteImage(id, image);
+                }
+            }
+        }
+        finally {
+            this.notify = notify;
+        }
+        const all = added.concat(Array.from(updates.values()));
+        if (all.length == 1) {
+            notify(all[0]);
+        }
+        else if (all.length > 1) {
+            notify({request: "bulk", updates: all});
+        }
+    }
+    
+    public setSpritePrecise(id: number, precise: boolean): void {
+        const obj = this.sprites.get(id);
+        if (obj) {
+            obj.precise = precise;
+        }
+    }
+    
+    // Must be called when the pixels of an image have changed, in case we have a collision mask for it:
+    public imagePixelsChanged(img: RemoteImage | RemoteCanvas) : void {
+        this.masks?.forget(img);
+    }
+    
+    // Given two sprites whose boxes overlap, checks if they really touch, if either of them uses precise collisions:
+    private overlapPrecisely(a: Sprite, b: Sprite) : boolean {
+        if (this.masks == null || (!a.precise && !b.precise)) {
+            return true;
+        }
+        const now = Date.now();
+        return masksOverlap(this.masks.get(a.img, getFrameRect(a, now), a.precise, a.rotation, a.scale), a.x, a.y, this.masks.get(b.img, getFrameRect(b, now), b.precise, b.rotation, b.scale), b.x, b.y);
+    }
+    
+    // Gets the image size (or the frame size, if it shows frames of a sprite sheet), ignoring rotation and scale
     public getSpriteSize(id: number) : {width: number, height: number} | undefined {
         const obj = this.sprites.get(id);
         if (obj != undefined) {
-            return {width : obj.img.width, height : obj.img.height};
+            return this.sizeOf(obj);
         }
         else {
             return undefined;
@@ -226,6 +456,7 @@ export class SpriteManager {
     }
 
     public getSpriteLocation(id: number) : {x: number, y : number} | undefined {
+        this.advanceMotion();
         const obj = this.sprites.get(id);
         if (obj != undefined) {
             return {x : obj.x, y : obj.y};
@@ -236,6 +467,7 @@ export class SpriteManager {
     }
     
     public getSpriteRotation(id: number) : number | undefined {
+        this.advanceMotion();
         const obj = this.sprites.get(id);
         return obj?.rotation;
     }
@@ -250,8 +482,17 @@ export class SpriteManager {
     }
     
     public isDirty() : boolean {
-        // We might become dirty if something is overdue a removal:
-        this.checkForScheduledRemovals();
+        // We might become dirty if something is overdue a removal, or has moved by itself:
+        this.catchUpWithTime();
+        // Or if an animation has moved on to its next frame:
+        const now = Date.now();
+        for (const sprite of this.animated) {
+            const index = sequenceIndexAt(sprite.frames as SpriteFrames, now);
+            if (index != sprite.shownIndex) {
+                sprite.shownIndex = index;
+                this.dirty = true;
+            }
+        }
         return this.dirty;
     }
 
@@ -259,25 +500,56 @@ export class SpriteManager {
         this.dirty = false;
     }
     
+    // Brings everything which changes with time up to date, which must be done before anything that depends on it:
+    private catchUpWithTime() : void {
+        this.checkForScheduledRemovals();
+        this.advanceMotion();
+    }
+    
+    // Moves the sprites which move by themselves to where they should be now.  No updates are sent, because the
+    // other thread works out the same positions itself:
+    private advanceMotion() : void {
+        if (this.moving.size == 0) {
+            return;
+        }
+        const now = Date.now();
+        for (const sprite of this.moving) {
+            const at = motionAt(sprite.motion as SpriteMotion, now);
+            if (at.x != sprite.x || at.y != sprite.y || at.rotation != sprite.rotation) {
+                this.moveTo(sprite, at.x, at.y, at.rotation);
+                this.dirty = true;
+            }
+        }
+    }
+    
     private checkForScheduledRemovals() : void {
         const t = Date.now();
         // Unlike Java, Typescript is okay with us deleting values while iterating
         // (see https://stackoverflow.com/questions/35940216/es6-is-it-dangerous-to-delete-elements-from-set-map-during-set-map-iteration )
         for (const [id, sprite] of this.sprites) {
             if (sprite.removeAtTime != null && sprite.removeAtTime <= t) {
-                this.sprites.delete(id);
+                this.deleteSprite(id);
                 this.dirty = true;
             }
         }
     }
     
+    private deleteSprite(id: number) : void {
+        const sprite = this.sprites.get(id);
+        if (sprite) {
+            this.animated.delete(sprite);
+            this.moving.delete(sprite);
+            this.sprites.delete(id);
+        }
+    }
+    
     public getSprites() : IterableIterator<Sprite> {
-        this.checkForScheduledRemovals();
+        this.catchUpWithTime();
         return this.sprites.values();
     }
     
     public calculateAllOverlappingAtPos(x: number, y: number) : Sprite[] {
-        this.checkForScheduledRemovals();
+        this.catchUpWithTime();
         const collisionPoint = new Point({x:x, y:y});
         this.collisionSystem.insert(collisionPoint);
         const all : Sprite[] = [];
@@ -292,26 +564,26 @@ export class SpriteManager {
     }
     
     public checkCollision(idA: number, idB: number) : boolean {
-        this.checkForScheduledRemovals();
-        const boxA = this.sprites.get(idA)?.collisionBox;
-        const boxB = this.sprites.get(idB)?.collisionBox;
-        if (boxA && boxB) {
-            return this.collisionSystem.checkCollision(boxA, boxB);
+        this.catchUpWithTime();
+        const a = this.sprites.get(idA);
+        const b = this.sprites.get(idB);
+        if (a?.collisionBox && b?.collisionBox) {
+            return this.collisionSystem.checkCollision(a.collisionBox, b.collisionBox) && this.overlapPrecisely(a, b);
         }
         else {
             return false;
         }
     }
     
-    // Gets the idof all items which overlap the given persistent image id.
-    public getAllOverlapping(id: number) : number[] {
-        this.checkForScheduledRemovals();
+    // Gets the idof all items which overlap the given persistent image id.  If tag is given, only those with that tag.
+    public getAllOverlapping(id: number, tag: number | null = null) : number[] {
+        this.catchUpWithTime();
         const r : number[] = [];
-        const box = this.sprites.get(id)?.collisionBox;
-        if (box) {
-            this.collisionSystem.checkOne(box, (response) => {
+        const us = this.sprites.get(id);
+        if (us?.collisionBox) {
+            this.collisionSystem.checkOne(us.collisionBox, (response) => {
                 const pimg = this.boxToImageMap.get(response.b as Box);
-                if (pimg != null) {
+                if (pimg != null && (tag == null || pimg.tag == tag) && this.overlapPrecisely(us, pimg)) {
                     r.push(pimg.id);
                 }
             });
@@ -319,14 +591,36 @@ export class SpriteManager {
         return r;
     }
     
+    // Gets all pairs of overlapping items where the first has tagA and the second has tagB (a null tag matches anything),
+    // flattened as [a, b, a, b, ...] ids.  Each overlapping pair is only included once, even if it would match either way round.
+    public getCollisionPairs(tagA: number | null, tagB: number | null) : number[] {
+        this.catchUpWithTime();
+        const matches = (s : Sprite, tag : number | null) => tag == null || s.tag == tag;
+        const r : number[] = [];
+        for (const a of this.sprites.values()) {
+            if (a.collisionBox == null || !matches(a, tagA)) {
+                continue;
+            }
+            this.collisionSystem.checkOne(a.collisionBox, (response) => {
+                const b = this.boxToImageMap.get(response.b as Box);
+                // If the pair also matches the other way round, it will be found from b too, so we only take it from the lower id:
+                if (b != null && b.id != a.id && matches(b, tagB) && !(b.id < a.id && matches(b, tagA) && matches(a, tagB)) && this.overlapPrecisely(a, b)) {
+                    r.push(a.id, b.id);
+                }
+            });
+        }
+        return r;
+    }
+
     // Gets ids of all actors in the world:
     public getAllActors() : number[] {
         return Array.from(this.getSprites()).map((p) => p.id);
     }
 
     // Gets the associatedObject of all items which have centres within the specific radius of the given persistent image id.
-    public getAllNearby(id: number, radius: number) : number[] {
-        this.checkForScheduledRemovals();
+    // If tag is given, only those with that tag.
+    public getAllNearby(id: number, radius: number, tag: number | null = null) : number[] {
+        this.catchUpWithTime();
         
         const us = this.sprites.get(id);
         const all: number[] = [];
@@ -347,7 +641,7 @@ export class SpriteManager {
                 if (dx * dx + dy * dy <= radius_squared) {
                     const pimg = this.boxToImageMap.get(body);
                     // Don't include ourselves in the results:
-                    if (pimg && pimg.id != id) {
+                    if (pimg && pimg.id != id && (tag == null || pimg.tag == tag)) {
                         all.push(pimg.id);
                     }
                 }
@@ -0,0 +1,161 @@
+// Whole-image filters (grayscale, blur, etc), which are run on the main thread on the pixels of a canvas, for
+// the filter methods of Image in graphics.py.  Each filter is a single async request from the web worker, and
+// no pixels are sent back to the worker, so they are far faster than a Python loop using get_pixel/set_pixel.
+//
+// The parameters for each filter are a flat list of numbers (see the canvas_applyFilter request), as follows:
+//   grayscale: none
+//   invert: none
+//   adjust: brightness, contrast (both multipliers, where 1 means unchanged)
+//   boxBlur: radius
+//   gaussianBlur: radius
+//   convolve: the kernel size (an odd number), then that many squared weights, row by row
+//   threshold: level (0-255)
+//   replaceColor: r, g, b, a of the color to replace, r, g, b, a of the new color, tolerance
+// Apart from the blurs, which blur the transparency too, and replaceColor, the alpha of each pixel is left alone.
+
+export type ImageFilterName = "grayscale" | "invert" | "adjust" | "boxBlur" | "gaussianBlur" | "convolve" | "threshold" | "replaceColor";
+
+// The parts of ImageData that we use:
+type Pixels = { data: Uint8ClampedArray, width: number, height: number };
+
+export function applyImageFilter(pixels: Pixels, filter: ImageFilterName, params: number[]) : void {
+    const d = pixels.data;
+    switch (filter) {
+    case "grayscale":
+        for (let i = 0; i < d.length; i += 4) {
+            // The usual weights for how bright each color looks:
+            const grey = 0.299 * d[i] + 0.587 * d[i + 1] + 0.114 * d[i + 2];
+            d[i] = d[i + 1] = d[i + 2] = grey;
+        }
+        break;
+    case "invert":
+        for (let i = 0; i < d.length; i += 4) {
+            d[i] = 255 - d[i];
+            d[i + 1] = 255 - d[i + 1];
+            d[i + 2] = 255 - d[i + 2];
+        }
+        break;
+    case "adjust": {
+        const [brightness, contrast] = params;
+        // Contrast stretches values away from the middle, then brightness scales them.  A lookup table
+        // saves doing the sums for every pixel; assigning to the Uint8ClampedArray rounds and clamps for us:
+        const table = new Uint8ClampedArray(256);
+        for (let v = 0; v < 256; v++) {
+            table[v] = ((v - 128) * contrast + 128) * brightness;
+        }
+        for (let i = 0; i < d.length; i += 4) {
+            d[i] = table[d[i]];
+            d[i + 1] = table[d[i + 1]];
+            d[i + 2] = table[d[i + 2]];
+        }
+        break;
+    }
+    case "boxBlur": {
+        const radius = Math.max(0, Math.round(params[0]));
+        const weights = new Array(radius * 2 + 1).fill(1 / (radius * 2 + 1));
+        separableBlur(pixels, weights);
+        break;
+    }
+    case "gaussianBlur": {
+        const radius = Math.max(0, Math.round(params[0]));
+        // The kernel goes out to two standard deviations either side:
+        const sigma = Math.max(radius / 2, 0.5);
+        const weights = [];
+        for (let i = -radius; i <= radius; i++) {
+            weights.push(Math.exp(-(i * i) / (2 * sigma * sigma)));
+        }
+        const total = weights.reduce((a, b) => a + b, 0);
+        separableBlur(pixels, weights.map((w) => w / total));
+        break;
+    }
+    case "convolve":
+        convolve(pixels, params[0], params.slice(1));
+        break;
+    case "threshold": {
+        const level = params[0];
+        for (let i = 0; i < d.length; i += 4) {
+            d[i] = d[i + 1] = d[i + 2] = (0.299 * d[i] + 0.587 * d[i + 1] + 0.114 * d[i + 2]) >= level ? 255 : 0;
+        }
+        break;
+    }
+    case "replaceColor": {
+        const [r, g, b, a, newR, newG, newB, newA, tolerance] = params;
+        for (let i = 0; i < d.length; i += 4) {
+            if (Math.abs(d[i] - r) <= tolerance && Math.abs(d[i + 1] - g) <= tolerance && Math.abs(d[i + 2] - b) <= tolerance && Math.abs(d[i + 3] - a) <= tolerance) {
+                d[i] = newR;
+                d[i + 1] = newG;
+                d[i + 2] = newB;
+                d[i + 3] = newA;
+            }
+        }
+        break;
+    }
+    }
+}
+
+// Applies the given 1D weights (which should add up to 1) horizontally and then vertically, to all four channels.
+// Pixels beyond the edge are treated as copies of the edge pixel:
+function separableBlur(pixels: Pixels, weights: number[]) : void {
+    const {width, height} = pixels;
+    const radius = (weights.length - 1) / 2;
+    const source = pixels.data;
+    const horizontal = new Float32Array(source.length);
+    for (let y = 0; y < height; y++) {
+        for (let x = 0; x < width; x++) {
+            const out = (y * width + x) * 4;
+            for (let k = 0; k < weights.length; k++) {
+                const from = (y * width + Math.min(width - 1, Math.max(0, x + k - radius))) * 4;
+                const w = weights[k];
+                horizontal[out] += source[from] * w;
+                horizontal[out + 1] += source[from + 1] * w;
+                horizontal[out + 2] += source[from + 2] * w;
+                horizontal[out + 3] += source[from + 3] * w;
+            }
+        }
+    }
+    for (let y = 0; y < height; y++) {
+        for (let x = 0; x < width; x++) {
+            const out = (y * width + x) * 4;
+            let r = 0, g = 0, b = 0, a = 0;
+            for (let k = 0; k < weights.length; k++) {
+                const from = (Math.min(height - 1, Math.max(0, y + k - radius)) * width + x) * 4;
+                const w = weights[k];
+                r += horizontal[from] * w;
+                g += horizontal[from + 1] * w;
+                b += horizontal[from + 2] * w;
+                a += horizontal[from + 3] * w;
+            }
+            source[out] = r;
+            source[out + 1] = g;
+            source[out + 2] = b;
+            source[out + 3] = a;
+        }
+    }
+}
+
+// Applies a size x size kernel to the red, green and blue of each pixel.  Pixels beyond the edge are treated as copies of the edge pixel:
+function convolve(pixels: Pixels, size: number, kernel: number[]) : void {
+    const {width, height} = pixels;
+    const radius = (size - 1) / 2;
+    const source = pixels.data.slice();
+    const d = pixels.data;
+    for (let y = 0; y < height; y++) {
+        for (let x = 0; x < width; x++) {
+            let r = 0, g = 0, b = 0;
+            for (let ky = 0; ky < size; ky++) {
+                const row = Math.min(height - 1, Math.max(0, y + ky - radius)) * width;
+                for (let kx = 0; kx < size; kx++) {
+                    const from = (row + Math.min(width - 1, Math.max(0, x + kx - radius))) * 4;
+                    const w = kernel[ky * size + kx];
+                    r += source[from] * w;
+                    g += source[from + 1] * w;
+                    b += source[from + 2] * w;
+                }
+            }
+            const out = (y * width + x) * 4;
+            d[out] = r;
+            d[out + 1] = g;
+            d[out + 2] = b;
+        }
+    }
+}
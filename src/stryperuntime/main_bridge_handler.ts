@@ -3,7 +3,7 @@
 import {AsyncStrypePyodideHandlerFunction, CloudFileId, decodeStringToUint8, encodeUint8ToString, isRemoteImage, makeSoundHandle, SpriteHandle, SyncPromiseStrypePyodideHandlerFunction} from "@/stryperuntime/worker_bridge_type";
 import {Renderer} from "@/stryperuntime/renderer";
 import {SoundManager} from "@/stryperuntime/sound_manager";
-import {drawText} from "@/helpers/textDrawing";
+import {drawText, measureText} from "@/helpers/textDrawing";
 import WebFont from "webfontloader";
 import {saveAs} from "file-saver";
 import {getDateTimeFormatted} from "@/helpers/common";
@@ -13,6 +13,7 @@ import { handleTurtle, TurtlePixiHandler } from "@/stryperuntime/turtle_pixi_han
 import { sInput } from "@/helpers/execPythonCode";
 import {getRawFileFromLibraries} from "@/helpers/libraryManager";
 import { StrypeSyncTarget } from "@/types/types";
+import { applyImageFilter } from "@/stryperuntime/image_filters";
 
 // These are callbacks passed from PythonExecutionArea.vue to do things that are tied to the DOM or wider Strype state.
 // This means we don't have to make reference to the PythonExecutionArea component itself.
@@ -45,6 +46,10 @@ export const handleSyncRequests : (
         callbacks.switchToGraphicsTab("ifFirstCallDuringExecute");
         return {request: req.request, response: renderer.loadImage(req.url)};
     }
+    case "loadImageFromBytes": {
+        callbacks.switchToGraphicsTab("ifFirstCallDuringExecute");
+        return {request: req.request, response: renderer.loadImageFromBytes(decodeStringToUint8(req.encodedContents), req.mimeType)};
+    }
     case "loadLibraryAsset": {
         return {request: req.request, response: callbacks.loadLibraryAsset(req.libraryShortName, req.fileName)};
     }
@@ -70,6 +75,9 @@ export const handleSyncRequests : (
     case "loadSound": {
         return {request: req.request, response: soundManager.loadSound(req.url)};
     }
+    case "loadSoundFromBytes": {
+        return {request: req.request, response: soundManager.loadSoundFromBytes(decodeStringToUint8(req.encodedContents))};
+    }
     case "createEmptyMonoSound": {
         const soundIndex = soundManager.createMonoSound(req.numSamples, req.sampleRate);
         return {request: req.request, response: Promise.resolve({handle: makeSoundHandle(soundIndex), numberOfChannels: 1, numSamples: req.numSamples, sampleRate: req.sampleRate })};
@@ -115,6 +123,9 @@ export const handleSyncRequests : (
     case "canvas_drawText": {
         return {request: req.request, response: Promise.resolve(drawText(renderer.getCanvasContext(req.img.handle), req.text, req.x, req.y, req.fontSize, req.maxWidth, req.maxHeight, req.fontName)) };
     }
+    case "measureText": {
+        return {request: req.request, response: Promise.resolve(measureText(req.text, req.fontSize, req.maxWidth, req.maxHeight, req.fontName)) };
+    }
     case "canvas_makeCopy": {
         return {request: req.request, response: Promise.resolve(renderer.makeCopy(req.img.handle, req.scale, req.rotate, req.flip)) };
     }
@@ -134,6 +145,14 @@ export const handleSyncRequests : (
         const ctx = renderer.getCanvasContext(req.img.handle);
         return {request: req.request, response: Promise.resolve(encodeUint8ToString(ctx.getImageData(0, 0, req.img.width, req.img.height).data))};
     }
+    case "image_getAllPixelsRGBA": {
+        // We draw the image on a canvas of our own rather than one from the renderer (which keeps its canvases
+        // for the whole run), so that it can be freed as soon as we have the pixels:
+        const img = renderer.getImage(req.img.handle);
+        const ctx = new OffscreenCanvas(img.width, img.height).getContext("2d") as OffscreenCanvasRenderingContext2D;
+        ctx.drawImage(img, 0, 0);
+        return {request: req.request, response: Promise.resolve(encodeUint8ToString(ctx.getImageData(0, 0, img.width, img.height).data))};
+    }
     case "file_lookup": {
         return {request: req.request, response: cloudLookupFile(req.parent, req.name)};
     }
@@ -239,6 +258,19 @@ export const handleAsyncRequests : (renderer : Renderer, soundManager : SoundMan
         renderer.getCanvasContext(req.dest.handle).drawImage(req.src.handle.handleKind == "Canvas" ? renderer.getCanvas(req.src.handle) : renderer.getImage(req.src.handle), req.sx, req.sy, req.sw, req.sh, req.dx, req.dy, req.sw * req.scale, req.sh * req.scale);
         return undefined;
     }
+    case "canvas_fillPattern": {
+        const ctx = renderer.getCanvasContext(req.dest.handle);
+        const pattern = ctx.createPattern(req.src.handle.handleKind == "Canvas" ? renderer.getCanvas(req.src.handle) : renderer.getImage(req.src.handle), "repeat");
+        if (pattern) {
+            pattern.setTransform(new DOMMatrix().translateSelf(req.offsetX, req.offsetY));
+            // Save and restore so that the user's own fill is left alone:
+            ctx.save();
+            ctx.fillStyle = pattern;
+            ctx.fillRect(0, 0, req.dest.width, req.dest.height);
+            ctx.restore();
+        }
+        return undefined;
+    }
     case "canvas_clearRect": {
         renderer.getCanvasContext(req.img.handle).clearRect(req.x, req.y, req.width, req.height);
         return undefined;
@@ -294,6 +326,17 @@ export const handleAsyncRequests : (renderer : Renderer, soundManager : SoundMan
         renderer.getCanvasContext(req.img.handle).putImageData(new ImageData(decodeStringToUint8(req.pixelRGBA), req.width, req.height), req.x, req.y);
         return undefined;
     }
+    case "canvas_drawMeasuredText": {
+        drawText(renderer.getCanvasContext(req.img.handle), req.text, req.x, req.y, req.fontSize, req.maxWidth, req.maxHeight, req.fontName);
+        return undefined;
+    }
+    case "canvas_applyFilter": {
+        const ctx = renderer.getCanvasContext(req.img.handle);
+        const imageData = ctx.getImageData(0, 0, req.img.width, req.img.height);
+        applyImageFilter(imageData, req.filter, req.params);
+        ctx.putImageData(imageData, 0, 0);
+        return undefined;
+    }
     case "canvas_downloadPNG": {
         renderer.getCanvas(req.img.handle).convertToBlob().then((blob) => {
             if (blob) {
@@ -8,6 +8,9 @@ import {getFullFilePath} from "@/stryperuntime/pyodide-emscripten-cloud-fs";
 export function createLazyFetchFS(pyodide : PyodideAPI, fileIndex: Record<string, string>, libraryURL: string | undefined, cache : Map<string, Uint8ClampedArray>) : EmscriptenFileSystemPlugin {
     const FS = pyodide.FS;
     const ERRNO_CODES = pyodide.ERRNO_CODES;
+    // The files never change, so they always have the same modification time.  (This matters because
+    // strype._asset_cache uses the modification time to tell if a file has changed since it was loaded.)
+    const mountTime = new Date();
 
     function normalize(path : string) : string {
         return path.replace(/^\/+/, "");
@@ -25,8 +28,8 @@ export function createLazyFetchFS(pyodide : PyodideAPI, fileIndex: Record<string
                 rdev: 0,
                 size: node.assetsContent?.length ?? 4096,
                 atime: new Date(),
-                mtime: new Date(),
-                ctime: new Date(),
+                mtime: mountTime,
+                ctime: mountTime,
                 blksize: 4096,
                 blocks: 1,
             };
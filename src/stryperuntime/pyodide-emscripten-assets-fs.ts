@@ -23,3 +23,11 @@ const cache : Map<string, Uint8ClampedArray> = new Map();
 export function createLazyFetchAssetsFS(pyodide : PyodideAPI) : EmscriptenFileSystemPlugin {
     return createLazyFetchFS(pyodide, assetsFileIndex, undefined, cache);
 }
+
+// Gets the URL which the file at the given absolute path (e.g. "/images/cat-test.jpg") is fetched from, or undefined
+// if it is not one of our assets.  The assets never change, so the main thread can fetch them itself by URL, rather
+// than the web worker fetching the contents and then sending them back to the main thread:
+export function getAssetFileURL(path: string) : string | undefined {
+    const url = assetsFileIndex["/src/assetsFilesystem" + path];
+    return url === undefined ? undefined : new URL(url, globalThis.location.href).href;
+}
@@ -1,5 +1,6 @@
-import { CanvasHandle, ImageHandle, isRemoteImage, makeCanvasHandle, makeImageHandle, makeSpriteHandle, RemoteCanvas, RemoteImage, SpriteHandle, StrypeSpriteStateUpdate } from "@/stryperuntime/worker_bridge_type";
-import { SpriteManager } from "@/stryperuntime/image_and_collisions";
+import { CanvasHandle, ImageHandle, isRemoteImage, makeCanvasHandle, makeImageHandle, makeSpriteHandle, RemoteCanvas, RemoteImage, SpriteHandle, StrypeSpriteStateSingleUpdate, StrypeSpriteStateUpdate } from "@/stryperuntime/worker_bridge_type";
+import { getFrameRect, SpriteManager } from "@/stryperuntime/image_and_collisions";
+import { FrameRect } from "@/stryperuntime/collision_masks";
 
 // A main thread class which keeps a SpriteManager that mirrors the state from the Pyodide web worker thread, and
 // also has the actual ImageBitmap/OffscreenCanvas object references.  When asked, can render its mirror of the 
@@ -39,40 +40,60 @@ export class Renderer  {
     setMessageChannel(recvUpdates : MessagePort) : void {
         recvUpdates.onmessage = (e) => {
             const update = e.data as StrypeSpriteStateUpdate;
-            switch (update.request) {
-            case "clear": {
-                // Delete everything except the first black background:
-                this.loadedImages.splice(1);
-                this.sprites.clear();
-                break;
-            }
-            case "add": {
-                this.sprites.addSprite(update.image, update.collidable, update.x, update.y, update.id.handle);
-                // Note: deliberate fall-through here into the update.
-            }
-            case "update": {
-                // Note that in theory each call here updates the collision box, so it looks inefficient to do it in many calls.
-                // But really, when it's an update only one field is updated, and all of the SpriteManager methods don't do anything
-                // if a field is set unchanged:
-                const id = update.id.handle;
-                this.sprites.setSpriteLocation(id, update.x, update.y);
-                this.sprites.setSpriteRotation(id, update.rotation);
-                this.sprites.setSpriteScale(id, update.scale);
-                this.sprites.setSpriteImage(id, update.image);
-                this.sprites.setSpriteCollidable(id, update.collidable);
-                break;
-            }
-            case "remove": {
-                this.sprites.removeSprite(update.id.handle, update.removeAtTime);
-                break;
+            if (update.request == "bulk") {
+                update.updates.forEach((u) => this.applyUpdate(u));
             }
+            else {
+                this.applyUpdate(update);
             }
         };
     }
+    
+    private applyUpdate(update : StrypeSpriteStateSingleUpdate) : void {
+        switch (update.request) {
+        case "clear": {
+            // Delete everything except the first black background:
+            this.loadedImages.splice(1);
+            this.sprites.clear();
+            break;
+        }
+        case "add": {
+            this.sprites.addSprite(update.image, update.collidable, update.x, update.y, update.id.handle);
+            // Note: deliberate fall-through here into the update.
+        }
+        case "update": {
+            // Note that in theory each call here updates the collision box, so it looks inefficient to do it in many calls.
+            // But really, when it's an update only one field is updated, and all of the SpriteManager methods don't do anything
+            // if a field is set unchanged:
+            const id = update.id.handle;
+            this.sprites.setSpriteLocation(id, update.x, update.y);
+            this.sprites.setSpriteRotation(id, update.rotation);
+            this.sprites.setSpriteScale(id, update.scale);
+            this.sprites.setSpriteImage(id, update.image);
+            this.sprites.setSpriteFrames(id, update.frames);
+            this.sprites.setSpriteMotion(id, update.motion, update.x, update.y, update.rotation);
+            this.sprites.setSpriteCollidable(id, update.collidable);
+            break;
+        }
+        case "remove": {
+            this.sprites.removeSprite(update.id.handle, update.removeAtTime);
+            break;
+        }
+        }
+    }
 
     async loadImage(url: string) : Promise<RemoteImage> {
         const response = await fetch(url);
         const blob = await response.blob();
+        return this.loadImageFromBlob(blob);
+    }
+
+    // Loads an image from the contents of an image file, e.g. a PNG:
+    loadImageFromBytes(bytes: Uint8Array<ArrayBuffer> | Uint8ClampedArray<ArrayBuffer>, mimeType: string) : Promise<RemoteImage> {
+        return this.loadImageFromBlob(new Blob([bytes], {type: mimeType}));
+    }
+
+    private async loadImageFromBlob(blob: Blob) : Promise<RemoteImage> {
         const imageBitmap = await createImageBitmap(blob);
         this.loadedImages.push(imageBitmap);
         return {handle: makeImageHandle(this.loadedImages.length - 1), width: imageBitmap.width, height: imageBitmap.height};
@@ -156,9 +177,11 @@ export class Renderer  {
         this.sprites.resetDirty();
     }
 
-    getItemsToDraw() : {x: number, y: number, rotation: number, scale: number, img: ImageBitmap | OffscreenCanvas}[] {
+    // Each item's frame is the part of its image to draw, or null to draw the whole image:
+    getItemsToDraw() : {x: number, y: number, rotation: number, scale: number, img: ImageBitmap | OffscreenCanvas, frame: FrameRect | null}[] {
+        const now = Date.now();
         return Array.from(this.sprites.getSprites()).map((p) => {
-            return {...p, img: isRemoteImage(p.img) ? this.loadedImages[p.img.handle.handle] : this.canvases[p.img.handle.handle]};
+            return {...p, img: isRemoteImage(p.img) ? this.loadedImages[p.img.handle.handle] : this.canvases[p.img.handle.handle], frame: getFrameRect(p, now)};
         });
     }
 
@@ -49,7 +49,8 @@ export class SoundManager {
             }
         }
         else {
-            promise = fetch("./sounds/" + url)
+            // Absolute URLs (which include those of the files in /sounds, see getAssetFileURL) are fetched as they are:
+            promise = fetch(/^(https?:)?\/\//.test(url) ? url : "./sounds/" + url)
                 .then((d) => d.arrayBuffer())
                 .then((b) => this.audioContext.decodeAudioData(b))
                 .then((b) => {
@@ -61,11 +62,22 @@ export class SoundManager {
                     }
                 });
         }
-        return await promise.then((buffer) => {
-            const h = this.loadedSounds.length;
-            this.loadedSounds.push(buffer);
-            return {handle: makeSoundHandle(h), numSamples: buffer.length, sampleRate: buffer.sampleRate, numberOfChannels: buffer.numberOfChannels};
-        });
+        return await promise.then((buffer) => this.addLoadedSound(buffer));
+    }
+
+    // Loads a sound from the contents of a sound file, e.g. a WAV:
+    async loadSoundFromBytes(bytes: Uint8Array<ArrayBuffer> | Uint8ClampedArray<ArrayBuffer>) : Promise<RemoteSound> {
+        const buffer = await this.audioContext.decodeAudioData(bytes.buffer);
+        if (!buffer) {
+            throw Error("Cannot load audio file");
+        }
+        return this.addLoadedSound(buffer);
+    }
+
+    private addLoadedSound(buffer: AudioBuffer) : RemoteSound {
+        const h = this.loadedSounds.length;
+        this.loadedSounds.push(buffer);
+        return {handle: makeSoundHandle(h), numSamples: buffer.length, sampleRate: buffer.sampleRate, numberOfChannels: buffer.numberOfChannels};
     }
 
     playAudioBuffer(index: number) : Promise<void> {
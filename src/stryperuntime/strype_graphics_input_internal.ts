@@ -4,6 +4,7 @@
 // It also contains (for ease) the Strype builtins internals.
 import { asyncBridge, PyodideWorkerGlobalScope, syncBridge } from "@/workers/python_execution_type";
 import { SpriteHandle } from "@/stryperuntime/worker_bridge_type";
+import { getAssetFileURL as assetFileURL } from "@/stryperuntime/pyodide-emscripten-assets-fs";
 
 declare const globalThis: PyodideWorkerGlobalScope;
 
@@ -37,26 +38,34 @@ export function checkCollision(idA : number, idB : number) : boolean {
     return globalThis.spriteManager.checkCollision(idA, idB);
 }
 
-export function getAllTouchingAssociated(id : number) : number[] {
-    return globalThis.spriteManager.getAllOverlapping(id);
+export function getAllTouchingAssociated(id : number, tag : number | null = null) : number[] {
+    return globalThis.spriteManager.getAllOverlapping(id, tag);
 }
 
-export function getAllAt(x : number, y : number) : number[] {
-    return globalThis.spriteManager.calculateAllOverlappingAtPos(x, y).map((p) => p.id);
+export function getAllAt(x : number, y : number, tag : number | null = null) : number[] {
+    return globalThis.spriteManager.calculateAllOverlappingAtPos(x, y).filter((p) => tag == null || p.tag == tag).map((p) => p.id);
+}
+
+export function getCollisionPairs(tagA : number | null = null, tagB : number | null = null) : number[] {
+    return globalThis.spriteManager.getCollisionPairs(tagA, tagB);
 }
 
 export function getAllActors() : number[] {
     return globalThis.spriteManager.getAllActors();
 }
 
-export function getAllNearbyAssociated(id : number, radius : number) : number[] {
-    return globalThis.spriteManager.getAllNearby(id, radius);
+export function getAllNearbyAssociated(id : number, radius : number, tag : number | null = null) : number[] {
+    return globalThis.spriteManager.getAllNearby(id, radius, tag);
 }
 
 export function setCollidable(id : number, collidable : boolean) : void {
     globalThis.spriteManager.setSpriteCollidable(id, collidable);
 }
 
+export function setPreciseCollision(id : number, precise : boolean) : void {
+    globalThis.spriteManager.setSpritePrecise(id, precise);
+}
+
 /**
  * Strype builtins related content.
  * We keep it for now as there are very few elements.
@@ -69,4 +78,16 @@ export function clearConsole() : void {
 export function getCurrentCloudName() : string | undefined {
     return syncBridge({request: "getCurrentCloudName"});
 } 
-// end Strype builtins
\ No newline at end of file
+// end Strype builtins
+
+// Used by strype/_bridge_instrumentation.py to tell which kinds of message a bridge call sent.
+// Returns the number of [sync requests, async requests, sprite updates] sent so far in this run:
+export function getBridgeMessageCounts() : number[] {
+    const counts = globalThis.bridgeMessageCounts;
+    return [counts.sync, counts.async, counts.spriteUpdates];
+}
+// Used by strype/_asset_cache.py to load images and sounds from our own assets (e.g. /images) by URL
+// rather than by reading the file (see getAssetFileURL).  Returns undefined if the path is not one of our assets:
+export function getAssetFileURL(path : string) : string | undefined {
+    return assetFileURL(path);
+}
@@ -1,12 +1,14 @@
 // This file contains the internal graphics API for the Strype graphics world.
 // These functions are not directly exposed to users, but are used by graphics.py to
 // form the actual public API.
-import { decodeStringToUint8, encodeUint8ToString, isRemoteImage, RemoteCanvas, RemoteImage } from "./worker_bridge_type";
+import { decodeStringToUint8, encodeUint8ToString, isRemoteImage, RemoteCanvas, RemoteImage, SpriteEdgeMode } from "./worker_bridge_type";
 import { asyncBridge, PyodideWorkerGlobalScope, syncBridge } from "@/workers/python_execution_type";
-import { PyProxy } from "pyodide/ffi";
+import { PyBuffer, PyProxy } from "pyodide/ffi";
 import { DebouncedFunc, throttle } from "lodash";
 import { LRU } from "@/helpers/lruCache";
 import { sayFont } from "@/helpers/textDrawing";
+import { ImageFilterName } from "@/stryperuntime/image_filters";
+import { SpriteAddition, SpriteTransform } from "@/stryperuntime/image_and_collisions";
 
 
 // Saves the pixels for the last three images that have been read from.  This speeds up get_pixel/set_pixel loops
@@ -23,6 +25,7 @@ const pixelsCache = new LRU<number, CachedPixels>(3, (key, value) => value.updat
 function aboutToDrawOnImage(img : RemoteCanvas) : void {
     // Evict automatically flushes the pixels if we have a dirty cache, then removes from cache:
     pixelsCache.evict(img.handle.handle);
+    globalThis.spriteManager.imagePixelsChanged(img);
 }
 
 // Caches the full pixels of an image from the main thread into our cache here on the web worker thread.
@@ -54,6 +57,7 @@ function cachePixelsOf(img: RemoteCanvas) : CachedPixels {
 function markDirty(canvas: RemoteCanvas, img: CachedPixels) {
     // All we need to do here is queue up an invocation of the update() function:
     img.update();
+    globalThis.spriteManager.imagePixelsChanged(canvas);
 }
 
 declare const globalThis: PyodideWorkerGlobalScope;
@@ -90,15 +94,36 @@ export function loadAndWaitForImage(filename: string) : RemoteImage {
     // Filename handling should have been done by caller, so we should never reach here:
     throw new Error(`Unable to load image: ${filename}`);
 }
+// Loads an image from the contents of a file, which graphics.py has read.  Sending the bytes as they are is quicker than
+// making a base64 data URL, which is a third bigger, and has to be encoded in Python and decoded on the main thread:
+export function loadAndWaitForImageBytes(contents: PyBuffer, mimeType: string) : RemoteImage {
+    const buffer = contents.getBuffer("u8");
+    try {
+        return syncBridge({request: "loadImageFromBytes", encodedContents: encodeUint8ToString(buffer.data as Uint8Array), mimeType});
+    }
+    finally {
+        buffer.release();
+    }
+}
 export function setBackground(img : RemoteImage) : void {
     globalThis.spriteManager.setBackground(img);
 } 
-export function addSprite(image: RemoteImage, collidable: boolean, x = 0, y = 0) : number {
-    return globalThis.spriteManager.addSprite(image, collidable, x, y);
+export function addSprite(image: RemoteImage, collidable: boolean, x = 0, y = 0, tag : number | null = null) : number {
+    return globalThis.spriteManager.addSprite(image, collidable, x, y, undefined, tag);
 }
 export function updateImage(id: number, image: RemoteImage) : void {
     globalThis.spriteManager.setSpriteImage(id, image);
 }
+// Makes the sprite show frames of its image, which is a sprite sheet (see SpriteFrames).  If sequence is null
+// (None in Python), the sprite goes back to showing its whole image:
+export function setSpriteFrames(id: number, width: number, height: number, columns: number, sequence: PyProxy | null, fps: number, startTime: number) : void {
+    globalThis.spriteManager.setSpriteFrames(id, sequence == null ? null : {width, height, columns, sequence: sequence.toJs() as number[], fps, startTime});
+}
+// Makes the sprite move by itself from the given location and rotation at startTime (see SpriteMotion).  If edge is null
+// (None in Python), the sprite stops moving by itself, and is put at the given location and rotation:
+export function setSpriteMotion(id: number, x: number, y: number, rotation: number, vx: number, vy: number, angularVelocity: number, edge: SpriteEdgeMode | null, startTime: number) : void {
+    globalThis.spriteManager.setSpriteMotion(id, edge == null ? null : {startX: x, startY: y, startRotation: rotation, vx, vy, angularVelocity, edge, startTime}, x, y, rotation);
+}
 export function imageExists(image : number) : boolean {
     return globalThis.spriteManager.hasSprite(image);
 }
@@ -114,6 +139,19 @@ export function setImageRotation(img : number, r : number) : void {
 export function setImageScale(img : number, s : number) : void {
     globalThis.spriteManager.setSpriteScale(img, s);
 }
+// Used by strype.graphics when batching (see set_batching).  Each item of transforms is [id, x, y, rotation, image],
+// with null for values which haven't changed:
+export function setSpriteTransforms(transforms : PyProxy) : void {
+    // As with polygon_xy_pairs, the nested list comes as a PyProxy so we need to convert:
+    globalThis.spriteManager.setSpriteTransforms(transforms.toJs() as SpriteTransform[]);
+}
+// Also used when batching, so that new sprites can be sent along with the other changes (see SpriteManager.applySpriteUpdates):
+export function reserveSpriteIds(count : number) : number {
+    return globalThis.spriteManager.reserveSpriteIds(count);
+}
+export function applySpriteUpdates(adds : PyProxy, transforms : PyProxy) : void {
+    globalThis.spriteManager.applySpriteUpdates(adds.toJs() as SpriteAddition[], transforms.toJs() as SpriteTransform[]);
+}
 export function getImageLocation(img : number): { x: number; y: number } | undefined {
     return globalThis.spriteManager.getSpriteLocation(img);
 }
@@ -184,6 +222,15 @@ export function canvas_setPixel(img : RemoteCanvas, x : number, y : number, r :
     cache.pixelsRGBA[baseIndex+3] = a;
     markDirty(img, cache);
 }
+// Used by the SpriteManager to make collision masks (see collision_masks.ts).  Only called once per image:
+export function getPixelsForCollisionMask(img : RemoteImage | RemoteCanvas) : Uint8ClampedArray {
+    if (isRemoteImage(img)) {
+        // We don't cache these pixels, as they are only used for this.  (Going through htmlImageToCanvas would leave
+        // behind a canvas on the main thread which is never used again.)
+        return decodeStringToUint8(syncBridge({request: "image_getAllPixelsRGBA", img}));
+    }
+    return cachePixelsOf(img).pixelsRGBA;
+}
 export function canvas_getAllPixels(img : RemoteCanvas) : Uint8ClampedArray {
     return cachePixelsOf(img).pixelsRGBA;
 }
@@ -192,6 +239,18 @@ export function canvas_setAllPixelsRGBA(img: RemoteCanvas, pixels : number[]) :
     cache.pixelsRGBA.set(pixels);
     markDirty(img, cache);
 }
+export function canvas_setAllPixelsFromBuffer(img: RemoteCanvas, pixels : PyBuffer) : void {
+    // Copying straight out of the Python buffer is much faster than converting a list one element at a time:
+    const cache = cachePixelsOf(img);
+    const buffer = pixels.getBuffer("u8clamped");
+    try {
+        cache.pixelsRGBA.set(buffer.data as Uint8ClampedArray);
+    }
+    finally {
+        buffer.release();
+    }
+    markDirty(img, cache);
+}
 export function canvas_drawImagePart(dest: RemoteCanvas, src : RemoteImage | RemoteCanvas, dx : number, dy : number, sx : number, sy : number, sw : number, sh : number, scale : number) : void {
     if (!isRemoteImage(src)) {
         // Force flush any pending pixel writes without evicting:
@@ -203,6 +262,18 @@ export function canvas_drawImagePart(dest: RemoteCanvas, src : RemoteImage | Rem
     aboutToDrawOnImage(dest);
     asyncBridge({request: "canvas_drawImagePart", dest, src, sx, sy, sw, sh, dx, dy, scale});
 }
+// Fills the whole of dest with copies of src, with the top-left of one of the copies at offsetX, offsetY:
+export function canvas_fillPattern(dest: RemoteCanvas, src : RemoteImage | RemoteCanvas, offsetX : number, offsetY : number) : void {
+    if (!isRemoteImage(src)) {
+        // Force flush any pending pixel writes without evicting:
+        const cached = pixelsCache.get(src.handle.handle);
+        if (cached) {
+            cached.update.flush();
+        }
+    }
+    aboutToDrawOnImage(dest);
+    asyncBridge({request: "canvas_fillPattern", dest, src, offsetX, offsetY});
+}
 export function canvas_line(img: RemoteCanvas, x : number, y : number, x2 : number, y2 : number) : void {
     aboutToDrawOnImage(img);
     asyncBridge({request: "canvas_drawLine", img, x, y, x2, y2});
@@ -225,6 +296,11 @@ export function polygon_xy_pairs(img : RemoteCanvas, xyPairs : PyProxy) : void {
     asyncBridge({request: "canvas_drawPolygon", img, xyPairs: xyPairsPlain});
 }
 
+export function canvas_applyFilter(img : RemoteCanvas, filter : ImageFilterName, params : PyProxy) : void {
+    aboutToDrawOnImage(img);
+    asyncBridge({request: "canvas_applyFilter", img, filter, params: params.toJs() as number[]});
+}
+
 export function canvas_loadFont(provider : string, fontName : string) : boolean {
     return syncBridge({request: "loadFont", provider, fontName});
 }
@@ -245,6 +321,17 @@ export function canvas_drawText(img : RemoteCanvas, text : string, x : number, y
     const widthHeight = syncBridge({request: "canvas_drawText", img, text, x, y, fontSize, maxWidth, maxHeight, fontName});
     return [widthHeight.width, widthHeight.height];
 }
+// Like canvas_drawText, but for when the size of the text is already known (see measureText), so doesn't need to wait for a reply:
+export function canvas_drawMeasuredText(img : RemoteCanvas, text : string, x : number, y : number, fontSize : number, maxWidth : number, maxHeight : number, fontName : string | null) : void {
+    aboutToDrawOnImage(img);
+    asyncBridge({request: "canvas_drawMeasuredText", img, text, x, y, fontSize, maxWidth, maxHeight, fontName: fontName != null ? fontName + ", sans-serif" : sayFont});
+}
+// Returns a Python two-item array with the width and height that canvas_drawText would give, without drawing anything.
+// The font must already have been loaded (see canvas_loadFont):
+export function measureText(text : string, fontSize : number, maxWidth : number, maxHeight : number, fontName : string | null) : number[] {
+    const widthHeight = syncBridge({request: "measureText", text, fontSize, maxWidth, maxHeight, fontName: fontName != null ? fontName + ", sans-serif" : sayFont});
+    return [widthHeight.width, widthHeight.height];
+}
 
 export function canvas_downloadPNG(src : RemoteCanvas, filenameStem : string) : void {
     // Force flush any pending pixel writes without evicting:
@@ -4,6 +4,7 @@
 
 import {encodeUint8ToString, RemoteSound} from "@/stryperuntime/worker_bridge_type";
 import { asyncBridge, syncBridge } from "@/workers/python_execution_type";
+import { PyBuffer } from "pyodide/ffi";
 
 export function startAudioBuffer(sound : RemoteSound) : void {
     asyncBridge({request: "startSound", sound});
@@ -32,6 +33,16 @@ export function createAudioBufferFromSamples(samples: number[], sampleRate: numb
 export function loadAndWaitForAudioBuffer(path : string) : RemoteSound {
     return syncBridge({request: "loadSound", url: path});
 }
+// Loads a sound from the contents of a file, which sound.py has read (see loadAndWaitForImageBytes for why we do this):
+export function loadAndWaitForAudioBufferBytes(contents : PyBuffer) : RemoteSound {
+    const buffer = contents.getBuffer("u8");
+    try {
+        return syncBridge({request: "loadSoundFromBytes", encodedContents: encodeUint8ToString(buffer.data as Uint8Array)});
+    }
+    finally {
+        buffer.release();
+    }
+}
 export function getSamples(sound : RemoteSound) : number[] {
     if (sound.numberOfChannels > 1) {
         throw new Error("Cannot get samples from stereo sound; convert to mono first");
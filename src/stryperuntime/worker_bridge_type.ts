@@ -39,6 +39,7 @@
 // we combine it all into one mega function with a request data type.
 // All of these have a corresponding entry in SyncStrypePyodideWorkerResponse, below.
 import { Expect, IsSerializable } from "@/stryperuntime/check_serializable";
+import { ImageFilterName } from "@/stryperuntime/image_filters";
 
 export type CloudFileInfo = {fileId: CloudFileId, name: string; isDir: true;} | {fileId: CloudFileId, name: string; isDir: false; fileSize: number};
 
@@ -46,12 +47,15 @@ export type SyncStrypePyodideWorkerRequest =
     | { request: "dummy" } // No-op request used to make sure we haven't raced too far ahead of main thread
     | { request: "console_input" }    
     | { request: "loadImage"; url: string }
+    | { request: "loadImageFromBytes"; encodedContents: string; mimeType: string } // See encodeUint8ToString below
     | { request: "loadLibraryAsset"; libraryShortName: string; fileName: string }
     | { request: "loadFont"; provider: string; fontName: string }
     | { request: "makeOffscreenCanvas"; width: number; height: number }
     | { request: "ensureCanvas"; img: RemoteCanvas | RemoteImage }
     | { request: "canvas_getAllPixelsRGBA"; img: RemoteCanvas }
+    | { request: "image_getAllPixelsRGBA"; img: RemoteImage }
     | { request: "canvas_drawText", img: RemoteCanvas, text: string, x: number, y: number, fontSize: number, maxWidth: number, maxHeight: number, fontName: string }
+    | { request: "measureText", text: string, fontSize: number, maxWidth: number, maxHeight: number, fontName: string }
     | { request: "canvas_makeCopy", img: RemoteCanvas, scale: number, rotate: number, flip: "horizontal" | "vertical" | "none"  }
     | { request: "turtle", buffer: [string, string, any][]}    
     | { request: "getPressedKeys" }
@@ -60,6 +64,7 @@ export type SyncStrypePyodideWorkerRequest =
     | { request: "consumeLastClickDetails" }
     | { request: "consumeLastClickedItems" }
     | { request: "loadSound"; url: string }
+    | { request: "loadSoundFromBytes"; encodedContents: string } // See encodeUint8ToString below
     | { request: "createEmptyMonoSound"; numSamples: number; sampleRate: number; }
     | { request: "createMonoSound"; encodedSamples: string; sampleRate: number; }
     | { request: "playSoundAndWait"; sound: RemoteSound }
@@ -86,12 +91,15 @@ export type SyncStrypePyodideWorkerResponse =
     | { request: "dummy"; response: boolean; }
     | { request: "console_input"; response: string; }
     | { request: "loadImage"; response: RemoteImage;}
+    | { request: "loadImageFromBytes"; response: RemoteImage;}
     | { request: "loadLibraryAsset"; response: string | undefined; }
     | { request: "loadFont"; response: boolean; }
     | { request: "makeOffscreenCanvas"; response: RemoteCanvas; }
     | { request: "ensureCanvas"; response: RemoteCanvas; }
     | { request: "canvas_getAllPixelsRGBA"; response: string } // See encodeRGBA/decodeRGBA below
+    | { request: "image_getAllPixelsRGBA"; response: string } // See encodeRGBA/decodeRGBA below
     | { request: "canvas_drawText"; response: { width: number; height: number; } }
+    | { request: "measureText"; response: { width: number; height: number; } }
     | { request: "canvas_makeCopy"; response: RemoteCanvas }
     | { request: "turtle"; response: boolean; } // We don't need a return value as such, we're just using the response to wait
     | { request: "getPressedKeys"; response: {[key: string]: boolean} }
@@ -100,6 +108,7 @@ export type SyncStrypePyodideWorkerResponse =
     | { request: "consumeLastClickDetails", response: { x: number, y: number, button: number, clickCount: number } | null }
     | { request: "consumeLastClickedItems", response: SpriteHandle[] }
     | { request: "loadSound"; response: RemoteSound;}
+    | { request: "loadSoundFromBytes"; response: RemoteSound;}
     | { request: "createEmptyMonoSound"; response: RemoteSound; }
     | { request: "createMonoSound"; response: RemoteSound; }
     | { request: "playSoundAndWait"; response: boolean; } // We don't need a return value as such, we're just using the response to wait
@@ -128,6 +137,7 @@ export type AsyncStrypePyodideWorkerRequest =
     | { request: "console_print"; text: string; containsInputPrompt: boolean }
     | { request: "console_clear" }
     | { request: "canvas_drawImagePart"; dest: RemoteCanvas, src : RemoteImage | RemoteCanvas, dx : number, dy : number, sx : number, sy : number, sw: number, sh : number, scale : number }
+    | { request: "canvas_fillPattern"; dest: RemoteCanvas, src : RemoteImage | RemoteCanvas, offsetX : number, offsetY : number }
     | { request: "canvas_clearRect"; img: RemoteCanvas, x: number; y: number; width: number; height: number }
     | { request: "canvas_fillWhole"; img: RemoteCanvas }
     | { request: "canvas_drawArc"; img: RemoteCanvas, x: number; y: number; width: number; height: number; angleStartRad: number; angleDeltaRad: number; }
@@ -136,8 +146,10 @@ export type AsyncStrypePyodideWorkerRequest =
     | { request: "canvas_drawPolygon"; img: RemoteCanvas, xyPairs: number[][] }
     | { request: "canvas_setFill"; img: RemoteCanvas, fill: string }
     | { request: "canvas_setStroke"; img: RemoteCanvas, stroke: string }
+    | { request: "canvas_drawMeasuredText", img: RemoteCanvas, text: string, x: number, y: number, fontSize: number, maxWidth: number, maxHeight: number, fontName: string } // Like canvas_drawText, when the size is already known
     | { request: "canvas_drawPixels", img: RemoteCanvas, x: number; y: number; width: number; height: number; pixelRGBA: string } // See encodeRGBA/decodeRGBA below
     | { request: "canvas_downloadPNG", img: RemoteCanvas, filenameStem: string }
+    | { request: "canvas_applyFilter", img: RemoteCanvas, filter: ImageFilterName, params: number[] } // See image_filters.ts
     | { request: "startSound"; sound: RemoteSound }
     | { request: "stopSound"; sound: RemoteSound }
     | { request: "setMonoSoundSampleValues"; sound: RemoteSound; encodedSamples: string }
@@ -253,16 +265,36 @@ export type SyncPromiseStrypePyodideHandlerFunction = (req: SyncStrypePyodideWor
 
 export type AsyncStrypePyodideHandlerFunction = (req : AsyncStrypePyodideWorkerRequest) => void;
 
+// When a sprite's image is a sprite sheet (see SpriteSheet in graphics.py), this says which part of it is shown.
+// The sheet is split into frames of width x height, numbered left to right then top to bottom with the given number
+// of columns.  The sprite shows each frame number in sequence in turn, fps times a second, counting from startTime
+// (as given by Date.now()), and going back to the start of the sequence after the end.  Both threads work out the
+// current frame from the time, so an animation needs no messages after it has started:
+export type SpriteFrames = {width: number, height: number, columns: number, sequence: number[], fps: number, startTime: number};
+
+// When a sprite moves by itself (see set_velocity in graphics.py), this says how.  At startTime (as given by Date.now())
+// the sprite was at (startX, startY) with startRotation, and every second it moves by vx and vy and turns by angularVelocity
+// degrees (anti-clockwise).  edge says what happens when it reaches the edge of the world: it either stops there, wraps round
+// to the other side or bounces back.  Python and both threads work out the current position from the time (see motionAt
+// in image_and_collisions.ts), so a moving sprite needs no messages while it moves:
+export type SpriteEdgeMode = "stop" | "wrap" | "bounce";
+export type SpriteMotion = {startX: number, startY: number, startRotation: number, vx: number, vy: number, angularVelocity: number, edge: SpriteEdgeMode, startTime: number};
+
 // These updates are sent from the Pyodide-thread SpriteManager to the renderer so it can render the sprite state when it wants.
 // Note that this is separate to the image drawing calls, so it is possible that the user could do e.g.
 //   move actor position, draw circle on actor image 
 // and then see it with the circle position but without the moved position.  However, this would only typically be for one animation frame
 // before it catches up, so I don't think it matters particularly.  We could revisit the design if it becomes a problem in practice
-export type StrypeSpriteStateUpdate =
+export type StrypeSpriteStateSingleUpdate =
     | {request: "clear"}
-    | {request: "add", id: SpriteHandle, x: number, y: number, rotation: number, scale: number, image: RemoteImage | RemoteCanvas, collidable: boolean}
+    | {request: "add", id: SpriteHandle, x: number, y: number, rotation: number, scale: number, image: RemoteImage | RemoteCanvas, collidable: boolean, frames: SpriteFrames | null, motion: SpriteMotion | null}
     | {request: "remove", id: SpriteHandle, removeAtTime: number | null} // null means remove immediately
-    | {request: "update", id: SpriteHandle, x: number, y: number, rotation: number, scale: number, image: RemoteImage | RemoteCanvas, collidable: boolean}
+    | {request: "update", id: SpriteHandle, x: number, y: number, rotation: number, scale: number, image: RemoteImage | RemoteCanvas, collidable: boolean, frames: SpriteFrames | null, motion: SpriteMotion | null}
+;
+// A bulk update is several updates sent in one message, to be applied in order (see SpriteManager.setSpriteTransforms):
+export type StrypeSpriteStateUpdate =
+    | StrypeSpriteStateSingleUpdate
+    | {request: "bulk", updates: StrypeSpriteStateSingleUpdate[]}
 ;
 
 // eslint-disable-next-line @typescript-eslint/no-unused-vars
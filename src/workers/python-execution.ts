@@ -81,6 +81,7 @@ import * as Comlink from "comlink";
 import {strype_bridge} from "@/stryperuntime/pyodide_bridge";
 import {ResponseFor, SyncOrAsyncStrypePyodideWorkerRequest, SyncStrypePyodideHandlerFunction, SyncStrypePyodideWorkerRequest, SyncStrypePyodideWorkerResponse} from "@/stryperuntime/worker_bridge_type";
 import {SpriteManager} from "@/stryperuntime/image_and_collisions";
+import {getPixelsForCollisionMask} from "@/stryperuntime/strype_graphics_internal";
 import {asyncBridge, PyodideWorkerGlobalScope, syncBridge} from "@/workers/python_execution_type";
 import {getFSForEmscripten} from "@/stryperuntime/pyodide-emscripten-cloud-fs";
 import { assetsFilePrefixes, createLazyFetchAssetsFS } from "@/stryperuntime/pyodide-emscripten-assets-fs";
@@ -177,11 +178,15 @@ const executePython = pyodideExpose(async (
     // we share this same counter and catch-up logic with sprite updates, to bound how many messages of
     // *either* kind can be outstanding at once:
     let numConsecutiveAsyncRequests = 0;
+    // Counted for strype/_bridge_instrumentation.py (see getBridgeMessageCounts), which can't otherwise tell
+    // whether a bridge call had to wait for the main thread:
+    self.bridgeMessageCounts = {sync: 0, async: 0, spriteUpdates: 0};
     // Does the actual sync dummy round-trip that guarantees all previously-sent async requests
     // (e.g. console_print for stdout/stderr) have been fully processed by the main thread, per the
     // ordering guarantee described above.
     const syncCatchUpWithMainThread = () => {
         logFirstSyncReadDiagnosticsOnce();
+        self.bridgeMessageCounts.sync += 1;
         makeRawRequest({kind: "sync", request: {request: "dummy"}});
         const reply = extras.readMessage() as (SyncStrypePyodideWorkerResponse | {request: string, error: string});
         if (reply.request != "dummy") {
@@ -199,9 +204,11 @@ const executePython = pyodideExpose(async (
     const makeRequest = (req: SyncOrAsyncStrypePyodideWorkerRequest) => {
         if (req.kind === "sync") {
             numConsecutiveAsyncRequests = 0;
+            self.bridgeMessageCounts.sync += 1;
         }
         else {
             catchUpWithMainThreadIfNeeded();
+            self.bridgeMessageCounts.async += 1;
         }
         // All requests are ultimately sent on:
         makeRawRequest(req);
@@ -243,6 +250,7 @@ sys.path.append("${libDir}")
         
         
         const runner = pyodide.runPython(`from python_runner import PyodideRunner
+import sys
 import traceback
 from itertools import dropwhile
 class StrypePyodideRunner(PyodideRunner):
@@ -263,6 +271,16 @@ class StrypePyodideRunner(PyodideRunner):
         for name in getattr(strype_builtins, "__all__", dir(strype_builtins)):
             if not name.startswith("_"):
                 target[name] = getattr(strype_builtins, name)
+    def post_run(self):
+        # If the program batched sprite changes (see set_batching in strype.graphics), send the last of them:
+        graphics = sys.modules.get("strype.graphics")
+        if graphics is not None:
+            graphics._flush_sprite_updates()
+        # If the program turned on strype._bridge_instrumentation, send its results:
+        instrumentation = sys.modules.get("strype._bridge_instrumentation")
+        if instrumentation is not None and instrumentation.is_enabled():
+            self.callback("bridge_stats", **instrumentation.get_stats())
+        super().post_run()
 runner = StrypePyodideRunner()
 
 # Work around from Pyodide repo, then used in WebTigerPython, then adapted by us for the 800x600 part:
@@ -421,8 +439,9 @@ runner`);
         self.asyncStrypePyodideWorkerBridge = (r) => makeRequest({kind: "async", request: r});
         self.spriteManager = new SpriteManager((u) => {
             catchUpWithMainThreadIfNeeded();
+            self.bridgeMessageCounts.spriteUpdates += 1;
             self.updatePort.postMessage(u);
-        });
+        }, getPixelsForCollisionMask);
         self.pyodide = pyodide;
         
 
@@ -523,6 +542,10 @@ runner`);
                 matPlotLibSpriteId = self.spriteManager.addSprite(image, false);
                 return [image.width, image.height];
             }
+            else if (type === "bridge_stats") {
+                // Only sent if the program turned on strype._bridge_instrumentation, for diagnosing performance:
+                console.log("Strype bridge call statistics:", data);
+            }
             else {
                 // We don't currently handle any other callbacks
             }
@@ -11,6 +11,8 @@ export interface PyodideWorkerGlobalScope extends WorkerGlobalScope {
     asyncStrypePyodideWorkerBridge: AsyncStrypePyodideHandlerFunction;
     spriteManager : SpriteManager;
     pyodide: PyodideAPI;
+    // The number of messages of each kind sent to the main thread so far in this run:
+    bridgeMessageCounts: {sync: number, async: number, spriteUpdates: number};
 }
 
 // A function which takes a request from SyncStrypePyodideWorkerRequest and synchronously returns
@@ -911,3 +911,433 @@ plt.show()
     }
 });
 
+test.describe("Test batched actor movements", () => {
+    test("Check batched moves reach the collision checks", async ({page}) => {
+        // While batching, moves are saved up and only sent when something needs them, such as is_touching or
+        // get_actor_at, so check that the collision checks (done in the worker's SpriteManager) see the final location:
+        await loadContent(page, `
+from strype.graphics import *
+set_batching(True)
+a = Actor(Image(20, 20), 0, 0)
+b = Actor(Image(20, 20), 200, 0)
+for i in range(10):
+    b.move(-20)
+print(a.is_touching(b), get_actor_at(200, 0))
+set_batching(False)
+b.set_location(0, 100)
+print(get_actor_at(0, 100) is b, a.is_touching(b))
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "True None\nTrue False\n");
+    });
+});
+
+test.describe("Test actor tags", () => {
+    test("Check finding, touching and removing actors by tag", async ({page}) => {
+        // get_actors, get_all_touching and remove_actors all use the index of actors by tag, which must be kept
+        // up to date as actors are added, removed and re-added:
+        await loadContent(page, `
+from strype.graphics import *
+for i in range(5):
+    Actor(Image(10, 10), i * 50 - 100, 0, "coin")
+p = Actor(Image(10, 10), 0, 200, "player")
+print(len(get_actors("coin")), len(get_actors("player")), len(get_actors()))
+p.set_location(0, 0)
+print(len(p.get_all_touching("coin")), p.get_touching("player"))
+removed = remove_actors("coin")
+print(len(removed), len(get_actors("coin")), len(get_actors()))
+removed[0].re_add(0, 0)
+print(len(get_actors("coin")), p.is_touching("coin"))
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "5 1 6\n1 None\n5 0 1\n1 True\n");
+    });
+});
+
+test.describe("Test collision pairs", () => {
+    test("Check get_collisions finds each touching pair once", async ({page}) => {
+        // get_collisions asks the worker's SpriteManager for all the touching pairs in one call, with the first actor
+        // of each pair having the first tag:
+        await loadContent(page, `
+from strype.graphics import *
+for x in [-200, 0, 200]:
+    Actor(Image(10, 10), x, 0, "bullet")
+for x in [0, 205, 300]:
+    Actor(Image(10, 10), x, 0, "enemy")
+pairs = get_collisions("bullet", "enemy")
+print(sorted([(b.get_x(), e.get_x()) for (b, e) in pairs]))
+print(all([b.get_tag() == "bullet" and e.get_tag() == "enemy" for (b, e) in pairs]))
+print(len(get_collisions("enemy", "bullet")), len(get_collisions("bullet", "bullet")), len(get_collisions()))
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "[(0, 0), (200, 205)]\nTrue\n2 0 2\n");
+    });
+});
+
+test.describe("Test precise collisions", () => {
+    test("Check precise collisions only count solid pixels", async ({page}) => {
+        // The first actor is solid only in its top-left corner, so the second actor only touches it there once
+        // precise collisions are on, both for single checks and for get_collisions:
+        await loadContent(page, `
+from strype.graphics import *
+corner = Image(60, 60)
+corner.set_fill("red")
+corner.set_stroke(None)
+corner.draw_rect(0, 0, 10, 10)
+a = Actor(corner, 0, 0, "corner")
+dot = Image(10, 10)
+dot.set_fill("blue")
+dot.set_stroke(None)
+dot.draw_rect(0, 0, 10, 10)
+b = Actor(dot, 20, -20, "dot")
+print(a.is_touching(b), len(get_collisions("corner", "dot")))
+a.set_precise_collisions(True)
+print(a.is_touching(b), len(get_collisions("corner", "dot")))
+b.set_location(-25, 25)
+print(a.is_touching(b), len(get_collisions("corner", "dot")))
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "True 1\nFalse 0\nTrue 1\n");
+    });
+});
+
+test.describe("Test sprite sheets", () => {
+    test("Check the shown frame decides size and collisions", async ({page}) => {
+        // An actor showing a sprite sheet is the size of one frame, and precise collisions use the pixels
+        // of the frame it is showing, which for animate() depends on the time:
+        await loadContent(page, `
+from strype.graphics import *
+sheet_image = Image(100, 50)
+sheet_image.set_fill("red")
+sheet_image.set_stroke(None)
+sheet_image.draw_rect(0, 0, 50, 50)
+sheet = SpriteSheet(sheet_image, 50, 50)
+a = Actor(sheet, 0, 0, "sheet")
+dot = Actor(Image(4, 4), 0, 0, "dot")
+print(sheet.get_frame_count(), a.get_frame(), get_actor_at(40, 0))
+a.set_precise_collisions(True)
+print(a.is_touching(dot))
+a.set_frame(1)
+print(a.get_frame(), a.is_touching(dot))
+a.animate([0, 1], 1)
+print(a.get_frame(), a.is_touching(dot))
+pause(1.5)
+print(a.get_frame(), a.is_touching(dot))
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "2 0 None\nTrue\n1 False\n0 True\n1 False\n");
+    });
+});
+
+test.describe("Test actor groups", () => {
+    test("Check moving, turning and removing a group of actors", async ({page}) => {
+        // ActorGroup sends the changes to all its actors in one call, so check the worker's SpriteManager
+        // has them all:
+        await loadContent(page, `
+from strype.graphics import *
+group = ActorGroup()
+for i in range(4):
+    group.add(Actor(Image(10, 10), i * 100 - 150, 0, "member"))
+group.move_all(10)
+print([round(x) for x in group.get_xs()])
+group.set_locations([0, 100, 200, 300], [50, 50, 50, 50])
+print(get_actor_at(100, 50) is group.get_actors()[1], get_actor_at(-140, 0))
+group.turn_all(90)
+group.move_all(20)
+print([round(y) for y in group.get_ys()], get_actor_at(200, 70) is group.get_actors()[2])
+group.remove_where([True, False, True, False])
+print(len(group), len(get_actors("member")), get_actor_at(0, 70))
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "[-140, -40, 60, 160]\nTrue None\n[70, 70, 70, 70] True\n2 2 None\n");
+    });
+});
+
+test.describe("Test actor velocities", () => {
+    test("Check actors wrap, bounce and stop at the edges", async ({page}) => {
+        // The worker's SpriteManager works out where moving actors are by itself (see motionAt), and must agree
+        // with graphics.py.  After one second at 150 pixels per second from x = 350, the wrapping actor has come
+        // back in on the left, the bouncing one has come back from the right edge, and the other stops at the edge:
+        await loadContent(page, `
+from strype.graphics import *
+wrapping = Actor(Image(60, 60), 350, 0)
+wrapping.set_edge_mode("wrap")
+wrapping.set_velocity(150, 0)
+bouncing = Actor(Image(60, 60), 350, 150)
+bouncing.set_edge_mode("bounce")
+bouncing.set_velocity(150, 0)
+stopping = Actor(Image(60, 60), 350, -150)
+stopping.set_velocity(150, 0)
+pause(1)
+print(abs(wrapping.get_x() + 299) < 30, get_actor_at(-299, 0) is wrapping)
+print(abs(bouncing.get_x() - 300) < 30, get_actor_at(300, 150) is bouncing, bouncing.get_velocity()[0] < 0)
+print(stopping.get_x(), get_actor_at(390, -150) is stopping)
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "True True\nTrue True True\n400 True\n");
+    });
+});
+
+test.describe("Test actor group columns", () => {
+    test("Check the group sees changes made to single actors", async ({page}) => {
+        // The group keeps the locations of its actors in columns of its own, which must be read again when one of
+        // its actors is moved, given a speech bubble or removed by itself:
+        await loadContent(page, `
+from strype.graphics import *
+group = ActorGroup([Actor(Image(10, 10), 0, 0), Actor(Image(10, 10), 100, 0)])
+first, second = group.get_actors()
+second.set_location(-50, -50)
+group.move_all(10)
+print(list(group.get_xs()), list(group.get_ys()), second.get_x())
+first.say("Hi")
+group.turn_all(90)
+group.move_all(10)
+print(first.get_y(), get_actor_at(-40, -40) is second)
+first.remove()
+group.set_locations(1000, 200)
+print(first.get_x(), list(group.get_xs()), get_actor_at(400, 200) is second)
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "[10.0, -40.0] [0.0, -50.0] -40\n10 True\nNone [10.0, 400.0] True\n");
+    });
+});
+
+test.describe("Test actor group steps", () => {
+    test("Check step_all moves each actor by its own step", async ({page}) => {
+        // A group step is an amount to move each time step_all is called, which is separate from the
+        // velocity in pixels per second which Actor.set_velocity uses to make an actor move by itself:
+        await loadContent(page, `
+from strype.graphics import *
+group = ActorGroup()
+group.add(Actor(Image(10, 10), 0, 0), 5, 0)
+group.add(Actor(Image(10, 10), 0, 100))
+group.set_steps([1, 2], 3)
+group.step_all()
+group.step_all()
+print(list(group.get_xs()), list(group.get_ys()), [list(steps) for steps in group.get_steps()])
+print(group.get_actors()[1].get_velocity(), get_actor_at(4, 106) is group.get_actors()[1])
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "[2.0, 4.0] [6.0, 106.0] [[1.0, 2.0], [3.0, 3.0]]\n(0, 0) True\n");
+    });
+});
+
+test.describe("Test batched actor creation", () => {
+    test("Check batched new actors, images and removals", async ({page}) => {
+        // Actors made while batching are only sent with the next flush, so check that collision checks see them with
+        // their latest image, and that an actor removed before it was ever sent is not left behind:
+        await loadContent(page, `
+from strype.graphics import *
+set_batching(True)
+actors = [Actor(Image(20, 20), i * 30, 0) for i in range(5)]
+actors[0].say("Hi")
+actors[1].set_image(Image(40, 10))
+actors[2].remove()
+print(get_actor_at(48, 0) is actors[1], get_actor_at(60, 0), len(get_actors()))
+actors[3].move(100)
+pace(1000)
+print(actors[3].get_x(), actors[4].is_touching(actors[3]), get_actor_at(190, 0) is actors[3])
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "True None 4\n190 False True\n");
+    });
+});
+
+test.describe("Test pixel buffers", () => {
+    test("Check pixels read back after PixelBuffer writes", async ({page}) => {
+        // Reading pixels caches them (see canvas_getPixel), so check that write_back refreshes the cache, and that
+        // nothing changes until it is called, or if the buffer is the wrong length.  The pixels are opaque, so the canvas gives them back exactly:
+        await loadContent(page, `
+from strype.graphics import *
+def show(img):
+    print([(c.red, c.green, c.blue, c.alpha) for c in (img.get_pixel(x, 0) for x in range(img.get_width()))])
+img = Image(3, 1)
+show(img)
+with img.pixels() as pixels:
+    pixels[:] = bytes([255, 0, 0, 255, 0, 255, 0, 255, 0, 0, 255, 255])
+show(img)
+pixels = img.pixels()
+print(list(pixels[4:8]))
+pixels[4:8] = bytes([10, 20, 30, 255])
+show(img)
+pixels.write_back()
+show(img)
+try:
+    with img.pixels() as pixels:
+        pixels[0] = 0
+        del pixels[0:4]
+except ValueError:
+    print("wrong length")
+show(img)
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "[(0, 0, 0, 0), (0, 0, 0, 0), (0, 0, 0, 0)]\n[(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255)]\n[0, 255, 0, 255]\n[(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255)]\n[(255, 0, 0, 255), (10, 20, 30, 255), (0, 0, 255, 255)]\nwrong length\n[(255, 0, 0, 255), (10, 20, 30, 255), (0, 0, 255, 255)]\n");
+    });
+});
+
+test.describe("Test image filters", () => {
+    test("Check pixels read back after each filter", async ({page}) => {
+        // Each filter must first send any pixels set with set_pixel, and then refresh the cached pixels, so check the
+        // pixels after every one.  The pixels are opaque, so the canvas gives them back exactly:
+        await loadContent(page, `
+from strype.graphics import *
+def show(img):
+    print([(c.red, c.green, c.blue, c.alpha) for c in (img.get_pixel(x, 0) for x in range(img.get_width()))])
+img = Image(3, 1)
+for x, color in enumerate(["#ff0000", "#00ff00", "#0000ff"]):
+    img.set_pixel(x, 0, color)
+show(img)
+img.invert()
+show(img)
+img.replace_color("#00ffff", "#102030")
+show(img)
+img.adjust(2.0)
+show(img)
+img.grayscale()
+show(img)
+img.threshold(100)
+show(img)
+img.box_blur(1)
+show(img)
+img.gaussian_blur(1)
+show(img)
+img.convolve([[0, 0, 0], [0, 2, 0], [0, 0, 0]])
+show(img)
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "[(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255)]\n[(0, 255, 255, 255), (255, 0, 255, 255), (255, 255, 0, 255)]\n[(16, 32, 48, 255), (255, 0, 255, 255), (255, 255, 0, 255)]\n[(32, 64, 96, 255), (255, 0, 255, 255), (255, 255, 0, 255)]\n[(58, 58, 58, 255), (105, 105, 105, 255), (226, 226, 226, 255)]\n[(0, 0, 0, 255), (255, 255, 255, 255), (255, 255, 255, 255)]\n[(85, 85, 85, 255), (170, 170, 170, 255), (255, 255, 255, 255)]\n[(94, 94, 94, 255), (170, 170, 170, 255), (246, 246, 246, 255)]\n[(188, 188, 188, 255), (255, 255, 255, 255), (255, 255, 255, 255)]\n");
+    });
+});
+
+test.describe("Test color caching", () => {
+    test("Check cached color parsing and HTML strings", async ({page}) => {
+        // Parsing is cached, but each Color must still be a separate object, and the cached HTML string of a Color
+        // must change when the Color is changed.  Colors have __slots__, so unknown attributes are an error:
+        await loadContent(page, `
+from strype.graphics import *
+a = color_from_string("Red")
+b = color_from_string("red")
+a.green = 200
+print(a.red, a.green, b.green, a is b)
+try:
+    a.shade = 1
+except AttributeError:
+    print("no shade")
+c = Color(0, 0, 255)
+first = Image(1, 1)
+first.set_fill(c)
+first.fill()
+c.red = 255
+second = Image(1, 1)
+second.set_fill(c)
+second.fill()
+p1, p2 = first.get_pixel(0, 0), second.get_pixel(0, 0)
+print(p1.red, p1.blue, p2.red, p2.blue)
+for i in range(2):
+    try:
+        color_from_string("#12345")
+    except ValueError:
+        print("bad")
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "255 200 0 False\nno shade\n0 255 255 255\nbad\nbad\n");
+    });
+});
+
+test.describe("Test asset cache", () => {
+    test("Check asset cache hits, misses and evictions", async ({page}) => {
+        // Loading the same image again should use the cache, and going over the size limit (64MB unless
+        // changed) should drop the least recently used images first:
+        await loadContent(page, `
+import strype._asset_cache as cache
+from strype.graphics import *
+cache.clear()
+fish = Actor("fish.png")
+load_image("fish.png")
+Actor("rock.png")
+stats = cache.get_stats()
+print(stats["hits"], stats["misses"], stats["entries"], stats["evictions"], stats["max_bytes"] == 64 * 1024 * 1024)
+# Too small for both, so the least recently used (the fish) is dropped:
+cache.set_max_bytes(stats["bytes"] - 1)
+Actor("rock.png")
+stats = cache.get_stats()
+print(stats["hits"], stats["misses"], stats["entries"], stats["evictions"])
+# Loading the fish again is a miss, and drops the rock to make room:
+Actor("fish.png")
+stats = cache.get_stats()
+print(stats["hits"], stats["misses"], stats["entries"], stats["evictions"])
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "1 2 2 0 True\n2 2 1 1\n2 3 1 2\n");
+    });
+});
+
+test.describe("Test text caches", () => {
+    test("Check shared text images and cached text measurements", async ({page}) => {
+        // Actors showing the same text share one cached image, so get_image() must give each of them its own
+        // copy (even after re_add) rather than let them draw on the shared one.  Measuring the same text again is cached:
+        await loadContent(page, `
+import strype.graphics as graphics
+from strype.graphics import *
+def rgba(img):
+    c = img.get_pixel(5, 5)
+    return (c.red, c.green, c.blue, c.alpha)
+show_text("Hi", 0, 0)
+info = graphics._shown_text_image.cache_info()
+show_text("Hi", 0, 100)
+print(graphics._shown_text_image.cache_info().hits - info.hits)
+shared = graphics._shown_text_image("Hi", 24)
+before = rgba(shared)
+a, b = get_actors()
+mine = a.get_image()
+mine.set_fill("red")
+mine.fill()
+print(mine is shared, rgba(mine), rgba(shared) == before)
+b.remove()
+b.re_add(0, 100)
+print(b.get_image() is shared, rgba(b.get_image()) == before)
+info = graphics._measure_text.cache_info()
+img = Image(200, 100)
+img.draw_text("Hello", 0, 0, 20)
+img.draw_text("Hello", 0, 50, 20)
+after = graphics._measure_text.cache_info()
+print(after.misses - info.misses, after.hits - info.hits)
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "1\nFalse (255, 0, 0, 255) True\nFalse True\n1 1\n");
+    });
+});
+
+test.describe("Test pattern fills", () => {
+    test("Check fill_pattern and tiled backgrounds", async ({page}) => {
+        // fill_pattern tiles the image in one go, so check that the copies line up with the given offset, and that
+        // set_background centres a tile in the middle of the world.  Whole-pixel offsets give exact pixels:
+        await loadContent(page, `
+from strype.graphics import *
+def quarters(size):
+    # An image whose top-left, top-right, bottom-left and bottom-right quarters are red, green, blue and white:
+    img = Image(size, size)
+    with img.pixels() as pixels:
+        for y in range(size):
+            for x in range(size):
+                i = (y * size + x) * 4
+                pixels[i:i + 4] = [(255, 0, 0, 255), (0, 255, 0, 255), (0, 0, 255, 255), (255, 255, 255, 255)][(y >= size // 2) * 2 + (x >= size // 2)]
+    return img
+def names(img, points):
+    colors = {(255, 0, 0, 255): "R", (0, 255, 0, 255): "G", (0, 0, 255, 255): "B", (255, 255, 255, 255): "W"}
+    return "".join(colors.get((c.red, c.green, c.blue, c.alpha), "?") for c in (img.get_pixel(x, y) for x, y in points))
+dest = Image(5, 3)
+dest.fill_pattern(quarters(2), 1, 0)
+for y in range(3):
+    print(names(dest, [(x, y) for x in range(5)]))
+dest.fill_pattern(quarters(2), -1, -1)
+print(names(dest, [(x, 0) for x in range(5)]))
+# A 100x100 tile is centred in the 800x600 background, so the background starts halfway through a tile:
+set_background(quarters(100))
+print(names(get_background(), [(0, 0), (50, 50), (399, 299), (400, 300), (799, 599)]))
+`);
+        await runToFinish(page);
+        await checkConsoleContent(page, "GRGRG\nWBWBW\nGRGRG\nWBWBW\nWRRWR\n");
+    });
+});
+
@@ -0,0 +1,9 @@
+# Tests for python_runner (pysrc/python_runner) and for strype.graphics running against the headless bridge
+# (scripts/stubs), run with a normal CPython:
+#   python3 -m pytest tests/python_runner
+import os
+import sys
+
+_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(_root, "pysrc"))
+sys.path.insert(0, os.path.join(_root, "scripts", "stubs"))
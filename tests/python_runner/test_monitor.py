@@ -0,0 +1,39 @@
+import sys
+
+import pytest
+
+from python_runner import Runner
+
+pytestmark = pytest.mark.skipif(not hasattr(sys, "monitoring"), reason="needs sys.monitoring (Python 3.12+)")
+
+LOOP = """\
+def f(n):
+    return n * 2
+
+total = 0
+for i in range(100):
+    total += f(i)
+last = total
+"""
+
+
+def run_monitor(source_code, **monitor_config):
+    batches = []
+    runner = Runner(callback=lambda event_type, data: batches.append(data) if event_type == "monitor" else None)
+    runner.run(source_code, mode="monitor", monitor_config=monitor_config)
+    return batches
+
+
+def test_monitoring_stops_at_max_events():
+    batches = run_monitor(LOOP, max_events=20)
+    assert sum(len(batch["events"]) for batch in batches) == 20
+    # Only the event which hit the cap is seen, as all the events are switched off after it:
+    assert sum(batch["dropped"] for batch in batches) == 1
+    assert sys.monitoring.get_tool(0) is None
+
+
+def test_final_module_locals_are_sent():
+    events = [event for batch in run_monitor(LOOP) for event in batch["events"]]
+    assert events[-1]["type"] == "return"
+    assert events[-1]["function"] == "<module>"
+    assert events[-1]["locals"] == {"last": "9900"}
@@ -0,0 +1,92 @@
+import pytest
+
+from python_runner import Runner
+from python_runner import output
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(output, "time", clock)
+    return clock
+
+
+def make_buffer(**config):
+    flushes = []
+    return output.OutputBuffer(lambda parts: flushes.append([dict(part) for part in parts]), **config), flushes
+
+
+def test_output_after_a_quiet_period_is_flushed_straight_away(clock):
+    buffer, flushes = make_buffer()
+    buffer.put("stdout", "a")
+    assert flushes == [[{"type": "stdout", "text": "a"}]]
+
+
+def test_quick_output_is_batched(clock):
+    buffer, flushes = make_buffer()
+    buffer.put("stdout", "a")
+    clock.now += 0.01
+    buffer.put("stdout", "b")
+    buffer.put("stdout", "c")
+    assert len(flushes) == 1
+    buffer.flush()
+    assert flushes[1] == [{"type": "stdout", "text": "bc"}]
+
+
+def test_a_different_output_type_flushes(clock):
+    buffer, flushes = make_buffer()
+    buffer.put("stdout", "a")
+    buffer.put("stdout", "b")
+    buffer.put("stderr", "c")
+    assert flushes[1] == [{"type": "stdout", "text": "b"}, {"type": "stderr", "text": "c"}]
+
+
+def test_long_output_flushes(clock):
+    buffer, flushes = make_buffer(flush_length=10)
+    buffer.put("stdout", "a")
+    buffer.put("stdout", "b" * 5)
+    assert len(flushes) == 1
+    buffer.put("stdout", "c" * 5)
+    assert flushes[1] == [{"type": "stdout", "text": "b" * 5 + "c" * 5}]
+
+
+def test_flush_if_due_only_flushes_old_output(clock):
+    buffer, flushes = make_buffer(flush_time=0.5)
+    buffer.put("stdout", "a")
+    buffer.put("stdout", "b")
+    buffer.flush_if_due()
+    assert len(flushes) == 1
+    clock.now += 0.5
+    buffer.flush_if_due()
+    assert flushes[1] == [{"type": "stdout", "text": "b"}]
+    clock.now += 1
+    buffer.flush_if_due()
+    assert len(flushes) == 2
+
+
+def test_without_batching_every_put_is_flushed(clock):
+    buffer, flushes = make_buffer(batching=False)
+    for text in "abc":
+        buffer.put("stdout", text)
+    assert [parts[0]["text"] for parts in flushes] == ["a", "b", "c"]
+
+
+def test_runner_flushes_everything_at_the_end():
+    events = []
+    runner = Runner(
+        callback=lambda event_type, data: events.append(data) if event_type == "output" else None,
+        output_config=dict(flush_time=1000),
+    )
+    runner.run("for i in range(1000):\n    print(i)\n")
+    text = "".join(part["text"] for data in events for part in data["parts"])
+    assert text == "".join(f"{i}\n" for i in range(1000))
+    # Batched, rather than one output event per print:
+    assert len(events) < 100
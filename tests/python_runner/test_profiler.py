@@ -0,0 +1,50 @@
+import sys
+
+import pytest
+
+from python_runner import Runner
+
+needs_monitoring = pytest.mark.skipif(not hasattr(sys, "monitoring"), reason="needs sys.monitoring (Python 3.12+)")
+
+CALLS_BRIDGE = """\
+from strype_bridge import strype_graphics_internal
+
+def check(n):
+    for i in range(n):
+        strype_graphics_internal.imageExists(i)
+
+check(3)
+"""
+
+
+def run_profile(source_code, **profile_config):
+    reports = []
+    runner = Runner(callback=lambda event_type, data: reports.append(data) if event_type == "profile" else None)
+    runner.run(source_code, mode="profile", profile_config=profile_config)
+    assert len(reports) == 1
+    return reports[0]
+
+
+def test_user_functions_are_reported_first():
+    functions = run_profile(CALLS_BRIDGE)["functions"]
+    user = [f for f in functions if f["user"]]
+    assert functions[:len(user)] == user
+    check = next(f for f in user if f["name"] == "check")
+    assert check["calls"] == 1
+    assert check["line"] == 3
+
+
+@needs_monitoring
+def test_line_counts():
+    report = run_profile(CALLS_BRIDGE)
+    assert report["lines"][4] == 4
+    assert report["lines"][5] == 3
+
+
+@needs_monitoring
+def test_bridge_calls_are_counted_on_every_run():
+    for _ in range(2):
+        bridge = run_profile(CALLS_BRIDGE)["bridge"]
+        assert bridge["calls"] == 3
+        assert bridge["functions"]["strype_graphics_internal.imageExists"]["calls"] == 3
+    assert sys.monitoring.get_tool(1) is None
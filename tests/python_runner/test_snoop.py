@@ -0,0 +1,49 @@
+import pytest
+
+from python_runner import Runner
+
+pytest.importorskip("snoop")
+
+LOOP_THEN_CALL = """\
+def f(n):
+    return n * 2
+
+for i in range(30):
+    f(i)
+print("done")
+f(3)
+"""
+
+
+def run_snoop(source_code, **snoop_config):
+    events = []
+    runner = Runner(callback=lambda event_type, data: events.append((event_type, data)))
+    runner.run(source_code, mode="snoop", snoop_config=snoop_config)
+    return [part for event_type, data in events if event_type == "output" for part in data["parts"]]
+
+
+def snoop_text(parts):
+    return "".join(part["text"] for part in parts if part["type"] == "snoop")
+
+
+def test_loop_is_collapsed():
+    text = snoop_text(run_snoop(LOOP_THEN_CALL, collapse_after=3))
+    assert "similar iterations" in text
+    assert "Return value from f: 58" not in text
+
+
+def test_call_after_loop_is_not_collapsed():
+    text = snoop_text(run_snoop(LOOP_THEN_CALL, collapse_after=3))
+    after_loop = text[text.index('print("done")'):]
+    assert "similar iteration" not in after_loop
+    assert "Return value from f: 6" in after_loop
+
+
+def test_tail_is_labelled():
+    parts = run_snoop(LOOP_THEN_CALL, collapse_after=1000, max_events=10, tail_events=5)
+    types = [part["type"] for part in parts]
+    # The tail comes after the program's output, so it must say what it is:
+    tail_start = next(i for i, part in enumerate(parts) if "shown at the end of the run" in part["text"])
+    assert "stdout" in types[:tail_start]
+    assert "the last 5 traced events" in parts[tail_start]["text"]
+    assert types[-1] == "snoop_summary"
@@ -0,0 +1,63 @@
+import linecache
+import os
+
+import pytest
+
+from python_runner import Runner
+
+
+@pytest.fixture
+def in_tmp_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def run(runner, source_code):
+    events = []
+    runner.set_callback(lambda event_type, data: events.append((event_type, data)))
+    runner.run(source_code)
+    return "".join(part["text"] for event_type, data in events if event_type == "output" for part in data["parts"])
+
+
+def test_source_not_written_unless_needed(in_tmp_path):
+    runner = Runner()
+    output = run(runner, "x = 1\nprint(x / 0)\n")
+    assert not (in_tmp_path / "my_program.py").exists()
+    # The traceback still shows the line, from the lazy linecache entry:
+    assert "print(x / 0)" in output
+    assert linecache.getlines(runner.filename) == ["x = 1\n", "print(x / 0)\n"]
+
+
+def test_program_can_read_its_own_file(in_tmp_path):
+    source_code = "print(open(__file__).read())\n"
+    assert run(Runner(), source_code) == source_code + "\n"
+
+
+def test_stale_file_is_refreshed(in_tmp_path):
+    (in_tmp_path / "my_program.py").write_text("print('old')\nold = 1 / 0\n")
+    runner = Runner()
+    output = run(runner, "a = 1\nprint(open(__file__).read())\nb = 1 / 0\n")
+    assert "old" not in output
+    assert "b = 1 / 0" in output
+    # A changed program refreshes the file again, as it exists now:
+    output = run(runner, "c = 2 / 0\n")
+    assert "c = 2 / 0" in output
+    assert (in_tmp_path / "my_program.py").read_text() == "c = 2 / 0\n"
+
+
+def test_existing_program_file_is_not_rewritten(in_tmp_path):
+    # As in the headless runner, which runs a program from its own file:
+    path = in_tmp_path / "game.py"
+    path.write_text("print('hello')\n")
+    os.utime(path, (0, 0))
+    runner = Runner(filename=str(path))
+    assert run(runner, "print('hello')\n") == "hello\n"
+    assert os.stat(path).st_mtime == 0
+
+
+def test_open_is_not_patched(in_tmp_path):
+    import builtins
+    import io
+    run(Runner(), "print(open(__file__).read())\n")
+    assert builtins.open is io.open
+    assert io.open.__module__ in ("io", "_io")